@@ -0,0 +1,54 @@
+"""Compare full-document html.parser parsing with the configured backend.
+
+For each fixture page this times building a complete ``html.parser`` tree
+(what the site modules used to do) against :func:`html_parsing.make_soup`
+with the site's strainer, for every available backend::
+
+    python benchmarks/bench_backends.py
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+import html_parsing
+from sites import irc, sfzc
+
+FIXTURES = [
+    ("sfzc listing", "sfzc.html", sfzc.LISTING_ONLY),
+    ("sfzc detail", "sfzc.html", sfzc.DETAIL_ONLY),
+    ("irc listing", "irc.html", irc.LISTING_ONLY),
+]
+
+
+def best_of(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(repeat: int = 5) -> None:
+    backends = ["html.parser"]
+    if html_parsing.DEFAULT_BACKEND == "lxml":
+        backends.append("lxml")
+
+    for label, name, strainer in FIXTURES:
+        with open(os.path.join(ROOT, "tests", name), encoding="utf-8") as fh:
+            html = fh.read()
+        baseline = best_of(lambda: BeautifulSoup(html, "html.parser"), repeat)
+        print(f"{label:<14} full html.parser      {baseline * 1000:7.1f} ms")
+        for backend in backends:
+            html_parsing.set_backend(backend)
+            elapsed = best_of(lambda: html_parsing.make_soup(html, strainer), repeat)
+            print(
+                f"{'':<14} {backend:<11} strained {elapsed * 1000:7.1f} ms"
+                f"  ({baseline / elapsed:4.1f}x)"
+            )
+    html_parsing.set_backend(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare :mod:`dates` with the ``strptime`` parsing the site parsers used before.
+
+Each parser is timed on strings shaped like the listings: SFZC captions and
+row times, where a page repeats a handful of values, and IRC date ranges.
+``strptime`` is timed as the parsers called it; the :mod:`dates` functions
+are timed without their cache and memoized, starting from an empty cache::
+
+    python benchmarks/bench_dates.py --strings 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dates
+
+CAPTION_FORMAT = "%A, %b %d, %Y"
+CLOCK_FORMAT = "%I:%M %p"
+
+
+def legacy_range(text: str):
+    m = dates.DATE_RANGE_RE.search(text)
+    if not m:
+        return None
+    smonth, sday, syear, emonth, eday, eyear = m.groups()
+    eyear = eyear or syear
+    syear = syear or eyear
+    emonth = emonth or smonth
+    try:
+        start = datetime.strptime(f"{smonth} {sday} {syear}", "%B %d %Y")
+        end = datetime.strptime(f"{emonth} {eday} {eyear}", "%B %d %Y")
+    except ValueError:
+        return None
+    return start, end
+
+
+def make_strings(count: int, seed: int = 3):
+    """Captions, times and ranges in listing proportions: few distinct values."""
+    rng = random.Random(seed)
+    first = date(2025, 1, 1)
+    days = [first + timedelta(days=i) for i in range(120)]
+    captions = [rng.choice(days).strftime(CAPTION_FORMAT) for _ in range(count)]
+    clocks = [f"{rng.randint(6, 11)}:{rng.choice(('00', '30'))} {rng.choice(('am', 'pm'))}" for _ in range(count)]
+    ranges = []
+    for _ in range(count):
+        start = rng.choice(days)
+        end = start + timedelta(days=rng.randint(1, 14))
+        if start.month == end.month:
+            ranges.append(f"{start:%B} {start.day} to {end.day}, {end.year}")
+        else:
+            ranges.append(f"{start:%B} {start.day} – {end:%B} {end.day}, {end.year}")
+    return captions, clocks, ranges
+
+
+def timed(func, strings) -> float:
+    began = time.perf_counter()
+    for text in strings:
+        func(text)
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strings", type=int, default=100_000, help="Strings of each kind")
+    args = parser.parse_args()
+
+    captions, clocks, ranges = make_strings(args.strings)
+    cases = (
+        ("SFZC caption", captions, lambda s: datetime.strptime(s, CAPTION_FORMAT).date(), dates.parse_day),
+        ("SFZC time", clocks, lambda s: datetime.strptime(s, CLOCK_FORMAT).time(), dates.parse_clock),
+        ("IRC date range", ranges, legacy_range, dates.parse_date_range),
+    )
+    print(f"{'strings':<16} {'strptime':>10} {'uncached':>10} {'memoized':>10} {'speedup':>8}")
+    for label, strings, legacy, current in cases:
+        assert [legacy(s) for s in strings[:1000]] == [current(s) for s in strings[:1000]]
+        before = timed(legacy, strings)
+        uncached = timed(current.__wrapped__, strings)
+        current.cache_clear()
+        memoized = timed(current, strings)
+        print(f"{label:<16} {before:9.3f}s {uncached:9.3f}s {memoized:9.3f}s {before / memoized:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
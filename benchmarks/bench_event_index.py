@@ -0,0 +1,94 @@
+"""Time :class:`event_index.EventIndex` queries against a linear scan.
+
+Builds synthetic events spread over three years at a dozen centers and
+prints the best time of each query next to the equivalent list scan::
+
+    python benchmarks/bench_event_index.py --events 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_index import EventIndex
+from models import RetreatDates, RetreatEvent, locations
+
+CENTERS = [f"Center {name}" for name in "ABCDEFGHIJKL"] + ["Spirit Rock Meditation Center"]
+TEACHERS = [f"Teacher {i:03d}" for i in range(400)]
+WORDS = ["insight", "metta", "zen", "silent", "weekend", "family", "daylong", "sesshin"]
+
+
+def make_events(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        start = datetime(2024, 1, 1, 9) + timedelta(days=rng.randrange(3 * 365))
+        events.append(
+            RetreatEvent(
+                title=f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Retreat {i}",
+                dates=RetreatDates(start, start + timedelta(days=rng.choice([0, 1, 2, 5, 7, 14]))),
+                teachers=rng.sample(TEACHERS, 2),
+                location=locations.location(rng.choice(CENTERS)),
+                description="",
+                link="",
+                other={},
+            )
+        )
+    return events
+
+
+def scan(events, center, start, end, teacher):
+    low = datetime.combine(start, datetime.min.time())
+    high = datetime.combine(end, datetime.max.time())
+    return [
+        e for e in events
+        if center in e.location.practice_center
+        and e.dates.start <= high and e.dates.end >= low
+        and teacher in e.teachers
+    ]
+
+
+def best_ms(func, repeat: int = 20) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    build = best_ms(lambda: EventIndex(events), repeat=1)
+    index = EventIndex(events)
+    print(f"events: {args.events}, index built in {build:.0f} ms\n")
+
+    start, end = date(2025, 6, 1), date(2025, 6, 15)
+    q = index.query()
+    queries = [
+        ("teacher", q.teacher("Teacher 042"),
+         lambda: [e for e in events if "Teacher 042" in e.teachers]),
+        ("center + 2 weeks + teacher",
+         q.center("Spirit Rock").overlapping(start, end).teacher("Teacher 042"),
+         lambda: scan(events, "Spirit Rock", start, end, "Teacher 042")),
+        ("title words + center", q.title("silent sesshin").center("Center C"),
+         lambda: [e for e in events
+                 if {"silent", "sesshin"} <= set(e.title.lower().split())
+                 and e.location.practice_center == "Center C"]),
+        ("single day", q.overlapping(date(2025, 6, 3), date(2025, 6, 3)),
+         lambda: [e for e in events if e.dates.start.date() <= date(2025, 6, 3) <= e.dates.end.date()]),
+    ]
+    print(f"{'query':<28} {'matches':>8} {'index':>10} {'scan':>10}")
+    for label, query, linear in queries:
+        matches = len(query.ids())
+        assert matches == len(linear())
+        print(f"{label:<28} {matches:>8} {best_ms(query.ids):>8.3f}ms {best_ms(linear, 3):>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Time the single-pass IRC parser against the old two-pass approach.
+
+The old ``sites/__init__`` wrapper ran :func:`sites.irc.parse_events` and then
+built a second BeautifulSoup tree over the same page to re-find every listing
+container.  ``two_pass`` reproduces that extra work so the two can be compared
+on ``tests/irc.html``::
+
+    python benchmarks/bench_irc.py
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+from sites import irc
+
+FIXTURE = os.path.join(ROOT, "tests", "irc.html")
+
+
+def two_pass(html: str, source: str):
+    events = irc.parse_events(html, source)
+    soup = BeautifulSoup(html, "html.parser")
+    containers = soup.find_all("div", class_="irc-retreat-listing-div-text")
+    for _evt, cont in zip(events, containers):
+        cont.find("p", class_="irc-retreat-listing-p")
+    return events
+
+
+def main(number: int = 10) -> None:
+    with open(FIXTURE, encoding="utf-8") as fh:
+        html = fh.read()
+
+    single = min(timeit.repeat(lambda: irc.parse_events(html, FIXTURE), number=1, repeat=number))
+    double = min(timeit.repeat(lambda: two_pass(html, FIXTURE), number=1, repeat=number))
+    count = len(irc.parse_events(html, FIXTURE))
+
+    print(f"events parsed:     {count}")
+    print(f"single pass:       {single * 1000:.1f} ms")
+    print(f"two pass (legacy): {double * 1000:.1f} ms")
+    print(f"ratio:             {single / double:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Measure per-event memory of the event models on a synthetic event set.
+
+``legacy`` rebuilds events the way the parsers used to: plain dataclasses with
+a ``__dict__``, a new location per event and every raw Algolia key copied into
+``other``. ``current`` uses the slotted models, the shared
+:data:`models.locations` registry and the site code's compact ``other``.
+Both build the same events from the same input, and text read from a page
+is copied for every event, as it is when parsing::
+
+    python benchmarks/bench_models.py --events 100000
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models import RetreatDates, RetreatEvent, locations
+from sites import spiritrock
+
+CENTERS = [
+    ("City Center", "San Francisco", "300 Page St, San Francisco, CA 94102"),
+    ("Green Gulch Farm", "Muir Beach", "1601 Shoreline Hwy, Muir Beach, CA 94965"),
+    ("Insight Retreat Center", "Santa Cruz", "1906 Glen Canyon Rd, Santa Cruz, CA 95060"),
+]
+
+
+@dataclass
+class LegacyDates:
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+@dataclass
+class LegacyLocation:
+    practice_center: Optional[str] = None
+    city: Optional[str] = None
+    region: Optional[str] = None
+    country: Optional[str] = None
+
+
+@dataclass
+class LegacyEvent:
+    title: str
+    dates: LegacyDates
+    teachers: List[str]
+    location: LegacyLocation
+    description: str
+    link: str
+    other: Dict[str, str] = field(default_factory=dict)
+
+
+def fresh(text: str) -> str:
+    """A new copy of ``text``, like the string a parser extracts from a page."""
+    return "".join(list(text))
+
+
+def make_hit(i: int) -> Dict:
+    start = datetime(2025, 1, 1) + timedelta(days=i % 365)
+    return {
+        "title": f"Insight Retreat {i}",
+        "url": f"https://www.spiritrock.org/programs/{i}",
+        "startDate": int(start.timestamp()),
+        "endDate": int((start + timedelta(days=5)).timestamp()),
+        "eventTeachers": "Teacher One, Teacher Two",
+        "eventCode": f"{i}R25",
+        "programTypeName": "Retreat",
+        "duration": "5 nights",
+        "creditCount": "",
+        "postDateString": "",
+    }
+
+
+def legacy_hit(h: Dict) -> LegacyEvent:
+    other = {
+        "eventCode": h.get("eventCode", ""),
+        "programType": h.get("programTypeName", ""),
+        "duration": h.get("duration", ""),
+        "credits": str(h.get("creditCount", "")),
+        "postDateString": h.get("postDateString", ""),
+        "address": "5000 Sir Francis Drake Blvd Box 169, Woodacre, CA 94973",
+    }
+    used = {"title", "url", "startDate", "endDate", "eventTeachers", "teacherNames",
+            "shortDescription", "displayLocation", "location"}
+    for key, val in h.items():
+        if key not in used and key not in other and val not in (None, ""):
+            other[key] = val
+    return LegacyEvent(
+        title=h["title"],
+        dates=LegacyDates(
+            datetime.fromtimestamp(h["startDate"]), datetime.fromtimestamp(h["endDate"])
+        ),
+        teachers=[t.strip() for t in h["eventTeachers"].split(",")],
+        location=LegacyLocation("Spirit Rock Meditation Center", "Woodacre", "CA", "USA"),
+        description="",
+        link=h["url"],
+        other=other,
+    )
+
+
+def legacy_listing(i: int, source: str) -> LegacyEvent:
+    name, city, address = CENTERS[i % len(CENTERS)]
+    return LegacyEvent(
+        title=f"Sesshin {i}",
+        dates=LegacyDates(datetime(2025, 1, 1) + timedelta(days=i % 365)),
+        teachers=[],
+        location=LegacyLocation(fresh(name), fresh(city), fresh("CA"), fresh("USA")),
+        description="",
+        link=f"https://www.sfzc.org/events/{i}",
+        other={"source": source, "address": address},
+    )
+
+
+def current_listing(i: int, source: str) -> RetreatEvent:
+    name, city, address = CENTERS[i % len(CENTERS)]
+    return RetreatEvent(
+        title=f"Sesshin {i}",
+        dates=RetreatDates(datetime(2025, 1, 1) + timedelta(days=i % 365)),
+        teachers=[],
+        location=locations.location(fresh(name), fresh(city), fresh("CA"), fresh("USA")),
+        description="",
+        link=f"https://www.sfzc.org/events/{i}",
+        other={"source": source, "address": address},
+    )
+
+
+def build(count: int, listing, hit_to_event) -> List:
+    source = "https://www.sfzc.org/calendar?page=0"
+    events = []
+    for i in range(count):
+        if i % 2:
+            events.append(hit_to_event(make_hit(i)))
+        else:
+            events.append(listing(i, source))
+    return events
+
+
+def measure(count: int, listing, hit_to_event) -> int:
+    """Bytes still allocated per event after building ``count`` events."""
+    tracemalloc.start()
+    try:
+        events = build(count, listing, hit_to_event)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(events) == count
+    return size // count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    before = measure(args.events, legacy_listing, legacy_hit)
+    after = measure(args.events, current_listing, spiritrock.hit_to_event)
+    print(f"events:              {args.events}")
+    print(f"legacy bytes/event:  {before}")
+    print(f"current bytes/event: {after}")
+    print(f"saving:              {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Benchmark the parsers on the fixtures and on scaled synthetic pages.
+
+Each stage runs on the fixture page and on synthetic pages that repeat the
+fixture's content ``scale`` times:
+
+``sfzc``
+    :func:`sites.sfzc.parse_events` on ``tests/sfzc.html``, including
+    enrichment from detail pages.
+``irc``
+    :func:`sites.irc.parse_events` on ``tests/irc.html``.
+``spiritrock``
+    :func:`sites.spiritrock.hit_to_event` over Algolia hits built from the
+    retreats in ``tests/spiritrock.html``.
+``json``
+    :func:`parse_retreat_events.events_to_json` over all of the above.
+
+No network is used. Detail-page requests are answered by a stub client
+with a canned page. For each stage and scale, the script prints
+events/sec and the peak memory traced by :mod:`tracemalloc`::
+
+    python benchmarks/bench_parsers.py --scales 1,10,100,1000 --output bench.json
+
+With ``--baseline`` the run is compared against an earlier ``--output`` file.
+The script exits with status 1 when a stage is slower, or uses more memory,
+than its baseline by more than ``--threshold`` (a fraction; 0.25 means 25%).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+import html_parsing
+import http_client
+from parse_retreat_events import events_to_json
+from sites import irc, sfzc, spiritrock
+
+FIXTURES = os.path.join(ROOT, "tests")
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.25
+
+DETAIL_PAGE = """
+<html><head>
+<meta property="og:description" content="Benchmark retreat description" />
+</head><body>
+<div class="field--name-field-teachers">
+  <div class="field__item">Teacher One</div>
+  <div class="field__item">Teacher Two</div>
+</div>
+</body></html>
+"""
+
+
+class StubResponse:
+    status_code = 200
+    text = DETAIL_PAGE
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class StubClient:
+    """Answers every request with :data:`DETAIL_PAGE`."""
+
+    def get(self, url, **kwargs):
+        return StubResponse()
+
+    def post(self, url, **kwargs):
+        return StubResponse()
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fh:
+        return fh.read()
+
+
+def scale_page(html: str, scale: int) -> str:
+    """Repeat the contents of ``<body>`` so the page is ``scale`` times larger."""
+    if scale <= 1:
+        return html
+    start = html.index(">", html.index("<body")) + 1
+    end = html.rindex("</body>")
+    body = html[start:end]
+    return html[:start] + body * scale + html[end:]
+
+
+def fixture_hits(html: str) -> List[Dict]:
+    """Algolia-style hits for the retreats listed on the Spirit Rock page."""
+    soup = BeautifulSoup(html, html_parsing.get_backend())
+    hits = []
+    start = datetime(2025, 1, 3, 16)
+    for i, wrap in enumerate(soup.select("div.event-wrap")):
+        link = wrap.select_one("h2.event-title a")
+        desc = wrap.select_one("div.event-description")
+        names = wrap.find_next_sibling("div", class_="teacher-names-only")
+        begin = start + timedelta(days=7 * i)
+        hits.append(
+            {
+                "title": link.get_text(strip=True) if link else "",
+                "url": link["href"] if link else "",
+                "startDate": int(begin.timestamp()),
+                "endDate": int((begin + timedelta(days=7)).timestamp()),
+                "eventTeachers": names.get_text(" ", strip=True) if names else "",
+                "eventCode": f"{i:03d}R25",
+                "programTypeName": "Retreat",
+                "duration": "7 nights",
+                "creditCount": 0,
+                "postDateString": begin.strftime("%B %d, %Y"),
+                "description": str(desc) if desc else "",
+            }
+        )
+    return hits
+
+
+def scale_hits(hits: List[Dict], scale: int) -> List[Dict]:
+    return [
+        {**hit, "eventCode": f"{hit['eventCode']}-{copy}"}
+        for copy in range(scale)
+        for hit in hits
+    ]
+
+
+def measure(func: Callable[[], List], repeat: int) -> Dict:
+    """Best wall time over ``repeat`` runs and the peak traced memory of one."""
+    result = func()
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"result": result, "seconds": seconds, "peak_bytes": peak}
+
+
+def run(scales, repeat: int, workers: int) -> List[Dict]:
+    """Run every stage at every scale and return one record per pair."""
+    sfzc_html = read_fixture("sfzc.html")
+    irc_html = read_fixture("irc.html")
+    hits = fixture_hits(read_fixture("spiritrock.html"))
+
+    results = []
+    for scale in scales:
+        pages = {
+            "sfzc": scale_page(sfzc_html, scale),
+            "irc": scale_page(irc_html, scale),
+        }
+        scaled_hits = scale_hits(hits, scale)
+        stages = [
+            ("sfzc", len(pages["sfzc"]),
+             lambda: sfzc.parse_events(pages["sfzc"], "bench", workers=workers)),
+            ("irc", len(pages["irc"]),
+             lambda: irc.parse_events(pages["irc"], "bench")),
+            ("spiritrock", len(json.dumps(scaled_hits)),
+             lambda: [spiritrock.hit_to_event(h) for h in scaled_hits]),
+        ]
+        events = []
+        for stage, size, func in stages:
+            record = measure(func, repeat)
+            parsed = record.pop("result")
+            events.extend(parsed)
+            results.append(_record(stage, scale, size, len(parsed), record))
+
+        record = measure(lambda: [events_to_json(events)], repeat)
+        size = len(record.pop("result")[0])
+        results.append(_record("json", scale, size, len(events), record))
+        del pages, scaled_hits, events
+    return results
+
+
+def _record(stage: str, scale: int, size: int, count: int, timing: Dict) -> Dict:
+    seconds = timing["seconds"]
+    return {
+        "stage": stage,
+        "scale": scale,
+        "input_bytes": size,
+        "events": count,
+        "seconds": seconds,
+        "events_per_sec": count / seconds if seconds else 0.0,
+        "peak_bytes": timing["peak_bytes"],
+    }
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Describe every result that regressed past ``threshold`` against ``baseline``."""
+    previous = {(r["stage"], r["scale"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get((result["stage"], result["scale"]))
+        if base is None:
+            continue
+        for field in ("seconds", "peak_bytes"):
+            if base[field] and result[field] > base[field] * (1 + threshold):
+                regressions.append(
+                    f"{result['stage']} x{result['scale']}: {field} "
+                    f"{base[field]:.6g} -> {result[field]:.6g} "
+                    f"(+{result[field] / base[field] - 1:.0%})"
+                )
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"{'stage':<11} {'scale':>5} {'input':>10} {'events':>7} "
+          f"{'time':>10} {'events/s':>11} {'peak mem':>10}")
+    for r in results:
+        print(
+            f"{r['stage']:<11} {r['scale']:>5} {r['input_bytes'] / 1e6:>8.2f}MB "
+            f"{r['events']:>7} {r['seconds'] * 1000:>8.1f}ms "
+            f"{r['events_per_sec']:>11.0f} {r['peak_bytes'] / 1e6:>8.1f}MB"
+        )
+
+
+def scales_arg(value: str):
+    try:
+        scales = [int(part) for part in value.split(",") if part]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid scales: {value!r}")
+    if not scales or min(scales) < 1:
+        raise argparse.ArgumentTypeError("scales must be positive integers")
+    return scales
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=scales_arg, default=list(DEFAULT_SCALES),
+                        help="Comma-separated fixture multiples (default: 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per stage; the best is reported")
+    parser.add_argument("--workers", type=int, default=sfzc.DEFAULT_WORKERS,
+                        help="Detail-page workers for the SFZC stage")
+    parser.add_argument("--backend", choices=["lxml", "html.parser"],
+                        help="Parser backend (default: lxml when installed)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown or memory growth as a fraction (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    html_parsing.set_backend(args.backend)
+    original = http_client.get_client()
+    http_client.set_client(StubClient())
+    try:
+        results = run(args.scales, args.repeat, args.workers)
+    finally:
+        http_client.set_client(original)
+        html_parsing.set_backend(None)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "backend": args.backend or html_parsing.DEFAULT_BACKEND,
+                    "results": results,
+                },
+                fh,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh)["results"], args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Compare inline page parsing with the fetch/parse pipeline.
+
+Serves ``--pages`` copies of ``tests/sfzc.html``, each repeated ``--scale``
+times, from a stub client that waits ``--latency`` ms per request, and
+crawls them with :func:`parse_retreat_events.iter_retreat_events`: once
+parsing each page before the next download starts, and once per
+``--processes`` count with pages parsed in a process pool::
+
+    python benchmarks/bench_pipeline.py --pages 40 --scale 20 --processes 1,2,4,8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import http_client
+import pipeline
+from parse_retreat_events import iter_retreat_events, site_stages
+from sites import SITES, sfzc
+
+from bench_parsers import DETAIL_PAGE, read_fixture, scale_page
+
+BASE_URL = "https://bench.invalid/calendar?page={page}"
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, text: str, url: str) -> None:
+        self.text = text
+        self.url = url
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        raise ValueError("not json")
+
+
+class SlowClient:
+    """Answers listing and detail requests after a fixed delay."""
+
+    def __init__(self, listing: str, latency: float) -> None:
+        self.listing = listing
+        self.latency = latency
+
+    def get(self, url, **kwargs):
+        time.sleep(self.latency)
+        text = self.listing if url.startswith(BASE_URL[:20]) else DETAIL_PAGE
+        return StubResponse(text, url)
+
+    post = get
+
+
+def crawl(pages: int, processes: int, fetchers: int) -> float:
+    began = time.perf_counter()
+    if processes == 0:
+        events = list(iter_retreat_events(BASE_URL, pages=pages, parser=sfzc.parse_events))
+    else:
+        with pipeline.parse_pool(processes) as pool:
+            parser, enrich = site_stages(SITES["sfzc"], parse_pool=pool)
+            events = list(
+                iter_retreat_events(
+                    BASE_URL, pages=pages, parser=parser, parse_pool=pool, enrich=enrich, fetchers=fetchers
+                )
+            )
+    assert events
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=20, help="Copies of the fixture per page")
+    parser.add_argument("--latency", type=float, default=50, help="Milliseconds per request")
+    parser.add_argument("--processes", default="1,2,4", help="Comma-separated pool sizes")
+    parser.add_argument("--fetchers", type=int, default=4)
+    args = parser.parse_args()
+
+    http_client.set_client(SlowClient(scale_page(read_fixture("sfzc.html"), args.scale), args.latency / 1000))
+    print(f"{args.pages} pages x{args.scale}, {args.latency:.0f} ms per request, {os.cpu_count()} CPUs\n")
+    inline = crawl(args.pages, 0, 1)
+    print(f"{'inline':<14} {inline:>7.2f}s")
+    for processes in (int(n) for n in args.processes.split(",")):
+        seconds = crawl(args.pages, processes, args.fetchers)
+        print(f"{processes:>2} processes   {seconds:>7.2f}s  {inline / seconds:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the old ``asdict`` JSON export with :func:`serialization.write_events`.
+
+The old export deep-copied every event with :func:`dataclasses.asdict` and
+built the whole document in one string before writing it. Both are timed
+writing the same synthetic events to a temporary file, with the peak memory
+traced by :mod:`tracemalloc`::
+
+    python benchmarks/bench_serialization.py --events 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import serialization
+from models import RetreatDates, RetreatEvent, locations
+
+
+def make_events(count: int):
+    location = locations.location("Tassajara", "Carmel Valley", "CA", "USA")
+    start = datetime(2025, 1, 1, 9, 0)
+    return [
+        RetreatEvent(
+            title=f"Sesshin {i}",
+            dates=RetreatDates(start + timedelta(days=i % 365), start + timedelta(days=i % 365 + 5)),
+            teachers=["Teacher One", "Teacher Two"],
+            location=location,
+            description="Five days of zazen, work practice and talks. " * 4,
+            link=f"https://www.sfzc.org/events/{i}",
+            other={"source": "https://www.sfzc.org/calendar?page=0", "eventCode": str(i)},
+        )
+        for i in range(count)
+    ]
+
+
+def legacy(events, fh) -> None:
+    fh.write(json.dumps([asdict(event) for event in events], default=str, indent=2))
+
+
+def streaming(events, fh) -> None:
+    serialization.write_events(events, fh, pretty=True)
+
+
+def measure(write, events, path: str):
+    with open(path, "w", encoding="utf-8") as fh:
+        begin = time.perf_counter()
+        write(events, fh)
+        elapsed = time.perf_counter() - begin
+    with open(path, "w", encoding="utf-8") as fh:
+        tracemalloc.start()
+        try:
+            write(events, fh)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.json")
+        for label, write in (("asdict + json.dumps", legacy), (f"write_events ({encoder})", streaming)):
+            elapsed, peak = measure(write, events, path)
+            print(f"{label:<24} {elapsed:7.2f} s  {args.events / elapsed:9.0f} events/s"
+                  f"  peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Coroutine, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import http_client
+from metrics import registry
+from models import RetreatEvent
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Parser = Callable[[str, str], List[RetreatEvent]]
+
+# Upper bound on pages fetched when the page count is discovered
+MAX_AUTO_PAGES = 50
+
+
+@dataclass
+class PageInfo:
+    """What a listing page says about pagination."""
+
+    has_listing: bool = True
+    # Zero-based index of the last page, when the pager shows it
+    last_page: Optional[int] = None
+    has_next: bool = False
+
+
+PageInspector = Callable[[str], PageInfo]
+
+
+async def to_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``func`` in the loop's default executor.
+
+    Same as :func:`asyncio.to_thread`, which needs Python 3.9.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(None, call)
+
+
+async def fetch(method: str, url: str, **kwargs) -> "requests.Response":
+    """Send a request through :mod:`http_client` without blocking the loop."""
+    send = http_client.get if method.upper() == "GET" else http_client.post
+    return await to_thread(send, url, **kwargs)
+
+
+def extract_html(response: "requests.Response") -> str:
+    """Return the HTML held by ``response``.
+
+    Drupal's AJAX endpoints answer with a JSON list of commands whose
+    ``data`` entries carry HTML fragments; those fragments are joined.
+    Anything else is returned as the raw response text.
+    """
+    html = response.text
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = None
+
+    if isinstance(payload, list):
+        html_parts: List[str] = []
+        for part in payload:
+            if not isinstance(part, dict):
+                continue
+            data = part.get("data", "")
+            if isinstance(data, list):
+                html_parts.extend(str(item) for item in data if isinstance(item, (str, bytes)))
+            else:
+                html_parts.append(str(data))
+        html = "".join(html_parts)
+    return html
+
+
+def download_page(
+    base_url: str,
+    page: int,
+    params: Optional[Dict[str, str]] = None,
+) -> Tuple[str, str]:
+    """Download one listing page and return ``(html, request_url)``."""
+    with registry.timer("listing.download") as timing:
+        html, request_url = _download_page(base_url, page, params)
+        timing.bytes = len(html)
+    return html, request_url
+
+
+def _download_page(
+    base_url: str,
+    page: int,
+    params: Optional[Dict[str, str]],
+) -> Tuple[str, str]:
+    if params is None:
+        url = base_url.format(page=page)
+        logger.info("Fetching %s", url)
+        response = http_client.get(url, cache_ttl=0)
+        request_url = url
+    else:
+        page_params = params.copy()
+        page_params["page"] = str(page)
+        logger.info("Fetching %s", base_url)
+        response = http_client.get(base_url, params=page_params, cache_ttl=0)
+        request_url = response.url
+    logger.debug(
+        "Response status: %s for %s",
+        getattr(response, "status_code", "N/A"),
+        request_url,
+    )
+    response.raise_for_status()
+    html = extract_html(response)
+    logger.debug("Received %d bytes", len(html))
+    return html, request_url
+
+
+def iter_pages(
+    base_url: str,
+    pages: Optional[int] = 3,
+    params: Optional[Dict[str, str]] = None,
+    inspect: Optional[PageInspector] = None,
+    fetchers: int = 1,
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(html, request_url)`` for each listing page, in page order.
+
+    Up to ``fetchers`` pages are downloaded ahead of the one being yielded.
+    With ``pages=None`` the count is discovered with ``inspect``: pages are
+    requested ahead only once the pager names the last page or links to the
+    next one, and the crawl stops at the first page without a listing.
+    """
+    limit = MAX_AUTO_PAGES if pages is None else pages
+    if limit <= 0:
+        return
+    fetchers = max(1, fetchers)
+    # Pages known to exist, so they may be requested ahead
+    known = limit if pages is not None else 1
+    pending: Deque = deque()
+    requested = 0
+
+    with ThreadPoolExecutor(max_workers=fetchers) as executor:
+
+        def fill() -> None:
+            nonlocal requested
+            while requested < known and len(pending) < fetchers:
+                pending.append(executor.submit(download_page, base_url, requested, params))
+                requested += 1
+
+        try:
+            fill()
+            page = 0
+            while pending:
+                html, request_url = pending.popleft().result()
+                if pages is None:
+                    info = inspect(html)
+                    if not info.has_listing:
+                        return
+                    if info.last_page is not None:
+                        known = min(limit, info.last_page + 1)
+                        while requested > max(known, page + 1):
+                            pending.pop().cancel()
+                            requested -= 1
+                    elif info.has_next:
+                        known = min(limit, max(known, page + 2))
+                fill()
+                yield html, request_url
+                page += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def fetch_page(
+    base_url: str,
+    page: int,
+    params: Optional[Dict[str, str]] = None,
+) -> Tuple[str, str]:
+    """Asynchronous :func:`download_page`."""
+    return await to_thread(download_page, base_url, page, params)
+
+
+async def crawl_listing(
+    base_url: str,
+    pages: int,
+    parser: Parser,
+    params: Optional[Dict[str, str]] = None,
+) -> List[RetreatEvent]:
+    """Fetch ``pages`` listing pages concurrently and parse them.
+
+    Each page is handed to ``parser`` as soon as it arrives; parsers run in
+    worker threads so their detail-page enrichment overlaps with other
+    downloads.  Events are returned in page order.
+    """
+
+    async def one(page: int) -> List[RetreatEvent]:
+        html, request_url = await fetch_page(base_url, page, params)
+        events = await to_thread(parser, html, request_url)
+        logger.debug("%d events parsed from page %d", len(events), page)
+        return events
+
+    results = await asyncio.gather(*(one(page) for page in range(pages)))
+    all_events = [event for events in results for event in events]
+    logger.info("%d retreat events found", len(all_events))
+    return all_events
+
+
+async def crawl_listing_auto(
+    base_url: str,
+    parser: Parser,
+    inspect: PageInspector,
+    params: Optional[Dict[str, str]] = None,
+    max_pages: int = MAX_AUTO_PAGES,
+) -> List[RetreatEvent]:
+    """Crawl a listing whose page count is discovered from the pages.
+
+    The first page is inspected: if its pager names the last page, all
+    remaining pages are fetched concurrently.  Otherwise "next" links are
+    followed one page at a time.  Either way the crawl stops at the first
+    page without a listing and never exceeds ``max_pages``.
+    """
+    parsed: List[asyncio.Future] = []
+
+    def parse(html: str, request_url: str) -> None:
+        parsed.append(asyncio.ensure_future(to_thread(parser, html, request_url)))
+
+    html, request_url = await fetch_page(base_url, 0, params)
+    info = inspect(html)
+    if info.has_listing:
+        parse(html, request_url)
+        if info.last_page is not None:
+            last = min(info.last_page, max_pages - 1)
+            logger.info("Pager reports %d pages; fetching %d", info.last_page + 1, last + 1)
+            rest = await asyncio.gather(*(fetch_page(base_url, page, params) for page in range(1, last + 1)))
+            for html, request_url in rest:
+                if not inspect(html).has_listing:
+                    break
+                parse(html, request_url)
+        else:
+            page = 1
+            while info.has_next and page < max_pages:
+                html, request_url = await fetch_page(base_url, page, params)
+                info = inspect(html)
+                if not info.has_listing:
+                    break
+                parse(html, request_url)
+                page += 1
+    logger.debug("Discovered %d listing pages at %s", len(parsed), base_url)
+
+    results = await asyncio.gather(*parsed)
+    all_events = [event for events in results for event in events]
+    logger.info("%d retreat events found", len(all_events))
+    return all_events
+
+
+async def crawl_sites(*jobs: Awaitable[List[RetreatEvent]]) -> List[RetreatEvent]:
+    """Run several site crawls at once and concatenate their events in order."""
+    results = await asyncio.gather(*jobs)
+    return [event for events in results for event in events]
+
+
+def in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> Coroutine[Any, Any, T]:
+    """Wrap a blocking site entry point so it can run alongside other crawls."""
+    return to_thread(func, *args, **kwargs)
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` to completion from synchronous code."""
+    return asyncio.run(coro)
@@ -0,0 +1,145 @@
+"""Date and time parsing shared by the site parsers.
+
+The listings repeat the same strings over and over (every SFZC row on a
+day shares its caption, most rows start at one of a few times), so the
+parsers here are memoized.  They use precompiled patterns and a month
+table instead of :func:`datetime.strptime`, which rebuilds its regex per
+format and looks month names up through the locale.
+
+Time zones: every datetime returned here is aware and in
+:data:`CENTER_TZ`, whatever the host's zone.  Listing text gives wall-clock
+times at the center; Unix timestamps and ISO 8601 strings with an offset
+are converted to it, and ISO strings without one are taken as center time.
+:func:`to_timestamp` uses the same zone, so a day used as an API filter
+maps back to the same day.
+"""
+
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8
+    from backports.zoneinfo import ZoneInfo
+
+#: Zone of every crawled center; they are all in California
+CENTER_TZ = ZoneInfo("America/Los_Angeles")
+
+# Distinct strings kept per parser; a crawl sees far fewer than this
+CACHE_SIZE = 4096
+
+_MONTH_NAMES = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+#: Full and three-letter month names (plus "sept"), lower case, to month number
+MONTHS: Dict[str, int] = {
+    **{name: number for number, name in enumerate(_MONTH_NAMES, 1)},
+    **{name[:3]: number for number, name in enumerate(_MONTH_NAMES, 1)},
+    "sept": 9,
+}
+WEEKDAYS = frozenset(
+    name
+    for full in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    for name in (full, full[:3])
+)
+
+# Date range, e.g. "June 1 to 8, 2025" or "October 31 – November 15, 2025"
+DATE_RANGE_RE = re.compile(
+    r'([A-Za-z]+)\s+(\d{1,2})(?:,?\s*(\d{4}))?\s*(?:to|[-\u2013])\s*(?:([A-Za-z]+)\s+)?(\d{1,2}),?\s*(\d{4})?'
+)
+# Day caption, e.g. "Saturday, Jun 29, 2025"
+DAY_RE = re.compile(r'([A-Za-z]+),\s+([A-Za-z]+)\s+(\d{1,2}),\s+(\d{4})')
+# Clock time, e.g. "9:00 am"
+CLOCK_RE = re.compile(r'(\d{1,2}):(\d{1,2})\s+([AaPp][Mm])')
+
+
+def month_number(name: str) -> Optional[int]:
+    """1-12 for a full or abbreviated English month name, any case."""
+    return MONTHS.get(name.lower())
+
+
+def at_center(day: date, clock: Optional[time] = None) -> datetime:
+    """``day`` at ``clock`` (default midnight) in :data:`CENTER_TZ`."""
+    return datetime.combine(day, clock or time.min, tzinfo=CENTER_TZ)
+
+
+def _date(year: Optional[str], month: Optional[str], day: str) -> Optional[date]:
+    number = month_number(month) if month else None
+    if number is None or year is None:
+        return None
+    try:
+        return date(int(year), number, int(day))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date_range(text: str) -> Optional[Tuple[datetime, datetime]]:
+    """Start and end (midnight) of the first range in ``text``.
+
+    A missing year or end month is taken from the other end of the range,
+    as in "June 1 to 8, 2025".  Returns None without a valid range.
+    """
+    m = DATE_RANGE_RE.search(text)
+    if not m:
+        return None
+    smonth, sday, syear, emonth, eday, eyear = m.groups()
+    start = _date(syear or eyear, smonth, sday)
+    end = _date(eyear or syear, emonth or smonth, eday)
+    if start is None or end is None:
+        return None
+    return at_center(start), at_center(end)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_day(text: str) -> Optional[date]:
+    """The date in a caption such as "Saturday, Jun 29, 2025", or None.
+
+    The weekday must be a weekday name but is not checked against the date.
+    """
+    m = DAY_RE.fullmatch(text)
+    if not m or m.group(1).lower() not in WEEKDAYS:
+        return None
+    weekday, month, day, year = m.groups()
+    return _date(year, month, day)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_clock(text: str) -> Optional[time]:
+    """The time in a 12-hour clock string such as "9:00 am", or None."""
+    m = CLOCK_RE.fullmatch(text)
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2))
+    if not 1 <= hour <= 12 or minute > 59:
+        return None
+    return time(hour % 12 + (12 if m.group(3).lower() == "pm" else 0), minute)
+
+
+def from_timestamp(value: Union[int, float, str, None]) -> Optional[datetime]:
+    """A datetime in :data:`CENTER_TZ` from a Unix timestamp or an ISO 8601 string.
+
+    Returns None for missing or malformed values.
+    """
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, CENTER_TZ)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            return parsed.replace(tzinfo=CENTER_TZ)
+        return parsed.astimezone(CENTER_TZ)
+    return None
+
+
+def to_timestamp(day: date) -> int:
+    """The Unix timestamp of midnight on ``day`` in :data:`CENTER_TZ`."""
+    return int(at_center(day).timestamp())
@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from incremental import event_key, occurrence_key
+from models import RetreatDates, RetreatEvent
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case-fold ``text``, drop accents and punctuation, and collapse spaces."""
+    if not text:
+        return ""
+    folded = text.casefold()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded)
+        folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD_RE.sub(" ", folded).split())
+
+
+def _day(value) -> str:
+    return value.date().isoformat() if value is not None else ""
+
+
+def fingerprint(event: RetreatEvent) -> str:
+    """Stable hash of an event's normalized title, date range and center.
+
+    Dates are compared by day, so listings of the same retreat that differ in
+    start time or in title punctuation and case share a fingerprint.
+    """
+    key = "\x1f".join(
+        (
+            normalize_text(event.title),
+            _day(event.dates.start),
+            _day(event.dates.end),
+            normalize_text(event.location.practice_center),
+        )
+    )
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def identity(event: RetreatEvent) -> Optional[str]:
+    """The event's ``eventCode`` or detail link as an :func:`incremental.event_key`.
+
+    None for events with neither; those are matched by fingerprint alone.
+    """
+    if (event.other and event.other.get("eventCode")) or event.link:
+        return event_key(event)
+    return None
+
+
+def _comparable(a: datetime, b: datetime) -> bool:
+    # Naive and aware datetimes cannot be ordered against each other
+    return (a.tzinfo is None) == (b.tzinfo is None)
+
+
+def extend_dates(target: RetreatDates, other: RetreatDates) -> None:
+    """Widen ``target`` to cover ``other`` as well.
+
+    SFZC lists a multi-day retreat once per day without an end date, so the
+    copies together give its range.
+    """
+    if other.start is None:
+        return
+    if target.start is None:
+        target.start, target.end = other.start, other.end
+        return
+    last = other.end or other.start
+    if _comparable(other.start, target.start) and other.start < target.start:
+        target.end = target.end or target.start
+        target.start = other.start
+    if _comparable(last, target.start) and last > (target.end or target.start):
+        target.end = last
+
+
+def merge_into(target: RetreatEvent, duplicate: RetreatEvent) -> None:
+    """Fold ``duplicate`` into ``target``.
+
+    The date range grows to cover both.  The longer description wins.
+    Teachers are combined in order of first appearance.  Missing links and
+    ``other`` entries are filled in from the duplicate.
+    """
+    extend_dates(target.dates, duplicate.dates)
+    if len(duplicate.description.strip()) > len(target.description.strip()):
+        target.description = duplicate.description
+    seen = {name.casefold() for name in target.teachers}
+    for name in duplicate.teachers:
+        if name.casefold() not in seen:
+            seen.add(name.casefold())
+            target.teachers.append(name)
+    if not target.link:
+        target.link = duplicate.link
+    for key, value in duplicate.other.items():
+        target.other.setdefault(key, value)
+
+
+def _days(event: RetreatEvent) -> Optional[Tuple[date, date]]:
+    start = event.dates.start
+    if start is None:
+        return None
+    end = event.dates.end
+    if end is None or not _comparable(start, end) or end < start:
+        return start.date(), start.date()
+    return start.date(), end.date()
+
+
+class _Kept:
+    """What is remembered about an event that was let through."""
+
+    __slots__ = ("event", "key", "days")
+
+    def __init__(self, event: Optional[RetreatEvent], key: str, days: Optional[Tuple[date, date]]) -> None:
+        # None when only the keys are kept; see Deduplicator
+        self.event = event
+        self.key = key
+        self.days = days
+
+    def widen(self, days: Optional[Tuple[date, date]]) -> None:
+        if days is None:
+            return
+        if self.days is None:
+            self.days = days
+        else:
+            self.days = (min(self.days[0], days[0]), max(self.days[1], days[1]))
+
+    def touches(self, days: Optional[Tuple[date, date]]) -> bool:
+        """Whether ``days`` overlap or directly follow the kept range."""
+        if days is None or self.days is None:
+            return True
+        one_day = timedelta(days=1)
+        return days[0] <= self.days[1] + one_day and days[1] >= self.days[0] - one_day
+
+
+#: Called with the :func:`incremental.occurrence_key` of the kept event and a later duplicate
+OnDuplicate = Callable[[str, RetreatEvent], None]
+
+
+@dataclass
+class DedupReport:
+    """How many events went in, came out and were merged away."""
+
+    received: int = 0
+    kept: int = 0
+    merged: int = 0
+
+
+class Deduplicator:
+    """Collapse listings of the same event.
+
+    Two events are the same if they share a :func:`fingerprint`, an
+    ``eventCode``, or a detail link on overlapping or adjacent days; the
+    last rule joins the per-day rows of a multi-day retreat, while a page
+    shared by occurrences weeks apart still gives separate events.
+    Lookups are dicts, so a run is linear in the number of events, and the
+    first occurrence keeps its position.
+
+    With ``keep_events=False`` only keys and day ranges are remembered, so
+    memory stays small while a stream is written out; duplicates are then
+    passed to ``on_duplicate`` instead of being merged here.
+    """
+
+    def __init__(self, keep_events: bool = True, on_duplicate: Optional[OnDuplicate] = None) -> None:
+        self.report = DedupReport()
+        self.keep_events = keep_events
+        self.on_duplicate = on_duplicate
+        self._fingerprints: Dict[str, _Kept] = {}
+        self._identities: Dict[str, _Kept] = {}
+
+    def _match(self, print_key: str, ident: Optional[str], days: Optional[Tuple[date, date]]) -> Optional[_Kept]:
+        kept = self._fingerprints.get(print_key)
+        if kept is None and ident is not None:
+            candidate = self._identities.get(ident)
+            if candidate is not None and (ident.startswith("eventCode:") or candidate.touches(days)):
+                kept = candidate
+        return kept
+
+    def add(self, event: RetreatEvent) -> bool:
+        """Record ``event``; return False if it merged into an earlier one."""
+        self.report.received += 1
+        print_key = fingerprint(event)
+        ident = identity(event)
+        days = _days(event)
+        kept = self._match(print_key, ident, days)
+        if kept is None:
+            kept = _Kept(event if self.keep_events else None, occurrence_key(event), days)
+            self._fingerprints[print_key] = kept
+            if ident is not None:
+                # Later occurrences of a shared link are compared with the newest one
+                self._identities[ident] = kept
+            self.report.kept += 1
+            return True
+        kept.widen(days)
+        self._fingerprints.setdefault(print_key, kept)
+        if kept.event is not None:
+            merge_into(kept.event, event)
+        if self.on_duplicate is not None:
+            self.on_duplicate(kept.key, event)
+        self.report.merged += 1
+        return False
+
+    def dedupe(self, events: Iterable[RetreatEvent]) -> List[RetreatEvent]:
+        """Return ``events`` without duplicates, each merged into its first copy."""
+        return [event for event in events if self.add(event)]
+
+    def iter_unique(self, events: Iterable[RetreatEvent]) -> Iterator[RetreatEvent]:
+        """Yield each first occurrence as soon as it arrives.
+
+        Once yielded an event may already have been written out, so details
+        from later duplicates reach it only through ``on_duplicate``.
+        """
+        for event in events:
+            if self.add(event):
+                yield event
+
+    def finish(self) -> DedupReport:
+        logger.info(
+            "Deduplication: %d events, %d kept, %d merged",
+            self.report.received,
+            self.report.kept,
+            self.report.merged,
+        )
+        return self.report
+
+
+def dedupe(events: Iterable[RetreatEvent]) -> Tuple[List[RetreatEvent], DedupReport]:
+    """Merge duplicate events and return the unique events with a report."""
+    dedup = Deduplicator()
+    unique = dedup.dedupe(events)
+    return unique, dedup.finish()
@@ -0,0 +1,246 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from dedup import normalize_text
+from models import RetreatEvent
+
+DateLike = Union[date, datetime]
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+def _naive(value: datetime) -> datetime:
+    # Dates are compared by wall-clock time; files written before dates were
+    # zoned hold naive values
+    return value if value.tzinfo is None else value.replace(tzinfo=None)
+
+
+def _lower(value: DateLike) -> datetime:
+    if isinstance(value, datetime):
+        return _naive(value)
+    return datetime.combine(value, time.min)
+
+
+def _upper(value: DateLike) -> datetime:
+    if isinstance(value, datetime):
+        return _naive(value)
+    return datetime.combine(value, time.max)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return normalize_text(text).split()
+
+
+class EventIndex:
+    """Read-only index over a list of events for fast lookups.
+
+    Events are identified by their position in the list.  Practice centers,
+    teachers and titles have inverted indexes from word to event ids.  A
+    lookup matches events containing every word of the query, so
+    ``center("Spirit Rock")`` finds "Spirit Rock Meditation Center".
+
+    Dated events are sorted by start.  Each midpoint of that sorted array is
+    a node of an implicit interval tree that stores the latest end in its
+    subtree, so :meth:`overlapping` runs in O(log n + matches).  An event
+    without an end is treated as ending when it starts.
+    """
+
+    def __init__(self, events: Sequence[RetreatEvent]) -> None:
+        self.events: List[RetreatEvent] = list(events)
+        self._centers = self._build_inverted(lambda e: [e.location.practice_center])
+        self._teachers = self._build_inverted(lambda e: e.teachers)
+        self._titles = self._build_inverted(lambda e: [e.title])
+
+        dated = [i for i, e in enumerate(self.events) if e.dates.start is not None]
+        dated.sort(key=lambda i: _naive(self.events[i].dates.start))
+        self._order = dated
+        self._starts = [_naive(self.events[i].dates.start) for i in dated]
+        self._ends = [
+            _naive(self.events[i].dates.end or self.events[i].dates.start) for i in dated
+        ]
+        self._max_end: List[Optional[datetime]] = [None] * len(dated)
+        self._build_tree(0, len(dated))
+        self._rank = {event_id: rank for rank, event_id in enumerate(dated)}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def _build_inverted(self, values: Callable[[RetreatEvent], Iterable[Optional[str]]]):
+        index: Dict[str, List[int]] = defaultdict(list)
+        # Centers and teachers repeat across events, so each is tokenized once
+        seen: Dict[str, Tuple[str, ...]] = {}
+        for event_id, event in enumerate(self.events):
+            words: Set[str] = set()
+            for value in values(event):
+                if not value:
+                    continue
+                found = seen.get(value)
+                if found is None:
+                    found = seen[value] = tuple(tokenize(value))
+                words.update(found)
+            for word in words:
+                index[word].append(event_id)
+        return {word: frozenset(ids) for word, ids in index.items()}
+
+    def _build_tree(self, lo: int, hi: int) -> Optional[datetime]:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        latest = self._ends[mid]
+        for child in (self._build_tree(lo, mid), self._build_tree(mid + 1, hi)):
+            if child is not None and child > latest:
+                latest = child
+        self._max_end[mid] = latest
+        return latest
+
+    @staticmethod
+    def _lookup(index: Dict[str, FrozenSet[int]], text: str) -> FrozenSet[int]:
+        words = tokenize(text)
+        if not words:
+            return _EMPTY
+        sets = sorted((index.get(word, _EMPTY) for word in words), key=len)
+        return sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+
+    def center(self, name: str) -> FrozenSet[int]:
+        """Ids of events whose practice center contains every word of ``name``."""
+        return self._lookup(self._centers, name)
+
+    def teacher(self, name: str) -> FrozenSet[int]:
+        """Ids of events whose teachers' names contain every word of ``name``."""
+        return self._lookup(self._teachers, name)
+
+    def title(self, text: str) -> FrozenSet[int]:
+        """Ids of events whose title contains every word of ``text``."""
+        return self._lookup(self._titles, text)
+
+    def overlapping(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> Set[int]:
+        """Ids of dated events that overlap ``start``..``end`` (both inclusive).
+
+        Dates cover the whole day.  Either bound may be omitted.
+        """
+        low = _lower(start) if start is not None else None
+        high = _upper(end) if end is not None else None
+        found: Set[int] = set()
+        stack = [(0, len(self._order))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if low is not None and self._max_end[mid] < low:
+                continue
+            stack.append((lo, mid))
+            if high is None or self._starts[mid] <= high:
+                if low is None or self._ends[mid] >= low:
+                    found.add(self._order[mid])
+                stack.append((mid + 1, hi))
+        return found
+
+    def starting(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> Set[int]:
+        """Ids of events starting within ``start``..``end`` (both inclusive)."""
+        lo = bisect_left(self._starts, _lower(start)) if start is not None else 0
+        hi = bisect_right(self._starts, _upper(end)) if end is not None else len(self._starts)
+        return set(self._order[lo:hi])
+
+    def overlaps(self, event_id: int, start: Optional[DateLike], end: Optional[DateLike]) -> bool:
+        """Whether one event overlaps ``start``..``end``, as in :meth:`overlapping`."""
+        rank = self._rank.get(event_id)
+        if rank is None:
+            return False
+        if start is not None and self._ends[rank] < _lower(start):
+            return False
+        return end is None or self._starts[rank] <= _upper(end)
+
+    def starts_within(self, event_id: int, start: Optional[DateLike], end: Optional[DateLike]) -> bool:
+        """Whether one event starts within ``start``..``end``, as in :meth:`starting`."""
+        rank = self._rank.get(event_id)
+        if rank is None:
+            return False
+        first = self._starts[rank]
+        if start is not None and first < _lower(start):
+            return False
+        return end is None or first <= _upper(end)
+
+    def sorted_events(self, ids: Iterable[int]) -> List[RetreatEvent]:
+        """The events with ``ids``, by start date; undated events come last."""
+        undated = len(self._order)
+        ordered = sorted(ids, key=lambda i: (self._rank.get(i, undated), i))
+        return [self.events[i] for i in ordered]
+
+    def query(self) -> "Query":
+        """Start a :class:`Query` matching every event."""
+        return Query(self)
+
+
+class Query:
+    """A composable query over an :class:`EventIndex`.
+
+    Each method returns a new query that also requires its condition, and
+    ``|`` combines two queries into one matching either::
+
+        q = index.query().center("Spirit Rock").overlapping(date(2025, 6, 1), date(2025, 6, 15))
+        q = q.teacher("Jack Kornfield") | q.teacher("Tuere Sala")
+        events = q.events()
+
+    Word lookups are intersected smallest first.  Date conditions are checked
+    on each remaining candidate, and the interval tree is used only when no
+    word lookup has narrowed the candidates.
+    """
+
+    def __init__(self, index: EventIndex, terms=(), ranges=(), alternatives=()) -> None:
+        self.index = index
+        self._terms = tuple(terms)
+        self._ranges = tuple(ranges)
+        self._alternatives = tuple(alternatives)
+
+    def _with(self, terms=(), ranges=()) -> "Query":
+        return Query(self.index, self._terms + tuple(terms), self._ranges + tuple(ranges), self._alternatives)
+
+    def center(self, name: str) -> "Query":
+        return self._with(terms=[self.index.center(name)])
+
+    def teacher(self, name: str) -> "Query":
+        return self._with(terms=[self.index.teacher(name)])
+
+    def title(self, text: str) -> "Query":
+        return self._with(terms=[self.index.title(text)])
+
+    def overlapping(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> "Query":
+        return self._with(ranges=[("overlapping", start, end)])
+
+    def starting(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> "Query":
+        return self._with(ranges=[("starting", start, end)])
+
+    def __or__(self, other: "Query") -> "Query":
+        if other.index is not self.index:
+            raise ValueError("cannot combine queries over different indexes")
+        # Each side already applies its own alternatives
+        return Query(self.index, alternatives=((self, other),))
+
+    def ids(self) -> Set[int]:
+        """Ids of the matching events."""
+        sets = sorted(self._terms, key=len)
+        sets += [first.ids() | second.ids() for first, second in self._alternatives]
+        if sets:
+            sets.sort(key=len)
+            candidates = set(sets[0]).intersection(*sets[1:])
+            ranges = self._ranges
+        elif self._ranges:
+            kind, start, end = self._ranges[0]
+            candidates = getattr(self.index, kind)(start, end)
+            ranges = self._ranges[1:]
+        else:
+            return set(range(len(self.index)))
+
+        for kind, start, end in ranges:
+            check = self.index.overlaps if kind == "overlapping" else self.index.starts_within
+            candidates = {i for i in candidates if check(i, start, end)}
+        return candidates
+
+    def events(self) -> List[RetreatEvent]:
+        """The matching events, by start date."""
+        return self.index.sorted_events(self.ids())
+
+    def __len__(self) -> int:
+        return len(self.ids())
@@ -0,0 +1,328 @@
+import errno
+import json
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dedup import merge_into
+from incremental import occurrence_key
+from models import RetreatEvent
+from serialization import dict_to_event, format_datetime
+
+#: ``--output``/``--input`` prefix selecting a SQLite store, e.g. ``sqlite:events.db``
+SQLITE_PREFIX = "sqlite:"
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    practice_center TEXT NOT NULL,
+    city TEXT NOT NULL,
+    region TEXT NOT NULL,
+    country TEXT NOT NULL,
+    UNIQUE (practice_center, city, region, country)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    event_code TEXT,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    start TEXT,
+    end TEXT,
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    description TEXT NOT NULL,
+    other TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start);
+CREATE INDEX IF NOT EXISTS events_end ON events (end);
+CREATE INDEX IF NOT EXISTS events_location_start ON events (location_id, start);
+CREATE INDEX IF NOT EXISTS events_link ON events (link);
+CREATE INDEX IF NOT EXISTS events_event_code ON events (event_code);
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS event_teachers (
+    event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+    teacher_id INTEGER NOT NULL REFERENCES teachers (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (event_id, teacher_id)
+);
+CREATE INDEX IF NOT EXISTS event_teachers_teacher ON event_teachers (teacher_id);
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (key, event_code, link, title, start, end, location_id,
+                    description, other, first_seen, last_seen)
+VALUES (:key, :event_code, :link, :title, :start, :end, :location_id,
+        :description, :other, :seen, :seen)
+ON CONFLICT (key) DO UPDATE SET
+    event_code = excluded.event_code,
+    link = excluded.link,
+    title = excluded.title,
+    start = excluded.start,
+    end = excluded.end,
+    location_id = excluded.location_id,
+    description = excluded.description,
+    other = excluded.other,
+    last_seen = excluded.last_seen
+"""
+
+SELECT_EVENTS = """
+SELECT e.id, e.title, e.start, e.end, e.link, e.description, e.other,
+       l.practice_center, l.city, l.region, l.country
+FROM events e JOIN locations l ON l.id = e.location_id
+"""
+
+
+def sqlite_path(spec: Optional[str]) -> Optional[str]:
+    """The database path of a ``sqlite:`` spec, or None for anything else."""
+    if spec and spec.startswith(SQLITE_PREFIX):
+        return spec[len(SQLITE_PREFIX):]
+    return None
+
+
+def _day_after(value: date) -> str:
+    return (value + timedelta(days=1)).isoformat()
+
+
+class EventStore:
+    """Events kept in a SQLite database across runs.
+
+    Locations and teachers live in their own tables.  Events are keyed by
+    :func:`incremental.occurrence_key`, so a later crawl updates a stored
+    event in place; ``first_seen`` and ``last_seen`` record when it was
+    crawled.
+    Dates are stored as ISO 8601 text, so they sort chronologically.
+
+    With ``readonly=True`` the database must already exist; it is opened
+    read-only and never created or migrated, and a missing file raises
+    :class:`FileNotFoundError`.
+    """
+
+    def __init__(self, path: str, readonly: bool = False) -> None:
+        self.path = path
+        if readonly:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(errno.ENOENT, "No event store", path)
+            self.conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        else:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+        self._location_ids: Dict[tuple, int] = {}
+        self._teacher_ids: Dict[str, int] = {}
+        # Events waiting for the next batch, by key
+        self._pending: Dict[str, RetreatEvent] = {}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "EventStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def _location_id(self, event: RetreatEvent) -> int:
+        loc = event.location
+        key = tuple(value or "" for value in (loc.practice_center, loc.city, loc.region, loc.country))
+        found = self._location_ids.get(key)
+        if found is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO locations (practice_center, city, region, country) VALUES (?, ?, ?, ?)",
+                key,
+            )
+            found = self.conn.execute(
+                "SELECT id FROM locations WHERE practice_center = ? AND city = ? AND region = ? AND country = ?",
+                key,
+            ).fetchone()[0]
+            self._location_ids[key] = found
+        return found
+
+    def _teacher_id(self, name: str) -> int:
+        found = self._teacher_ids.get(name)
+        if found is None:
+            self.conn.execute("INSERT OR IGNORE INTO teachers (name) VALUES (?)", (name,))
+            found = self.conn.execute("SELECT id FROM teachers WHERE name = ?", (name,)).fetchone()[0]
+            self._teacher_ids[name] = found
+        return found
+
+    def upsert(self, events: Iterable[RetreatEvent], batch_size: int = BATCH_SIZE) -> int:
+        """Insert or update ``events``, one transaction per ``batch_size`` events.
+
+        ``events`` may be a generator; each batch is committed as soon as it
+        fills up.  Events merged by :meth:`merge_duplicate` meanwhile are
+        written with the batch.  Returns the number of distinct rows written.
+        """
+        seen = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        written: Set[str] = set()
+        for event in events:
+            self._pending[occurrence_key(event)] = event
+            if len(self._pending) >= batch_size:
+                self._flush(seen, written)
+        self._flush(seen, written)
+        return len(written)
+
+    def merge_duplicate(self, key: str, duplicate: RetreatEvent) -> None:
+        """Merge ``duplicate`` into the event stored under ``key``.
+
+        Meant as the ``on_duplicate`` callback of a streaming
+        :class:`dedup.Deduplicator`: the kept event may still be waiting in
+        the current batch or may already be in the database, in which case
+        it is read back, merged and written again with the next batch.
+        """
+        target = self._pending.get(key)
+        if target is None:
+            record = self._record(key)
+            if record is None:
+                return
+            target = self._pending[key] = dict_to_event(record)
+        merge_into(target, duplicate)
+
+    def _flush(self, seen: str, written: Set[str]) -> None:
+        if not self._pending:
+            return
+        batch = list(self._pending.items())
+        try:
+            with self.conn:
+                self._upsert_batch(batch, seen)
+        except Exception:
+            # Ids cached during the failed transaction were rolled back
+            self._location_ids.clear()
+            self._teacher_ids.clear()
+            raise
+        finally:
+            self._pending.clear()
+        written.update(key for key, _event in batch)
+
+    def _upsert_batch(self, batch: List[Tuple[str, RetreatEvent]], seen: str) -> None:
+        # Keys are taken before merging, which may fill in a missing link
+        rows = []
+        for key, event in batch:
+            rows.append(
+                {
+                    "key": key,
+                    "event_code": event.other.get("eventCode") or None,
+                    "link": event.link or "",
+                    "title": event.title,
+                    "start": format_datetime(event.dates.start),
+                    "end": format_datetime(event.dates.end),
+                    "location_id": self._location_id(event),
+                    "description": event.description or "",
+                    "other": json.dumps(event.other, default=str, ensure_ascii=False),
+                    "seen": seen,
+                }
+            )
+        self.conn.executemany(UPSERT_EVENT, rows)
+
+        keys = [row["key"] for row in rows]
+        ids: Dict[str, int] = {}
+        for chunk in range(0, len(keys), 500):
+            part = keys[chunk:chunk + 500]
+            query = f"SELECT key, id FROM events WHERE key IN ({','.join('?' * len(part))})"
+            ids.update(self.conn.execute(query, part).fetchall())
+
+        event_ids = [ids[key] for key in keys]
+        self.conn.executemany(
+            "DELETE FROM event_teachers WHERE event_id = ?", [(i,) for i in event_ids]
+        )
+        links = []
+        for event_id, (_key, event) in zip(event_ids, batch):
+            for position, name in enumerate(dict.fromkeys(event.teachers)):
+                links.append((event_id, self._teacher_id(name), position))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO event_teachers (event_id, teacher_id, position) VALUES (?, ?, ?)",
+            links,
+        )
+
+    def records(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        center: Optional[str] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> Iterator[Dict]:
+        """Yield stored events as dicts shaped like ``serialization.event_to_dict``.
+
+        With ``start``/``end``, only events overlapping those days (inclusive)
+        are read; undated events are then left out.  ``center`` selects one
+        practice center.  Rows come in start order and are read in batches,
+        so a narrow range never loads the whole table.
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("COALESCE(e.end, e.start) >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("e.start < ?")
+            params.append(_day_after(end))
+        if center is not None:
+            clauses.append("l.practice_center = ?")
+            params.append(center)
+        sql = SELECT_EVENTS
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY e.start IS NULL, e.start, e.id"
+
+        cursor = self.conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from self._to_records(rows)
+
+    def _record(self, key: str) -> Optional[Dict]:
+        rows = self.conn.execute(SELECT_EVENTS + " WHERE e.key = ?", (key,)).fetchall()
+        return next(iter(self._to_records(rows)), None)
+
+    def _to_records(self, rows: List[tuple]) -> List[Dict]:
+        if not rows:
+            return []
+        teachers = self._teachers_for([row[0] for row in rows])
+        records = []
+        for row in rows:
+            (event_id, title, start_text, end_text, link, description, other,
+             practice_center, city, region, country) = row
+            records.append(
+                {
+                    "title": title,
+                    "dates": {"start": start_text, "end": end_text},
+                    "teachers": teachers.get(event_id, []),
+                    "location": {
+                        "practice_center": practice_center or None,
+                        "city": city or None,
+                        "region": region or None,
+                        "country": country or None,
+                    },
+                    "description": description,
+                    "link": link,
+                    "other": json.loads(other),
+                }
+            )
+        return records
+
+    def _teachers_for(self, event_ids: List[int]) -> Dict[int, List[str]]:
+        found: Dict[int, List[str]] = {}
+        query = (
+            "SELECT et.event_id, t.name FROM event_teachers et JOIN teachers t ON t.id = et.teacher_id"
+            f" WHERE et.event_id IN ({','.join('?' * len(event_ids))}) ORDER BY et.event_id, et.position"
+        )
+        for event_id, name in self.conn.execute(query, event_ids):
+            found.setdefault(event_id, []).append(name)
+        return found
+
+    def events(self, start: Optional[date] = None, end: Optional[date] = None,
+               center: Optional[str] = None) -> List[RetreatEvent]:
+        """Like :meth:`records`, rebuilt as :class:`RetreatEvent` objects."""
+        return [dict_to_event(record) for record in self.records(start, end, center)]
@@ -0,0 +1,76 @@
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:  # lxml is optional but parses several times faster than html.parser
+    import lxml  # noqa: F401
+except ImportError:  # pragma: no cover - depends on the environment
+    DEFAULT_BACKEND = "html.parser"
+else:
+    DEFAULT_BACKEND = "lxml"
+
+_backend = DEFAULT_BACKEND
+
+
+def get_backend() -> str:
+    """Return the name of the BeautifulSoup tree builder in use."""
+    return _backend
+
+
+def set_backend(name: Optional[str]) -> None:
+    """Select the tree builder (``"lxml"`` or ``"html.parser"``).
+
+    ``None`` restores the default, which is lxml when it is installed.
+    """
+    global _backend
+    _backend = name or DEFAULT_BACKEND
+
+
+def has_class(name: str):
+    """Attribute matcher for strainers: true when ``name`` is one of the classes.
+
+    While parsing, strainers see the raw ``class`` attribute string, so a
+    plain ``class_="x"`` does not match elements with several classes.
+    """
+
+    def match(value) -> bool:
+        if not value:
+            return False
+        if isinstance(value, str):
+            value = value.split()
+        return name in value
+
+    return match
+
+
+class AnyOf(SoupStrainer):
+    """Strainer keeping every top-level tag accepted by any of ``strainers``."""
+
+    def __init__(self, *strainers: SoupStrainer) -> None:
+        super().__init__()
+        self.strainers = strainers
+
+    # Beautiful Soup >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(s.allow_tag_creation(nsprefix, name, attrs) for s in self.strainers)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+    # Beautiful Soup < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):  # noqa: B006
+        for strainer in self.strainers:
+            found = strainer.search_tag(markup_name, markup_attrs)
+            if found:
+                return found
+        return None
+
+
+def make_soup(html: str, only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse ``html`` with the configured backend.
+
+    ``only`` restricts the tree to the matching elements and their
+    descendants, so sites that need one part of a large page never build the
+    rest of it.
+    """
+    return BeautifulSoup(html, _backend, parse_only=only)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "retreat-guide")
+# Total size of cached bodies before least-recently-used entries are evicted
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Seconds a cached response is served without revalidation (0 = always revalidate)
+DEFAULT_TTL = 0.0
+
+
+class CacheEntry:
+    """A cached response body plus the metadata needed to revalidate it."""
+
+    def __init__(self, key: str, meta: Dict, body: bytes) -> None:
+        self.key = key
+        self.meta = meta
+        self.body = body
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        from requests.structures import CaseInsensitiveDict
+
+        headers: Dict[str, str] = {}
+        stored = CaseInsensitiveDict(self.meta.get("headers", {}))
+        if stored.get("ETag"):
+            headers["If-None-Match"] = stored["ETag"]
+        if stored.get("Last-Modified"):
+            headers["If-Modified-Since"] = stored["Last-Modified"]
+        return headers
+
+    def age(self) -> float:
+        return time.time() - self.meta.get("stored_at", 0.0)
+
+    def to_response(self) -> "requests.Response":
+        """Rebuild a :class:`requests.Response` from the cached data."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        resp = requests.Response()
+        resp.status_code = self.meta.get("status", 200)
+        resp.headers = CaseInsensitiveDict(self.meta.get("headers", {}))
+        resp.url = self.meta.get("url", "")
+        resp.encoding = self.meta.get("encoding")
+        resp._content = self.body
+        resp.from_cache = True  # type: ignore[attr-defined]
+        return resp
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write ``data`` to ``path`` so readers see the old or the new file, never a partial one."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ResponseCache:
+    """On-disk store of GET responses with per-host TTLs and LRU eviction.
+
+    Each entry is a ``<key>.body`` file next to a ``<key>.json`` metadata
+    file.  Access times are tracked through the body file's mtime so the
+    least recently used entries can be evicted across runs.  The pair is
+    read and written under one lock, and each file is replaced atomically.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+        self._total = 0
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None) -> str:
+        """Cache key for a GET of ``url`` with ``params``."""
+        import requests
+
+        full_url = requests.Request("GET", url, params=params).prepare().url or url
+        return hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, host: str) -> float:
+        return self.ttls.get(host, self.default_ttl)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        if self._index is not None:
+            return self._index
+        index: Dict[str, Tuple[int, float]] = {}
+        if os.path.isdir(self.directory):
+            for root, _dirs, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".body"):
+                        continue
+                    st = os.stat(os.path.join(root, name))
+                    index[name[: -len(".body")]] = (st.st_size, st.st_mtime)
+        self._index = index
+        self._total = sum(size for size, _ in index.values())
+        return index
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry stored under ``key`` and mark it as recently used."""
+        meta_path, body_path = self._paths(key)
+        try:
+            with self._lock:
+                with open(meta_path, encoding="utf-8") as fh:
+                    meta = json.load(fh)
+                with open(body_path, "rb") as fh:
+                    body = fh.read()
+        except (OSError, ValueError):
+            return None
+        self.touch(key)
+        return CacheEntry(key, meta, body)
+
+    def touch(self, key: str) -> None:
+        _meta_path, body_path = self._paths(key)
+        now = time.time()
+        try:
+            os.utime(body_path, (now, now))
+        except OSError:
+            return
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                index[key] = (index[key][0], now)
+
+    def store(self, key: str, response: "requests.Response") -> None:
+        """Write ``response`` to disk under ``key``."""
+        meta_path, body_path = self._paths(key)
+        meta = {
+            "url": response.url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "stored_at": time.time(),
+        }
+        body = response.content
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        with self._lock:
+            index = self._load_index()
+            _write_atomic(body_path, body)
+            _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            old_size = index.get(key, (0, 0.0))[0]
+            index[key] = (len(body), time.time())
+            self._total += len(body) - old_size
+            self._evict()
+
+    def refresh(self, entry: CacheEntry) -> None:
+        """Record that ``entry`` was revalidated by a 304 response."""
+        entry.meta["stored_at"] = time.time()
+        meta_path, _body_path = self._paths(entry.key)
+        with self._lock:
+            _write_atomic(meta_path, json.dumps(entry.meta).encode("utf-8"))
+
+    def _evict(self) -> None:
+        index = self._index or {}
+        if self._total <= self.max_bytes:
+            return
+        for key, (size, _atime) in sorted(index.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            del index[key]
+            self._total -= size
+            logger.debug("Evicted cache entry %s (%d bytes)", key, size)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index()
+            return self._total
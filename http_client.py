@@ -0,0 +1,269 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+from http_cache import ResponseCache
+from metrics import registry
+from pool import host_of
+from throttle import HostScheduler
+
+if TYPE_CHECKING:
+    # Imported on first use; loading requests is a large share of start-up time
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout in seconds applied to every request
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 15.0)
+# Number of retries after the first attempt
+MAX_RETRIES = 3
+# Base delay for exponential backoff between retries
+BACKOFF_FACTOR = 0.5
+# Upper bound on any single backoff sleep
+MAX_BACKOFF = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Connections kept alive per host
+POOL_SIZE = 16
+
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36"
+)
+
+# Header sets shared by the site modules
+HEADER_PROFILES: Dict[str, Dict[str, str]] = {
+    "browser": {
+        "User-Agent": BROWSER_USER_AGENT,
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    },
+    "json": {
+        "User-Agent": BROWSER_USER_AGENT,
+        "Accept": "application/json",
+    },
+}
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _retry_after(response: "requests.Response") -> Optional[float]:
+    """Return the ``Retry-After`` delay in seconds, if the server sent one."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HTTPClient:
+    """Pooled HTTP client holding one keep-alive ``Session`` per host.
+
+    When a :class:`~http_cache.ResponseCache` is supplied, GET responses are
+    stored on disk and revalidated with conditional requests.  A
+    :class:`~throttle.HostScheduler` paces the requests that reach the
+    network, cache hits excepted.
+    """
+
+    def __init__(
+        self,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_FACTOR,
+        pool_size: int = POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+        scheduler: Optional[HostScheduler] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.cache = cache
+        self.scheduler = scheduler
+        self.cache_stats: Counter = Counter()
+        self._sessions: Dict[str, "requests.Session"] = {}
+        self._lock = threading.Lock()
+
+    def session(self, host: str) -> "requests.Session":
+        """Return the shared session for ``host``, creating it on first use."""
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                sess.mount("http://", adapter)
+                sess.mount("https://", adapter)
+                self._sessions[host] = sess
+            return sess
+
+    def close(self) -> None:
+        """Close every pooled session."""
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number ``attempt``."""
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        profile: str = "browser",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Timeout] = None,
+        cache_ttl: Optional[float] = None,
+        **kwargs,
+    ) -> "requests.Response":
+        """Send a request, retrying on connection errors, 429 and 5xx.
+
+        ``profile`` selects a header set from :data:`HEADER_PROFILES`;
+        ``headers`` are merged on top of it.  ``cache_ttl`` overrides the
+        cache's per-host TTL for this request.  The final response is
+        returned even if its status is an error, so callers still decide
+        whether to call ``raise_for_status``.
+        """
+        merged = dict(HEADER_PROFILES.get(profile, {}))
+        if headers:
+            merged.update(headers)
+        timeout = self.timeout if timeout is None else timeout
+        if self.cache is not None and method.upper() == "GET":
+            return self._cached_get(self.cache, url, merged, timeout, cache_ttl, **kwargs)
+        return self._send(method, url, merged, timeout, **kwargs)
+
+    def _count_cache(self, result: str) -> None:
+        # Detail pages are fetched from worker threads
+        with self._lock:
+            self.cache_stats[result] += 1
+
+    def _cached_get(
+        self,
+        cache: ResponseCache,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        cache_ttl: Optional[float],
+        **kwargs,
+    ) -> "requests.Response":
+        key = cache.key(url, kwargs.get("params"))
+        entry = cache.get(key)
+        if entry is not None:
+            ttl = cache.ttl_for(host_of(url)) if cache_ttl is None else cache_ttl
+            if entry.age() < ttl:
+                self._count_cache("hit")
+                registry.add("http.cache", result="hit")
+                return entry.to_response()
+            headers = {**headers, **entry.validators}
+
+        response = self._send("GET", url, headers, timeout, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self._count_cache("revalidated")
+            registry.add("http.cache", result="revalidated")
+            cache.refresh(entry)
+            return entry.to_response()
+        self._count_cache("miss")
+        registry.add("http.cache", result="miss")
+        if response.status_code == 200:
+            cache.store(key, response)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        **kwargs,
+    ) -> "requests.Response":
+        import requests
+
+        host = host_of(url)
+        sess = self.session(host)
+        attempt = 0
+        while True:
+            try:
+                response = self._send_once(sess, host, method, url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.debug("%s %s failed (%s); retrying in %.2fs", method, url, exc, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                delay = min(delay, MAX_BACKOFF)
+                logger.debug(
+                    "%s %s returned %s; retrying in %.2fs",
+                    method,
+                    url,
+                    response.status_code,
+                    delay,
+                )
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def _send_once(
+        self, sess: "requests.Session", host: str, method: str, url: str, **kwargs
+    ) -> "requests.Response":
+        if self.scheduler is None:
+            return self._timed_request(sess, method, url, **kwargs)
+        registry.record("http.queue_wait", self.scheduler.acquire(host))
+        status = retry_after = None
+        try:
+            response = self._timed_request(sess, method, url, **kwargs)
+            status, retry_after = response.status_code, _retry_after(response)
+            return response
+        finally:
+            self.scheduler.release(host, status, retry_after)
+
+    @staticmethod
+    def _timed_request(sess: "requests.Session", method: str, url: str, **kwargs) -> "requests.Response":
+        with registry.timer("http.request") as timing:
+            response = sess.request(method, url, **kwargs)
+            timing.bytes = len(getattr(response, "content", None) or b"")
+        registry.add("http.responses", status=response.status_code)
+        return response
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+
+_client = HTTPClient()
+
+
+def get_client() -> HTTPClient:
+    """Return the process-wide client used by :func:`get` and :func:`post`."""
+    return _client
+
+
+def set_client(client: HTTPClient) -> None:
+    """Replace the process-wide client."""
+    global _client
+    _client = client
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    """Send a GET request through the shared client."""
+    return _client.get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    """Send a POST request through the shared client."""
+    return _client.post(url, **kwargs)
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from models import RetreatEvent
+from serialization import format_datetime, iter_records
+
+logger = logging.getLogger(__name__)
+
+
+def event_key(event: RetreatEvent) -> str:
+    """Stable identity of an event across runs.
+
+    Spirit Rock events carry an ``eventCode``; everything else is keyed by its
+    link, falling back to title and start date for events without one.
+    """
+    code = event.other.get("eventCode") if event.other else None
+    if code:
+        return f"eventCode:{code}"
+    if event.link:
+        return event.link
+    return f"{event.title}@{format_datetime(event.dates.start)}"
+
+
+def occurrence_key(event: RetreatEvent) -> str:
+    """Like :func:`event_key`, but a link is qualified by the start date.
+
+    Some pages list several dated occurrences under one link (IRC's online
+    retreat schedule, for one); each is a separate event.
+    """
+    code = event.other.get("eventCode") if event.other else None
+    if code:
+        return f"eventCode:{code}"
+    if event.link:
+        return f"{event.link}@{format_datetime(event.dates.start)}"
+    return f"{event.title}@{format_datetime(event.dates.start)}"
+
+
+def record_key(record: Dict) -> str:
+    """:func:`event_key` for an event loaded from a JSON output file."""
+    code = (record.get("other") or {}).get("eventCode")
+    if code:
+        return f"eventCode:{code}"
+    if record.get("link"):
+        return record["link"]
+    return f"{record.get('title', '')}@{_stored_date((record.get('dates') or {}).get('start'))}"
+
+
+def _stored_date(value) -> Optional[str]:
+    # Files written before dates were ISO formatted used ``str(datetime)``
+    if isinstance(value, str) and len(value) > 10 and value[10] == " ":
+        return f"{value[:10]}T{value[11:]}"
+    return value
+
+
+def listing_signature(event: RetreatEvent) -> Tuple:
+    """Fields that come from the listing and decide whether an event changed."""
+    return (
+        event.title,
+        format_datetime(event.dates.start),
+        format_datetime(event.dates.end),
+        event.location.practice_center,
+        event.link,
+    )
+
+
+def record_signature(record: Dict) -> Tuple:
+    dates = record.get("dates") or {}
+    location = record.get("location") or {}
+    return (
+        record.get("title"),
+        _stored_date(dates.get("start")),
+        _stored_date(dates.get("end")),
+        location.get("practice_center"),
+        record.get("link"),
+    )
+
+
+def same_listing(record: Dict, event: RetreatEvent) -> bool:
+    """Whether ``event`` is the listing ``record`` was stored from.
+
+    A listing row without an end date also matches a stored range that
+    covers its day, as left by :mod:`dedup` merging the per-day rows of a
+    multi-day retreat.
+    """
+    stored, listed = record_signature(record), listing_signature(event)
+    if stored == listed:
+        return True
+    if stored[0] != listed[0] or stored[3:] != listed[3:] or listed[2] is not None:
+        return False
+    first, last, day = stored[1], stored[2] or stored[1], listed[1]
+    return bool(first and day) and first <= day and day[:10] <= last[:10]
+
+
+@dataclass
+class IncrementalReport:
+    """Counts of how the current crawl relates to the previous one."""
+
+    new: int = 0
+    changed: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+class IncrementalCrawl:
+    """Reuse enrichment from a previous run for events that did not change.
+
+    Pass :meth:`select` to a site's enrichment step: it copies the stored
+    ``description``/``teachers`` onto unchanged events and returns only the
+    events that still need their detail pages fetched.
+    """
+
+    def __init__(self, previous: Iterable[Dict]) -> None:
+        # Several events may share a key, e.g. dated occurrences under one link
+        self.previous: Dict[str, List[Dict]] = {}
+        for record in previous:
+            self.previous.setdefault(record_key(record), []).append(record)
+        self.report = IncrementalReport()
+        self._seen: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def _match(self, event: RetreatEvent) -> Tuple[Optional[Dict], bool]:
+        """The previous record for ``event`` and whether it is unchanged.
+
+        A changed event is paired with a record under its key that no other
+        event has matched, so it is not also counted as removed.
+        """
+        candidates = self.previous.get(event_key(event), [])
+        for record in candidates:
+            if same_listing(record, event):
+                return record, True
+        for record in candidates:
+            if id(record) not in self._seen:
+                return record, False
+        return (candidates[0], False) if candidates else (None, False)
+
+    @classmethod
+    def from_file(cls, path: str) -> "IncrementalCrawl":
+        """Load the previous result set from a JSON or JSON Lines output file."""
+        if not os.path.exists(path):
+            logger.info("No previous results at %s; running a full crawl", path)
+            return cls([])
+        return cls(iter_records(path))
+
+    def select(self, events: List[RetreatEvent]) -> List[RetreatEvent]:
+        """Return the events in ``events`` that need enrichment."""
+        pending: List[RetreatEvent] = []
+        with self._lock:
+            for event in events:
+                record, unchanged = self._match(event)
+                if record is None:
+                    self.report.new += 1
+                    pending.append(event)
+                    continue
+                self._seen.add(id(record))
+                if not unchanged or (record.get("other") or {}).get("descriptionError"):
+                    self.report.changed += 1
+                    pending.append(event)
+                else:
+                    self.report.reused += 1
+                    event.description = record.get("description", "")
+                    if not event.teachers:
+                        event.teachers = list(record.get("teachers") or [])
+        return pending
+
+    def finish(self) -> IncrementalReport:
+        """Count previous events that were not seen and return the report."""
+        self.report.removed = sum(len(records) for records in self.previous.values()) - len(self._seen)
+        logger.info(
+            "Incremental crawl: %d new, %d changed, %d reused, %d removed",
+            self.report.new,
+            self.report.changed,
+            self.report.reused,
+            self.report.removed,
+        )
+        return self.report
@@ -0,0 +1,277 @@
+import functools
+import json
+import math
+import multiprocessing
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+#: Prefix of every metric name in the Prometheus output
+PROMETHEUS_PREFIX = "retreat"
+QUANTILES = (0.5, 0.95)
+
+CounterKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class StageStats:
+    """Calls of one stage: how long each took and what it produced."""
+
+    seconds: List[float] = field(default_factory=list)
+    events: int = 0
+    bytes: int = 0
+    errors: int = 0
+
+    @property
+    def calls(self) -> int:
+        return len(self.seconds)
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile of the call durations."""
+        if not self.seconds:
+            return 0.0
+        ordered = sorted(self.seconds)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+@dataclass
+class Timing:
+    """Handed out by :meth:`Metrics.timer` so the caller can add what the call produced."""
+
+    events: int = 0
+    bytes: int = 0
+
+
+class Metrics:
+    """Thread-safe timers and counters for the stages of a crawl.
+
+    A stage is a named step such as ``sfzc.parse_listing``; each call records
+    its duration and, optionally, the events and bytes it produced.
+    Counters are plain totals with optional labels.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._counters: Counter = Counter()
+
+    def record(self, stage: str, seconds: float, events: int = 0, nbytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.seconds.append(seconds)
+            stats.events += events
+            stats.bytes += nbytes
+            stats.errors += error
+
+    def add(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increase counter ``name`` (with ``labels``) by ``value``."""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[Timing]:
+        """Time the ``with`` block as one call of ``stage``."""
+        timing = Timing()
+        started = time.perf_counter()
+        error = False
+        try:
+            yield timing
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - started, timing.events, timing.bytes, error)
+
+    def timed(
+        self,
+        stage: str,
+        events: Optional[Callable[[Any], int]] = None,
+        nbytes: Optional[Callable[..., int]] = None,
+    ) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        """Decorator timing each call of a function as ``stage``.
+
+        ``events`` counts the events in the function's result; ``nbytes``
+        is called with the function's arguments to count its input bytes.
+        """
+
+        def decorate(func: Callable[..., T]) -> Callable[..., T]:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage) as timing:
+                    if nbytes is not None:
+                        timing.bytes = nbytes(*args, **kwargs)
+                    result = func(*args, **kwargs)
+                    if events is not None:
+                        timing.events = events(result)
+                    return result
+
+            return wrapper
+
+        return decorate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw samples and counters, picklable and accepted by :meth:`merge`."""
+        with self._lock:
+            return {
+                "stages": {
+                    name: (list(s.seconds), s.events, s.bytes, s.errors) for name, s in self._stages.items()
+                },
+                "counters": dict(self._counters),
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Add the samples and counters of another registry's :meth:`snapshot`."""
+        with self._lock:
+            for name, (seconds, events, nbytes, errors) in snapshot["stages"].items():
+                stats = self._stages.get(name)
+                if stats is None:
+                    stats = self._stages[name] = StageStats()
+                stats.seconds.extend(seconds)
+                stats.events += events
+                stats.bytes += nbytes
+                stats.errors += errors
+            self._counters.update(snapshot["counters"])
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage totals and latency quantiles, plus the counters."""
+        with self._lock:
+            stages = {name: StageStats(list(s.seconds), s.events, s.bytes, s.errors) for name, s in self._stages.items()}
+            counters = dict(self._counters)
+        return {
+            "stages": {
+                name: {
+                    "calls": s.calls,
+                    "seconds": round(s.total, 6),
+                    **{f"p{round(q * 100)}": round(s.quantile(q), 6) for q in QUANTILES},
+                    "max": round(max(s.seconds, default=0.0), 6),
+                    "events": s.events,
+                    "bytes": s.bytes,
+                    "errors": s.errors,
+                }
+                for name, s in sorted(stages.items())
+            },
+            "counters": {_counter_name(key): value for key, value in sorted(counters.items())},
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        summary = self.summary()
+        prefix = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duration of each call of a crawl stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for name, s in summary["stages"].items():
+            label = f'stage="{_escape(name)}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{{label},quantile="{q}"}} {s[f"p{round(q * 100)}"]}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{label}}} {s['seconds']}")
+            lines.append(f"{prefix}_stage_seconds_count{{{label}}} {s['calls']}")
+        for column, help_text in (
+            ("events", "Events produced by a crawl stage."),
+            ("bytes", "Bytes handled by a crawl stage."),
+            ("errors", "Calls of a crawl stage that raised."),
+        ):
+            lines.append(f"# HELP {prefix}_stage_{column}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_stage_{column}_total counter")
+            for name, s in summary["stages"].items():
+                lines.append(f'{prefix}_stage_{column}_total{{stage="{_escape(name)}"}} {s[column]}')
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{metric}{{{rendered}}} {value}" if rendered else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the metrics to ``path``: Prometheus text for ``.prom``/``.txt``, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json() + "\n"
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+    def report(self) -> str:
+        """A fixed-width table of the stages and counters for ``--profile``."""
+        summary = self.summary()
+        lines = [
+            f"{'stage':<32} {'calls':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'events':>8} {'KiB':>9}"
+        ]
+        for name, s in summary["stages"].items():
+            lines.append(
+                f"{name:<32} {s['calls']:>7} {s['seconds']:>9.3f} {s['p50'] * 1000:>9.1f} "
+                f"{s['p95'] * 1000:>9.1f} {s['events']:>8} {s['bytes'] / 1024:>9.1f}"
+            )
+        if summary["counters"]:
+            lines.append("")
+            width = max(len(name) for name in summary["counters"])
+            for name, value in summary["counters"].items():
+                lines.append(f"{name:<{width}} {value:>10g}")
+        return "\n".join(lines)
+
+
+def _counter_name(key: CounterKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+#: Registry shared by the whole crawl
+registry = Metrics()
+
+
+def run_measured(func: Callable[..., T], *args: Any) -> Tuple[T, Optional[Dict[str, Any]]]:
+    """Call ``func`` and return its result with the metrics it recorded.
+
+    Meant to be submitted to a process pool: a worker runs one call at a
+    time, so its registry is cleared first and the snapshot holds only this
+    call.  In the main process nothing is returned, since the calls already
+    record into the shared registry.
+    """
+    if multiprocessing.parent_process() is None:
+        return func(*args), None
+    registry.reset()
+    result = func(*args)
+    return result, registry.snapshot()
+
+
+def unwrap(outcome: Tuple[T, Optional[Dict[str, Any]]]) -> T:
+    """The result of :func:`run_measured`, merging its metrics into :data:`registry`."""
+    result, snapshot = outcome
+    if snapshot is not None:
+        registry.merge(snapshot)
+    return result
@@ -1,8 +1,39 @@
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
+def _slotted(cls):
+    """Rebuild dataclass ``cls`` with ``__slots__`` instead of a ``__dict__``.
+
+    ``dataclass(slots=True)`` needs Python 3.10; this does the same for the
+    older versions the tool supports.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+
+    # Frozen instances reject setattr, which default slot pickling relies on
+    def __getstate__(self):
+        return [getattr(self, name) for name in names]
+
+    def __setstate__(self, state):
+        for name, value in zip(names, state):
+            object.__setattr__(self, name, value)
+
+    namespace["__getstate__"] = __getstate__
+    namespace["__setstate__"] = __setstate__
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+@_slotted
 @dataclass
 class RetreatDates:
     """Date range for a retreat."""
@@ -11,16 +42,26 @@ class RetreatDates:
     end: Optional[datetime] = None
 
 
-@dataclass
+@_slotted
+@dataclass(frozen=True)
 class RetreatLocation:
-    """Detailed retreat location information."""
+    """Detailed retreat location information.
+
+    Locations are immutable so that events at the same place can share one
+    instance; see :class:`LocationRegistry`.
+    """
 
     practice_center: Optional[str] = None
     city: Optional[str] = None
     region: Optional[str] = None
     country: Optional[str] = None
 
+    def __reduce__(self):
+        # Copies unpickled from parser processes rejoin the shared registry
+        return _shared_location, (self.practice_center, self.city, self.region, self.country)
 
+
+@_slotted
 @dataclass
 class RetreatEvent:
     """Unified representation of a retreat event."""
@@ -32,3 +73,47 @@ class RetreatEvent:
     description: str
     link: str
     other: Dict[str, str] = field(default_factory=dict)
+
+
+class LocationRegistry:
+    """Share one :class:`RetreatLocation` per place and intern repeated strings.
+
+    Every event of a center repeats the same center, city, region, country
+    and address. Parsers look these up here so that all events keep a
+    reference to a single copy.
+    """
+
+    def __init__(self) -> None:
+        self._locations: Dict[Tuple, RetreatLocation] = {}
+
+    def location(
+        self,
+        practice_center: Optional[str] = None,
+        city: Optional[str] = None,
+        region: Optional[str] = None,
+        country: Optional[str] = None,
+    ) -> RetreatLocation:
+        """Return the shared location with these fields."""
+        key = (practice_center, city, region, country)
+        found = self._locations.get(key)
+        if found is None:
+            found = self._locations.setdefault(
+                key, RetreatLocation(*(self.text(value) for value in key))
+            )
+        return found
+
+    @staticmethod
+    def text(value):
+        """Intern ``value`` if it is a string; other values are returned as is."""
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+
+#: Registry shared by all site parsers
+locations = LocationRegistry()
+
+
+def _shared_location(*fields: Optional[str]) -> RetreatLocation:
+    return locations.location(*fields)
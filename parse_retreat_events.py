@@ -1,86 +1,70 @@
+import argparse
+import contextlib
+import io
 import logging
-from dataclasses import asdict
-from typing import Callable, Dict, List, Optional
-
-import requests
-import json
+import sqlite3
+import sys
+from concurrent.futures import Executor
+from datetime import date
+from functools import partial
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import crawler
+import http_client
+import pipeline
+from dedup import Deduplicator
+from event_index import EventIndex
+from event_store import EventStore, sqlite_path
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache
+from incremental import IncrementalCrawl
+from metrics import registry
 from models import RetreatEvent
-from sites import sfzc, irc, spiritrock
+from pool import DEFAULT_WORKERS
+from serialization import load_events, write_events, write_jsonl
+from sites import API, SINGLE, SITES, Site, selected_sites, site_names
+from throttle import HostLimit, HostScheduler
 
-IRC_URL = "https://www.insightretreatcenter.org/retreats/"
-SPIRITROCK_URL = "https://www.spiritrock.org/calendar?programType=retreats"
+Select = Callable[[List[RetreatEvent]], List[RetreatEvent]]
 
 logger = logging.getLogger(__name__)
 
 
+@registry.timed("fetch_retreat_events", events=len)
 def fetch_retreat_events(
     base_url: str,
-    pages: int = 3,
-    parser: Callable[[str, str], List[RetreatEvent]] = sfzc.parse_events,
+    pages: Optional[int] = 3,
+    parser: Optional[Callable[[str, str], List[RetreatEvent]]] = None,
     params: Optional[Dict[str, str]] = None,
+    inspect: Optional[crawler.PageInspector] = None,
 ) -> List[RetreatEvent]:
-    """Fetch events containing 'retreat' from paginated calendar pages."""
-    all_events: List[RetreatEvent] = []
-    for page in range(pages):
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/114.0.0.0 Safari/537.36"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        }
-        if params is None:
-            url = base_url.format(page=page)
-            request_url = url
-            logger.info("Fetching %s", url)
-            response = requests.get(url, headers=headers)
-        else:
-            page_params = params.copy()
-            page_params["page"] = str(page)
-            logger.info("Fetching %s", base_url)
-            response = requests.get(base_url, params=page_params, headers=headers)
-            request_url = response.url
-        logger.debug(
-            "Response status: %s for %s",
-            getattr(response, "status_code", "N/A"),
-            request_url,
-        )
-        response.raise_for_status()
+    """Fetch events containing 'retreat' from paginated calendar pages.
 
-        html = response.text
-        try:
-            payload = response.json()
-        except ValueError:
-            payload = None
-
-        if isinstance(payload, list):
-            html_parts: List[str] = []
-            for part in payload:
-                if not isinstance(part, dict):
-                    continue
-                data = part.get("data", "")
-                if isinstance(data, list):
-                    html_parts.extend(str(item) for item in data if isinstance(item, (str, bytes)))
-                else:
-                    html_parts.append(str(data))
-            html = "".join(html_parts)
-
-        logger.debug("Received %d bytes", len(html))
-        events = parser(html, request_url)
-        logger.debug("%d events parsed from page %d", len(events), page)
-        all_events.extend(events)
-
-    logger.info("%d retreat events found", len(all_events))
-    return all_events
+    With ``pages=None`` the page count is discovered using ``inspect``.
+    ``parser`` and ``inspect`` default to the SFZC ones.
+    """
+    return crawler.run(_crawl_listing(base_url, pages, parser, params, inspect))
+
+
+def _crawl_listing(
+    base_url: str,
+    pages: Optional[int],
+    parser: Optional[Callable[[str, str], List[RetreatEvent]]],
+    params: Optional[Dict[str, str]] = None,
+    inspect: Optional[crawler.PageInspector] = None,
+):
+    if parser is None:
+        parser = SITES["sfzc"].hook("parser")
+    if pages is None:
+        if inspect is None:
+            inspect = SITES["sfzc"].hook("inspect")
+        return crawler.crawl_listing_auto(base_url, parser, inspect, params)
+    return crawler.crawl_listing(base_url, pages, parser, params)
 
 
 def fetch_all_retreats(
     urls: List[str],
     pages: int = 3,
-    parser: Callable[[str, str], List[RetreatEvent]] = sfzc.parse_events,
+    parser: Optional[Callable[[str, str], List[RetreatEvent]]] = None,
 ) -> List[RetreatEvent]:
     """Fetch retreat events from multiple base URLs."""
     all_events: List[RetreatEvent] = []
@@ -94,71 +78,483 @@ def fetch_all_retreats(
     return all_events
 
 
-def events_to_json(events: List[RetreatEvent]) -> str:
+def events_to_json(events: List[RetreatEvent], pretty: bool = True) -> str:
     """Convert a list of events to a JSON string."""
-    return json.dumps([asdict(event) for event in events], default=str, indent=2)
+    buffer = io.StringIO()
+    write_events(events, buffer, pretty=pretty)
+    return buffer.getvalue()
+
+
+def iter_retreat_events(
+    base_url: str,
+    pages: Optional[int] = 3,
+    parser: Optional[Callable[[str, str], Iterable[RetreatEvent]]] = None,
+    params: Optional[Dict[str, str]] = None,
+    inspect: Optional[crawler.PageInspector] = None,
+    parse_pool: Optional[Executor] = None,
+    enrich: Optional[Callable[[List[RetreatEvent]], object]] = None,
+    fetchers: int = 1,
+) -> Iterator[RetreatEvent]:
+    """Yield events page by page instead of collecting the whole crawl.
+
+    Up to ``fetchers`` pages are downloaded while the current one is parsed.
+    With ``pages=None`` pages are followed until ``inspect`` reports the end.
+    With ``parse_pool`` pages are parsed there, several at a time (see
+    :func:`pipeline.parse_pages`), and ``parser`` must be picklable.
+    ``enrich`` then runs in this process on each page's events before they
+    are yielded, e.g. to fetch detail pages.  ``parser`` and ``inspect``
+    default to the SFZC ones.
+    """
+    sfzc = SITES["sfzc"]
+    if parser is None:
+        parser = sfzc.hook("parser")
+    if inspect is None and pages is None:
+        inspect = sfzc.hook("inspect")
+    downloads = crawler.iter_pages(base_url, pages, params, inspect, fetchers)
+    if parse_pool is not None:
+        parsed: Iterable[Iterable[RetreatEvent]] = pipeline.parse_pages(downloads, parser, parse_pool)
+    else:
+        parsed = (parser(html, request_url) for html, request_url in downloads)
+    for events in parsed:
+        if enrich is not None:
+            events = list(events)
+            enrich(events)
+        yield from events
+
+
+SiteOptions = Dict[str, Dict[str, object]]
+
 
+def iter_all_sites(
+    pages: Optional[int] = 3,
+    select: Optional[Select] = None,
+    options: Optional[SiteOptions] = None,
+    parse_pool: Optional[Executor] = None,
+    fetchers: int = 1,
+    sites: Optional[List[Site]] = None,
+) -> Iterator[RetreatEvent]:
+    """Streaming counterpart of :func:`fetch_all_sites`.
 
-def fetch_all_sites(pages: int = 3) -> List[RetreatEvent]:
-    """Fetch retreat events from all supported centers."""
-    events: List[RetreatEvent] = []
-    events.extend(
-        fetch_retreat_events(
-            sfzc.CALENDAR_URL,
-            pages=pages,
-            parser=sfzc.parse_events,
+    With ``parse_pool`` listing and detail pages are parsed there; see
+    :func:`iter_retreat_events`.
+    """
+    for site in SITES.values() if sites is None else sites:
+        site_options = (options or {}).get(site.name, {})
+        if site.pagination == API:
+            yield from site.hook("stream")(select=select, parse_pool=parse_pool, **site_options)
+            continue
+        parser, enrich = site_stages(site, site_options, select, parse_pool)
+        yield from iter_retreat_events(
+            site.listing_url(),
+            pages=1 if site.pagination == SINGLE else pages,
+            parser=parser,
+            inspect=site.hook("inspect"),
+            parse_pool=parse_pool,
+            enrich=enrich,
+            fetchers=fetchers,
         )
-    )
-    events.extend(fetch_retreat_events(IRC_URL, pages=1, parser=irc.parse_events))
-    events.extend(spiritrock.parse_algolia_events())
+
+
+Stages = Tuple[Callable[[str, str], List[RetreatEvent]], Optional[Callable[[List[RetreatEvent]], object]]]
+
+
+def site_stages(
+    site: Site,
+    options: Optional[Dict[str, object]] = None,
+    select: Optional[Select] = None,
+    parse_pool: Optional[Executor] = None,
+) -> Stages:
+    """The ``parser`` and ``enrich`` arguments of :func:`iter_retreat_events` for ``site``.
+
+    Without a pool the site's parser fetches detail pages itself.  With
+    one, only the listing is parsed in the pool; detail pages are fetched
+    here and parsed in the pool as well.
+    """
+    options = options or {}
+    parser = site.hook("parser")
+    enrich = site.hook("enrich")
+    if parse_pool is None:
+        if enrich is not None:
+            return partial(parser, select=select, **options), None
+        if select is None:
+            return parser, None
+        return partial(_parse_and_select, parser, select), None
+    if enrich is None:
+        return parser, select
+    enrich = partial(enrich, parse_pool=parse_pool, **options)
+    return site.hook("listing_parser") or parser, partial(_select_and_enrich, select, enrich)
+
+
+def _select_and_enrich(
+    select: Optional[Select],
+    enrich: Callable[[List[RetreatEvent]], object],
+    events: List[RetreatEvent],
+) -> None:
+    enrich(select(events) if select else events)
+
+
+def _parse_and_select(
+    parser: Callable[[str, str], List[RetreatEvent]],
+    select: Select,
+    html: str,
+    source: str,
+) -> List[RetreatEvent]:
+    """Run ``parser`` and pass its events through ``select`` for bookkeeping."""
+    events = parser(html, source)
+    select(events)
     return events
 
 
-def main() -> None:
-    import argparse
+async def crawl_all_sites(
+    pages: Optional[int] = 3,
+    select: Optional[Select] = None,
+    options: Optional[SiteOptions] = None,
+    sites: Optional[List[Site]] = None,
+) -> List[RetreatEvent]:
+    """Crawl the given sites (all by default) concurrently.
+
+    ``select`` narrows the events whose detail pages are fetched; see
+    :class:`incremental.IncrementalCrawl`.  ``options`` holds each site's
+    keyword arguments by name, e.g. the Spirit Rock Algolia ``query``.
+    """
+    jobs = []
+    for site in SITES.values() if sites is None else sites:
+        site_options = (options or {}).get(site.name, {})
+        if site.pagination == API:
+            jobs.append(crawler.in_thread(site.hook("fetch"), select=select, **site_options))
+            continue
+        parser, _ = site_stages(site, site_options, select)
+        if site.pagination == SINGLE:
+            jobs.append(crawler.crawl_listing(site.listing_url(), 1, parser))
+        else:
+            jobs.append(_crawl_listing(site.listing_url(), pages, parser, inspect=site.hook("inspect")))
+    return await crawler.crawl_sites(*jobs)
+
+
+def fetch_all_sites(
+    pages: Optional[int] = 3,
+    select: Optional[Select] = None,
+    options: Optional[SiteOptions] = None,
+    sites: Optional[List[Site]] = None,
+) -> List[RetreatEvent]:
+    """Fetch retreat events from the given sites, all supported centers by default."""
+    return crawler.run(crawl_all_sites(pages=pages, select=select, options=options, sites=sites))
+
+
+def configure_cache(cache_dir: Optional[str], sites: Optional[List[Site]] = None) -> None:
+    """Install a shared HTTP client backed by an on-disk cache in ``cache_dir``.
+
+    Passing ``None`` installs a client without a cache.  Either way requests
+    are paced by the ``RATE_LIMITS`` of ``sites`` (all by default).
+    """
+    sites = list(SITES.values()) if sites is None else sites
+    scheduler = HostScheduler(rate_limits(sites))
+    if cache_dir is None:
+        http_client.set_client(http_client.HTTPClient(scheduler=scheduler))
+        return
+    ttls: Dict[str, float] = {}
+    for site in sites:
+        ttls.update(getattr(site.load(), "CACHE_TTLS", {}))
+    http_client.set_client(
+        http_client.HTTPClient(cache=ResponseCache(cache_dir, ttls=ttls), scheduler=scheduler)
+    )
+
+
+def rate_limits(sites: Optional[List[Site]] = None) -> Dict[str, HostLimit]:
+    """Per-host request limits declared by the modules of ``sites`` (all by default)."""
+    limits: Dict[str, HostLimit] = {}
+    for site in SITES.values() if sites is None else sites:
+        limits.update(getattr(site.load(), "RATE_LIMITS", {}))
+    return limits
+
+
+def log_scheduler_stats(scheduler: Optional[HostScheduler]) -> None:
+    if scheduler is None:
+        return
+    for host, stats in sorted(scheduler.stats().items()):
+        logger.info(
+            "%s: %d requests, queued %.2fs in total (mean %.3fs, max %.2fs), %d throttled, %.2f req/s allowed",
+            host,
+            stats.requests,
+            stats.waited,
+            stats.mean_wait,
+            stats.max_wait,
+            stats.throttled,
+            stats.rate,
+        )
+
+
+def pages_arg(value: str) -> Optional[int]:
+    """``--pages`` value: a page count, or ``auto`` to discover it."""
+    if value == "auto":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+
+
+def print_events(events: Iterable[RetreatEvent]) -> None:
+    """Print a short summary of each event."""
+    for event in events:
+        start_dt = event.dates.start
+        date_str = start_dt.strftime("%B %d, %Y") if start_dt else "Unknown Date"
+        print(f"{date_str} - {event.title}")
+        print(event.location.practice_center or "")
+        print(event.link or "")
+        print(f"Source: {event.other.get('source', '')}")
+        print()
+
 
+def date_arg(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a date as YYYY-MM-DD, got {value!r}")
+
+
+def add_query_parser(subparsers) -> None:
+    query = subparsers.add_parser(
+        "query",
+        help="Search a saved events file",
+        description="Search events saved with --output; all given conditions must match",
+    )
+    query.add_argument("events_file", help="A .json/.jsonl file or sqlite:PATH written with --output")
+    query.add_argument("--center", help="Words of the practice center name")
+    query.add_argument("--teacher", action="append", default=[],
+                       help="Words of a teacher's name; repeat to match any of several teachers")
+    query.add_argument("--title", help="Words that must appear in the title")
+    query.add_argument("--from", dest="date_from", type=date_arg,
+                       help="Only events still running on or after this date")
+    query.add_argument("--to", dest="date_to", type=date_arg,
+                       help="Only events starting on or before this date")
+    query.add_argument("--json", action="store_true", help="Print the matches as JSON")
+
+
+def run_query(args: argparse.Namespace) -> None:
+    store_path = sqlite_path(args.events_file)
+    try:
+        if store_path:
+            with EventStore(store_path, readonly=True) as store:
+                events = store.events()
+        else:
+            events = load_events(args.events_file)
+    except OSError as exc:
+        sys.exit(f"query: cannot read {args.events_file}: {exc.strerror or exc}")
+    except (ValueError, sqlite3.Error) as exc:
+        sys.exit(f"query: {args.events_file} is not an events file: {exc}")
+    index = EventIndex(events)
+    query = index.query()
+    if args.center:
+        query = query.center(args.center)
+    if args.title:
+        query = query.title(args.title)
+    if args.date_from or args.date_to:
+        query = query.overlapping(args.date_from, args.date_to)
+    if args.teacher:
+        alternatives = [query.teacher(name) for name in args.teacher]
+        query = alternatives[0]
+        for alternative in alternatives[1:]:
+            query = query | alternative
+
+    events = query.events()
+    if args.json:
+        write_events(events, sys.stdout)
+        print()
+    else:
+        print_events(events)
+        print(f"{len(events)} of {len(index)} events match")
+
+
+def _parse_pool(processes: int) -> ContextManager[Optional[Executor]]:
+    if processes == 1:
+        return contextlib.nullcontext()
+    return pipeline.parse_pool(processes or None)
+
+
+def site_options(args: argparse.Namespace, sites: List[Site]) -> SiteOptions:
+    """Each site's keyword arguments from the command line, keyed by name."""
+    options: SiteOptions = {}
+    for site in sites:
+        from_args = site.hook("options")
+        options[site.name] = from_args(args) if from_args else {}
+    return options
+
+
+def site_events(
+    args: argparse.Namespace,
+    select: Optional[Select],
+    iterate: bool = False,
+    parse_pool: Optional[Executor] = None,
+) -> Iterable[RetreatEvent]:
+    """Crawl the sites chosen by ``args.site``.
+
+    Only the modules of those sites are imported.  With ``iterate`` the
+    events are produced lazily, page by page; otherwise the sites' pages
+    are crawled concurrently and returned as a list.
+    """
+    sites = selected_sites(args.site)
+    options = site_options(args, sites)
+    if not iterate:
+        return fetch_all_sites(pages=args.pages, select=select, options=options, sites=sites)
+    return iter_all_sites(
+        pages=args.pages,
+        select=select,
+        options=options,
+        parse_pool=parse_pool,
+        fetchers=args.fetchers,
+        sites=sites,
+    )
+
+
+def main() -> None:
     parser = argparse.ArgumentParser(description="Parse retreat events from supported sites")
+    subparsers = parser.add_subparsers(dest="command")
+    add_query_parser(subparsers)
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-    parser.add_argument("--pages", type=int, default=3, help="Number of pages to fetch (where applicable)")
+    parser.add_argument(
+        "--pages",
+        type=pages_arg,
+        default=3,
+        help="Number of pages to fetch (where applicable), or 'auto' to follow the pager",
+    )
     parser.add_argument(
         "--site",
-        choices=["sfzc", "irc", "spiritrock", "all"],
+        choices=[*site_names(), "all"],
         default="all",
         help="Which site to parse",
     )
-    parser.add_argument("--output", type=str, help="Write events to this JSON file")
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Write events to this JSON file (.jsonl streams one event per line), "
+        "or to a SQLite database given as sqlite:PATH",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write the --output JSON without indentation",
+    )
+    parser.add_argument(
+        "--sfzc-workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of concurrent SFZC detail page fetches",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=1,
+        help="Parse pages in this many processes while later pages download (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--fetchers",
+        type=int,
+        default=2,
+        help="Number of listing pages downloaded ahead of the parser when streaming or pipelining",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print call counts, p50/p95 latencies, events and bytes per stage when done",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write the per-stage metrics to this file: Prometheus text for .prom/.txt, JSON otherwise",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for the HTTP response cache",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Disable the HTTP response cache")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse descriptions from the existing --output file for unchanged events",
+    )
+    parser.add_argument(
+        "--spiritrock-program-types",
+        help="Comma-separated Spirit Rock program types to request (empty for all, default Retreat)",
+    )
+    parser.add_argument(
+        "--spiritrock-from",
+        type=date_arg,
+        help="Ask Algolia only for Spirit Rock events starting on or after this date "
+        "(a numeric startDate filter; off by default)",
+    )
     args = parser.parse_args()
+    if args.command == "query":
+        run_query(args)
+        return
+    if args.incremental and not args.output:
+        parser.error("--incremental requires --output")
 
     log_level = logging.DEBUG if args.debug else logging.INFO
     logging.basicConfig(level=log_level, format="%(levelname)s:%(message)s")
+    configure_cache(None if args.no_cache else args.cache_dir, selected_sites(args.site))
+
+    store_path = sqlite_path(args.output)
+    tracker = None
+    if args.incremental and store_path:
+        try:
+            with EventStore(store_path, readonly=True) as store:
+                tracker = IncrementalCrawl(store.records())
+        except FileNotFoundError:
+            logger.info("No previous results at %s; running a full crawl", store_path)
+            tracker = IncrementalCrawl([])
+    elif args.incremental:
+        tracker = IncrementalCrawl.from_file(args.output)
+    select = tracker.select if tracker else None
 
-    if args.site == "sfzc":
-        events = fetch_retreat_events(
-            sfzc.CALENDAR_URL,
-            pages=args.pages,
-            parser=sfzc.parse_events,
+    # .jsonl and SQLite outputs are written event by event as the crawl produces them
+    streaming = bool(store_path) or (bool(args.output) and args.output.endswith(".jsonl"))
+
+    with registry.timer("crawl") as timing, _parse_pool(args.parse_processes) as pool:
+        events = site_events(args, select, iterate=streaming or pool is not None, parse_pool=pool)
+        # Streamed events are not held in memory; only their keys are
+        dedup = Deduplicator(keep_events=not streaming)
+        if store_path:
+            with EventStore(store_path) as store:
+                dedup.on_duplicate = store.merge_duplicate
+                count = store.upsert(dedup.iter_unique(events))
+        elif streaming:
+            with open(args.output, "w", encoding="utf-8") as fh:
+                count = write_jsonl(dedup.iter_unique(events), fh)
+        else:
+            events = dedup.dedupe(events)
+        timing.events = dedup.report.kept
+    report = dedup.finish()
+    registry.add("dedup.received", report.received)
+    registry.add("dedup.merged", report.merged)
+
+    if tracker:
+        tracker.finish()
+
+    client = http_client.get_client()
+    log_scheduler_stats(client.scheduler)
+    stats = client.cache_stats
+    if stats:
+        logger.info(
+            "HTTP cache: %d hits, %d revalidated, %d misses",
+            stats["hit"],
+            stats["revalidated"],
+            stats["miss"],
         )
-    elif args.site == "irc":
-        events = fetch_retreat_events(IRC_URL, pages=1, parser=irc.parse_events)
-    elif args.site == "spiritrock":
-        events = spiritrock.parse_algolia_events()
-    else:  # all
-        events = fetch_all_sites(pages=args.pages)
-
-    if args.output:
-        json_str = events_to_json(events)
+
+    if streaming:
+        print(f"Wrote {count} events to {args.output}")
+    elif args.output:
         with open(args.output, "w", encoding="utf-8") as fh:
-            fh.write(json_str)
+            write_events(events, fh, pretty=not args.compact)
         print(f"Wrote {len(events)} events to {args.output}")
     else:
-        for event in events:
-            start_dt = event.dates.start
-            date_str = start_dt.strftime("%B %d, %Y") if start_dt else "Unknown Date"
-            print(f"{date_str} - {event.title}")
-            print(event.location.practice_center or "")
-            print(event.link or "")
-            print(f"Source: {event.other.get('source', '')}")
-            print()
+        print_events(events)
+
+    if args.profile:
+        print(registry.report(), file=sys.stderr)
+    if args.metrics_file:
+        registry.write(args.metrics_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from crawler import Parser
+from metrics import run_measured, unwrap
+from models import RetreatEvent
+
+logger = logging.getLogger(__name__)
+
+# Downloaded pages waiting to be parsed; fetchers block once it is full
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class _Failed:
+    """Carries an exception from the fetch thread to the consumer."""
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def default_processes() -> int:
+    return os.cpu_count() or 1
+
+
+def parse_pool(processes: Optional[int] = None) -> ProcessPoolExecutor:
+    """A process pool for page parsers.
+
+    Workers use the same BeautifulSoup backend as this process, including
+    one chosen with :func:`html_parsing.set_backend`.  They are started by a
+    fork server (spawned where there is none), not forked: the crawl's
+    threads may hold locks at fork time, and a fresh worker does not carry
+    a copy of the parent's memory.
+    """
+    from html_parsing import get_backend, set_backend
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=processes or default_processes(),
+        mp_context=multiprocessing.get_context(method),
+        initializer=set_backend,
+        initargs=(get_backend(),),
+    )
+
+
+def _put(pages: "queue.Queue", item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _fetch(source: Iterable[Tuple[str, str]], pages: "queue.Queue", stop: threading.Event) -> None:
+    try:
+        for item in source:
+            if not _put(pages, item, stop):
+                break
+        else:
+            _put(pages, _DONE, stop)
+    except BaseException as exc:  # noqa: BLE001 - re-raised by the consumer
+        _put(pages, _Failed(exc), stop)
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+
+def parse_pages(
+    source: Iterable[Tuple[str, str]],
+    parser: Parser,
+    executor: Executor,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> Iterator[List[RetreatEvent]]:
+    """Parse downloaded pages in ``executor`` while later pages download.
+
+    ``source`` yields ``(html, request_url)`` pairs, e.g.
+    :func:`crawler.iter_pages`; a background thread drains it into a queue
+    of at most ``queue_size`` pages, so downloads pause when parsing falls
+    behind.  ``parser`` must be picklable to run in a process pool.  The
+    events of each page are yielded in page order.  Errors from either
+    stage are raised here.
+    """
+    pages: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    fetcher = threading.Thread(target=_fetch, args=(source, pages, stop), name="page-fetcher", daemon=True)
+    fetcher.start()
+    parsing: Deque[Future] = deque()
+    try:
+        while True:
+            while parsing and (parsing[0].done() or len(parsing) >= queue_size):
+                yield unwrap(parsing.popleft().result())
+            try:
+                # Wake up now and then to hand over pages parsed meanwhile
+                item = pages.get(timeout=0.05 if parsing else None)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, _Failed):
+                raise item.exc
+            html, request_url = item
+            parsing.append(executor.submit(run_measured, parser, html, request_url))
+        while parsing:
+            yield unwrap(parsing.popleft().result())
+    finally:
+        stop.set()
+        for future in parsing:
+            future.cancel()
+        fetcher.join()
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+import threading
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Total number of worker threads used for detail-page enrichment
+DEFAULT_WORKERS = 8
+# Maximum number of concurrent requests sent to a single host
+DEFAULT_PER_HOST = 4
+
+
+def host_of(url: str) -> str:
+    """Return the lower-cased network location of ``url``."""
+    return urlsplit(url or "").netloc.lower()
+
+
+def imap_bounded(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = DEFAULT_WORKERS,
+    per_host: Optional[int] = DEFAULT_PER_HOST,
+    key: Optional[Callable[[T], str]] = None,
+) -> Iterator[Tuple[T, R]]:
+    """Apply ``func`` to ``items`` through a bounded thread pool.
+
+    Yields ``(item, result)`` pairs as the calls complete.  ``key`` maps an
+    item to the host it talks to; at most ``per_host`` calls for the same
+    host run at once.  Exceptions raised by ``func`` propagate to the caller.
+    With ``workers <= 1`` the calls run inline, in order.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    limits: Dict[str, threading.BoundedSemaphore] = {}
+    limits_lock = threading.Lock()
+
+    def run(item: T) -> R:
+        if not per_host or key is None:
+            return func(item)
+        host = key(item)
+        with limits_lock:
+            sem = limits.setdefault(host, threading.BoundedSemaphore(per_host))
+        with sem:
+            return func(item)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        futures = {executor.submit(run, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
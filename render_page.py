@@ -1,17 +1,247 @@
-import json
-from jinja2 import Environment, FileSystemLoader
+"""Render the retreat page from the events written by parse_retreat_events.py.
 
-# Load the events produced by parse_retreat_events.py --output events.json
-with open("events.json", "r", encoding="utf-8") as f:
-    retreat_data = json.load(f)
-    centers = sorted({r.get('location', {}).get('practice_center', '') for r in retreat_data if r.get('location', {}).get('practice_center')})
+Events are split into one HTML fragment per practice center and month under
+``shards/``, and ``index.html`` lists those shards.  Filtering and keyword
+search run against ``search-index.json`` (see :func:`build_search_index`),
+so the page downloads a shard only when it scrolls into view and shows
+only its matching cards.  Every file is streamed from its template straight
+to disk::
 
-env = Environment(loader=FileSystemLoader("."))
-template = env.get_template("template.html")
+    python render_page.py --input events.json --output-dir site
 
-# Render the HTML and save to a file
-html_output = template.render(retreats=retreat_data, centers=centers)
-with open("retreats.html", "w", encoding="utf-8") as f:
-    f.write(html_output)
+Browsers do not fetch shards from ``file://`` URLs; serve the directory,
+e.g. with ``python -m http.server -d site``.
+"""
 
-print("Wrote retreats.html")
+import argparse
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from event_store import EventStore, sqlite_path
+from serialization import dumps, load_records
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARD_DIR = "shards"
+UNDATED = "undated"
+NO_CENTER = "Other"
+SEARCH_INDEX = "search-index.json"
+
+# Words indexed for keyword search; the page tokenizes queries the same way
+TOKEN_RE = re.compile(r"[^\W_]+")
+MIN_TOKEN_LENGTH = 2
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our the this to we with you your".split()
+)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "other"
+
+
+def shard_key(record: Dict) -> Tuple[str, str]:
+    """The ``(center, month)`` shard an event belongs to."""
+    center = (record.get("location") or {}).get("practice_center") or NO_CENTER
+    start = (record.get("dates") or {}).get("start") or ""
+    return center, start[:7] if len(start) >= 7 else UNDATED
+
+
+def month_label(month: str) -> str:
+    if month == UNDATED:
+        return "Date to be announced"
+    return datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+
+
+def group_shards(records: Iterable[Dict]) -> List[Dict]:
+    """Group events into shards ordered by month, then center.
+
+    Each shard lists its events by start date.  Undated events come last.
+    """
+    groups: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+    for record in records:
+        groups[shard_key(record)].append(record)
+
+    def order(key):
+        center, month = key
+        return (month == UNDATED, month, center)
+
+    shards = []
+    for center, month in sorted(groups, key=order):
+        events = sorted(
+            groups[(center, month)],
+            key=lambda r: ((r.get("dates") or {}).get("start") or "", r.get("title") or ""),
+        )
+        shards.append(
+            {
+                "center": center,
+                "month": month,
+                "label": month_label(month),
+                "path": f"{SHARD_DIR}/{slugify(center)}/{month}.html",
+                "count": len(events),
+                "retreats": events,
+            }
+        )
+    return shards
+
+
+def tokens(text: str) -> Set[str]:
+    """Lower-cased words of ``text`` with accents removed."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return {
+        word
+        for word in TOKEN_RE.findall(folded)
+        if len(word) >= MIN_TOKEN_LENGTH and word not in STOPWORDS
+    }
+
+
+def epoch_day(value: Optional[str]) -> Optional[int]:
+    """Days since 1970-01-01 for an ISO date or datetime string."""
+    if not value:
+        return None
+    return date.fromisoformat(value[:10]).toordinal() - EPOCH_ORDINAL
+
+
+def build_search_index(shards: List[Dict]) -> Dict:
+    """Build the index the page filters and searches with.
+
+    Events are numbered in shard order, so each shard holds the ids
+    ``first`` to ``first + count - 1``; ``first`` is set on every shard.
+    Alongside per-event center ids and start/end days, the index has the
+    dated event ids sorted by start day (``byStart``, with the days in
+    ``startSorted``).  ``terms`` is a sorted word list, and ``postings`` holds
+    the ids of the events containing each word in the title, teachers or
+    description.  The page drops query words the index leaves out, using
+    ``minLength`` and ``stopwords``.
+    """
+    centers = sorted({shard["center"] for shard in shards})
+    center_ids = {name: i for i, name in enumerate(centers)}
+    center: List[int] = []
+    start: List[Optional[int]] = []
+    end: List[Optional[int]] = []
+    postings: Dict[str, List[int]] = defaultdict(list)
+
+    event_id = 0
+    for shard in shards:
+        shard["first"] = event_id
+        for record in shard["retreats"]:
+            dates = record.get("dates") or {}
+            center.append(center_ids[shard["center"]])
+            start.append(epoch_day(dates.get("start")))
+            end.append(epoch_day(dates.get("end")))
+            text = " ".join(
+                [record.get("title") or "", record.get("description") or ""]
+                + list(record.get("teachers") or [])
+            )
+            for word in tokens(text):
+                postings[word].append(event_id)
+            event_id += 1
+
+    by_start = sorted((i for i in range(event_id) if start[i] is not None), key=start.__getitem__)
+    terms = sorted(postings)
+    return {
+        "count": event_id,
+        "minLength": MIN_TOKEN_LENGTH,
+        "stopwords": sorted(STOPWORDS),
+        "centers": centers,
+        "center": center,
+        "start": start,
+        "end": end,
+        "byStart": by_start,
+        "startSorted": [start[i] for i in by_start],
+        "terms": terms,
+        "postings": [postings[term] for term in terms],
+    }
+
+
+def make_environment() -> "Environment":
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+    )
+
+
+def render_site(records: Iterable[Dict], output_dir: str) -> List[Dict]:
+    """Write ``index.html``, the search index and one fragment per shard.
+
+    Returns the shards without their events.
+    """
+    env = make_environment()
+    shard_template = env.get_template("shard.html")
+    shards = group_shards(records)
+    index = build_search_index(shards)
+
+    for shard in shards:
+        path = os.path.join(output_dir, *shard["path"].split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            shard_template.stream(retreats=shard.pop("retreats"), first=shard["first"]).dump(fh)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, SEARCH_INDEX), "w", encoding="utf-8") as fh:
+        fh.write(dumps(index))
+
+    centers = sorted({shard["center"] for shard in shards})
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as fh:
+        env.get_template("template.html").stream(shards=shards, centers=centers).dump(fh)
+    return shards
+
+
+def overlaps(record: Dict, start: Optional[date], end: Optional[date]) -> bool:
+    """Whether a record's dates overlap ``start``..``end``, like ``EventStore.records``."""
+    dates = record.get("dates") or {}
+    first = (dates.get("start") or "")[:10]
+    last = (dates.get("end") or first)[:10]
+    if not first:
+        return False
+    if start is not None and last < start.isoformat():
+        return False
+    return end is None or first <= end.isoformat()
+
+
+def read_records(spec: str, start: Optional[date] = None, end: Optional[date] = None) -> Iterable[Dict]:
+    """Event records from a JSON file or a ``sqlite:`` store, limited to a date range.
+
+    A store answers the range with an indexed query; a file is read whole and
+    filtered.
+    """
+    path = sqlite_path(spec)
+    if path:
+        with EventStore(path, readonly=True) as store:
+            return list(store.records(start, end))
+    records = load_records(spec)
+    if start is None and end is None:
+        return records
+    return [r for r in records if overlaps(r, start, end)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render the retreat page")
+    parser.add_argument(
+        "--input",
+        default="events.json",
+        help="Events written by parse_retreat_events.py (.json, .jsonl or sqlite:PATH)",
+    )
+    parser.add_argument("--output-dir", default="site", help="Directory for the rendered page")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat,
+                        help="Only render events still running on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat,
+                        help="Only render events starting on or before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    records = read_records(args.input, args.date_from, args.date_to)
+    shards = render_site(records, args.output_dir)
+    print(f"Wrote {len(shards)} shards, {SEARCH_INDEX} and index.html to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+from datetime import date, datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+from metrics import registry
+from models import RetreatDates, RetreatEvent, locations
+
+try:  # orjson is optional but encodes and decodes several times faster
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def format_datetime(value: Optional[date]) -> Optional[str]:
+    """ISO 8601 text for ``value``, to the second (``2025-06-29T09:00:00``)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value.isoformat()
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Inverse of :func:`format_datetime`; also reads the older ``str()`` form."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def event_to_dict(event: RetreatEvent) -> Dict:
+    """Plain JSON-ready dict for ``event``.
+
+    Unlike :func:`dataclasses.asdict` nothing is deep-copied: the teacher list
+    and ``other`` are shared with the event.
+    """
+    location = event.location
+    return {
+        "title": event.title,
+        "dates": {
+            "start": format_datetime(event.dates.start),
+            "end": format_datetime(event.dates.end),
+        },
+        "teachers": event.teachers,
+        "location": {
+            "practice_center": location.practice_center,
+            "city": location.city,
+            "region": location.region,
+            "country": location.country,
+        },
+        "description": event.description,
+        "link": event.link,
+        "other": event.other,
+    }
+
+
+def dict_to_event(record: Dict) -> RetreatEvent:
+    """Rebuild a :class:`RetreatEvent` from :func:`event_to_dict` output."""
+    dates = record.get("dates") or {}
+    location = record.get("location") or {}
+    return RetreatEvent(
+        title=record.get("title", ""),
+        dates=RetreatDates(
+            start=parse_datetime(dates.get("start")),
+            end=parse_datetime(dates.get("end")),
+        ),
+        teachers=list(record.get("teachers") or []),
+        location=locations.location(
+            location.get("practice_center"),
+            location.get("city"),
+            location.get("region"),
+            location.get("country"),
+        ),
+        description=record.get("description", ""),
+        link=record.get("link", ""),
+        other=dict(record.get("other") or {}),
+    )
+
+
+def dumps(obj, pretty: bool = False) -> str:
+    """Encode ``obj``, with orjson when it is installed.
+
+    Both encoders write UTF-8 text unescaped and use two-space indentation
+    in pretty mode.  They agree on event records, whose keys are strings
+    and whose values are strings, small numbers, booleans and None.  They
+    do not agree in general: orjson writes ``1e16`` where :mod:`json`
+    writes ``1e+16``, and it rejects non-string keys and integers beyond
+    64 bits.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, default=str, ensure_ascii=False, indent=2)
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps_event(event: RetreatEvent, pretty: bool = False) -> str:
+    return dumps(event_to_dict(event), pretty)
+
+
+@registry.timed("serialization.write_events", events=int)
+def write_events(events: Iterable[RetreatEvent], fh: IO[str], pretty: bool = True) -> int:
+    """Write ``events`` to ``fh`` as a JSON array, one event at a time.
+
+    Only one encoded event is held in memory at once. Returns the number of
+    events written.
+    """
+    count = 0
+    fh.write("[")
+    for event in events:
+        text = dumps_event(event, pretty)
+        if pretty:
+            fh.write(",\n  " if count else "\n  ")
+            text = text.replace("\n", "\n  ")
+        elif count:
+            fh.write(",")
+        fh.write(text)
+        count += 1
+    fh.write("\n]" if pretty and count else "]")
+    return count
+
+
+def write_jsonl(events: Iterable[RetreatEvent], fh: IO[str]) -> int:
+    """Write each event to ``fh`` as one JSON line as soon as it is produced.
+
+    Returns the number of events written.
+    """
+    count = 0
+    for event in events:
+        fh.write(dumps_event(event))
+        fh.write("\n")
+        fh.flush()
+        count += 1
+    return count
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Yield the event dicts stored in a JSON or JSON Lines output file."""
+    if path.endswith(".jsonl"):
+        with open(path, "rb") as fh:
+            for line in fh:
+                if line.strip():
+                    yield _loads(line)
+        return
+    with open(path, "rb") as fh:
+        yield from _loads(fh.read())
+
+
+def load_records(path: str) -> List[Dict]:
+    """The event dicts stored in a JSON or JSON Lines output file."""
+    return list(iter_records(path))
+
+
+def load_events(path: str) -> List[RetreatEvent]:
+    """The events stored in a JSON or JSON Lines output file."""
+    return [dict_to_event(record) for record in iter_records(path)]
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,60 +1,124 @@
-from importlib import import_module
-from bs4 import BeautifulSoup
-from datetime import datetime
-import re
-
-from models import RetreatDates
-
-# Import submodules normally
-irc = import_module('sites.irc')
-
-# Preserve original function so we can delegate
-_original_parse_events = irc.parse_events
-
-def _patched_parse_events(html: str, source: str):
-    """Wrap the original parser and ensure teacher names are captured even
-    when no <span> tag is present."""
-    events = _original_parse_events(html, source)
-    try:
-        soup = BeautifulSoup(html, 'html.parser')
-        containers = soup.find_all('div', class_='irc-retreat-listing-div-text')
-        date_re = re.compile(
-            r'([A-Za-z]+)\s+(\d{1,2})(?:,?\s*(\d{4}))?\s*(?:to|[-\u2013])\s*(?:([A-Za-z]+)\s+)?(\d{1,2}),?\s*(\d{4})?'
-        )
-        for evt, cont in zip(events, containers):
-            detail_p = cont.find('p', class_='irc-retreat-listing-p')
-            if not detail_p:
-                continue
-
-            if not getattr(evt, 'teachers', None):
-                links = detail_p.find_all('a', href=True)
-                evt.teachers = [a.get_text(strip=True) for a in links]
-
-            if evt.dates.start is None:
-                br = detail_p.find('br')
-                text = ''
-                if br:
-                    node = br.next_sibling
-                    while node and isinstance(node, str) and not node.strip():
-                        node = node.next_sibling
-                    if node:
-                        text = node if isinstance(node, str) else node.get_text(' ', strip=True)
-                        text = re.split(r'\s+-\s+', text)[0].strip()
-                m = date_re.search(text)
-                if m:
-                    smonth, sday, syear, emonth, eday, eyear = m.groups()
-                    eyear = eyear or syear
-                    syear = syear or eyear
-                    emonth = emonth or smonth
-                    try:
-                        start_dt = datetime.strptime(f"{smonth} {sday} {syear}", "%B %d %Y")
-                        end_dt = datetime.strptime(f"{emonth} {eday} {eyear}", "%B %d %Y")
-                        evt.dates = RetreatDates(start=start_dt, end=end_dt)
-                    except Exception:
-                        pass
-    except Exception:
-        pass  # fail silently; rely on original parsing if anything goes wrong
-    return events
-
-# Replace parse_events with patched version
-irc.parse_events = _patched_parse_events
+"""Registry of supported sites.
+
+Each :class:`Site` names its module and the functions in it that the crawl
+calls.  Modules are imported the first time one of their hooks is used, so
+a run that crawls one site never loads the others or their dependencies.
+"""
+
+import importlib
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+#: Numbered listing pages (``{page}`` in the URL); the count may be discovered with ``inspect``
+PAGED = "paged"
+#: A single listing page
+SINGLE = "single"
+#: The module fetches its own events, e.g. from a search API
+API = "api"
+
+
+@dataclass(frozen=True)
+class Site:
+    """How to crawl one center.
+
+    ``url`` names the module constant holding the listing URL; :data:`API`
+    sites have none.  Hooks are names of functions in ``module``:
+
+    ``parser``
+        ``(html, source)`` for a listing page.  If the site has ``enrich``,
+        the parser also fetches detail pages and accepts ``select`` and the
+        site's options.
+    ``listing_parser``
+        Picklable parser without network access, used when pages are parsed
+        in a process pool.  Defaults to ``parser``.
+    ``enrich``
+        ``(events, parse_pool=None, **options)``; fills in details from
+        other pages after ``listing_parser``.
+    ``inspect``
+        Reads the pager of a listing page, for ``--pages auto``.
+    ``fetch``, ``stream``
+        For :data:`API` sites, return or yield all events; they accept
+        ``select``, ``parse_pool`` (``stream`` only) and the site's options.
+    ``options``
+        ``(args)`` turns parsed command line arguments into the keyword
+        arguments passed to the other hooks.
+    """
+
+    name: str
+    module: str
+    url: Optional[str] = None
+    pagination: str = PAGED
+    parser: Optional[str] = "parse_events"
+    listing_parser: Optional[str] = None
+    enrich: Optional[str] = None
+    inspect: Optional[str] = None
+    fetch: Optional[str] = None
+    stream: Optional[str] = None
+    options: Optional[str] = None
+
+    def load(self) -> ModuleType:
+        """Import the site's module."""
+        return importlib.import_module(self.module)
+
+    def hook(self, name: str) -> Optional[Callable]:
+        """The function named by field ``name``, or None if the site has none."""
+        attr = getattr(self, name)
+        if attr is None:
+            return None
+        # Looked up on every call, so patching the module attribute works
+        return getattr(self.load(), attr)
+
+    def listing_url(self) -> str:
+        """The listing URL defined in the site's module."""
+        if self.url is None:
+            raise ValueError(f"Site {self.name!r} has no listing URL")
+        return getattr(self.load(), self.url)
+
+
+SITES: Dict[str, Site] = {
+    site.name: site
+    for site in (
+        Site(
+            name="sfzc",
+            module="sites.sfzc",
+            url="CALENDAR_URL",
+            pagination=PAGED,
+            listing_parser="parse_listing",
+            enrich="enrich_events",
+            inspect="inspect_page",
+            options="options_from_args",
+        ),
+        Site(
+            name="irc",
+            module="sites.irc",
+            url="RETREATS_URL",
+            pagination=SINGLE,
+        ),
+        Site(
+            name="spiritrock",
+            module="sites.spiritrock",
+            pagination=API,
+            parser=None,
+            fetch="parse_algolia_events",
+            stream="iter_algolia_events",
+            options="options_from_args",
+        ),
+    )
+}
+
+
+def site_names() -> List[str]:
+    return list(SITES)
+
+
+def get_site(name: str) -> Site:
+    """The registered site called ``name``; raises ``KeyError`` for unknown names."""
+    return SITES[name]
+
+
+def selected_sites(name: str) -> List[Site]:
+    """The sites crawled for ``--site name``; ``all`` selects every site."""
+    if name == "all":
+        return list(SITES.values())
+    return [get_site(name)]
@@ -1,21 +1,67 @@
-from bs4 import BeautifulSoup, NavigableString
-from datetime import datetime
-from typing import Dict, List
+from bs4 import NavigableString, SoupStrainer
+from typing import Dict, Iterator, List, Optional
 import logging
 import re
 
-from models import RetreatEvent, RetreatDates, RetreatLocation
+from dates import parse_date_range as parse_range
+from html_parsing import has_class, make_soup
+from metrics import registry
+from models import RetreatEvent, RetreatDates, locations
+from throttle import HostLimit
 
 logger = logging.getLogger(__name__)
 
+RETREATS_URL = "https://www.insightretreatcenter.org/retreats/"
+
+# Request pacing per host; the whole schedule is a single page
+RATE_LIMITS = {"www.insightretreatcenter.org": HostLimit(rate=1.0, burst=2, max_in_flight=2)}
+
+DURATION_SPLIT_RE = re.compile(r'\s+-\s+')
+APPLY_RE = re.compile(r'APPLY\s*ONLINE', re.I)
+REGISTER_RE = re.compile(r'REGISTER', re.I)
+# Only the listing containers are built into the tree
+LISTING_ONLY = SoupStrainer('div', class_=has_class('irc-retreat-listing-div-text'))
+
+
+def parse_date_range(text: str) -> Optional[RetreatDates]:
+    """Parse a date range such as "June 29 – July 13, 2025"."""
+    parsed = parse_range(text)
+    if parsed is None:
+        return None
+    start_dt, end_dt = parsed
+    return RetreatDates(start=start_dt, end=end_dt)
+
+
+def _text_after_first_br(detail_p) -> str:
+    """Text following the first <br>, without the trailing duration."""
+    br = detail_p.find('br')
+    if not br:
+        return ''
+    node = br.next_sibling
+    while node and isinstance(node, str) and not node.strip():
+        node = node.next_sibling
+    if not node:
+        return ''
+    text = node if isinstance(node, str) else node.get_text(' ', strip=True)
+    return DURATION_SPLIT_RE.split(text)[0].strip()
+
+
+@registry.timed("irc.parse_events", events=len, nbytes=lambda html, source: len(html))
 def parse_events(html: str, source: str) -> List[RetreatEvent]:
     """Parse retreats from an IRC HTML page."""
+    events = list(iter_events(html, source))
+    logger.debug("Total events parsed: %d", len(events))
+    return events
+
+
+def iter_events(html: str, source: str) -> Iterator[RetreatEvent]:
+    """Yield retreats from an IRC HTML page as each listing is parsed."""
     logger.debug("Starting IRC parsing")
-    soup = BeautifulSoup(html, 'html.parser')
-    events: List[RetreatEvent] = []
+    soup = make_soup(html, LISTING_ONLY)
 
     for container in soup.find_all('div', class_='irc-retreat-listing-div-text'):
-        logger.debug("New retreat container: %s", container.get_text(strip=True)[:60])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("New retreat container: %s", container.get_text(strip=True)[:60])
         paras = container.find_all('p', class_='irc-retreat-listing-p')
         if len(paras) < 2:
             continue
@@ -35,36 +81,25 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
         if span:
             teachers = [a.get_text(strip=True) for a in span.find_all('a', href=True)]
             br_after_teachers = span.find_next('br')
+        if not teachers:
+            # Some listings link the teachers directly without a <span>
+            teachers = [a.get_text(strip=True) for a in detail_p.find_all('a', href=True)]
         logger.debug("Teachers parsed: %s", teachers)
 
-        # Raw date text is right after the first <br>
-        dates = ''
+        # Raw date text is right after the <br> that follows the teachers
         dates_text = ''
         br = br_after_teachers
         if br:
             for el in br.next_elements:
-                #logger.debug("next element: %s", el)
                 if isinstance(el, NavigableString) and el.strip():
                     dates_text = el.strip()
                     break
         logger.debug("Dates text: %s", dates_text)
-        
-        # Parse date range, e.g. "June 1 to 8, 2025" or "October 31 – November 15, 2025"
-        m = re.search(
-            r'([A-Za-z]+)\s+(\d{1,2})(?:,?\s*(\d{4}))?\s*(?:to|[-\u2013])\s*(?:([A-Za-z]+)\s+)?(\d{1,2}),?\s*(\d{4})?',
-            dates_text,
-        )
-        if m:
-            smonth, sday, syear, emonth, eday, eyear = m.groups()
-            eyear = eyear or syear
-            syear = syear or eyear
-            emonth = emonth or smonth
-            start_dt = datetime.strptime(f"{smonth} {sday} {syear}", "%B %d %Y")
-            end_dt = datetime.strptime(f"{emonth} {eday} {eyear}", "%B %d %Y")
-            dates = RetreatDates(start=start_dt, end=end_dt)
-        else:
+
+        dates = parse_date_range(dates_text) or parse_date_range(_text_after_first_br(detail_p))
+        if dates is None:
             # fallback to None if parse fails
-            dates = RetreatDates(start=None, end=None)  # type: ignore
+            dates = RetreatDates(start=None, end=None)
         logger.debug("Parsed dates: %s", dates)
 
         # Description
@@ -74,11 +109,11 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
         # Registration link: prefer an "APPLY ONLINE" link if present
         link = ''
         ul = container.find('ul')
-        apply_link = container.find('a', string=re.compile(r'APPLY\s*ONLINE', re.I))
+        apply_link = container.find('a', string=APPLY_RE)
         if apply_link and apply_link.has_attr('href'):
             link = apply_link['href']
         elif ul:
-            reg = ul.find('a', string=re.compile(r'REGISTER', re.I))
+            reg = ul.find('a', string=REGISTER_RE)
             if reg and reg.has_attr('href'):
                 link = reg['href']
         logger.debug("Registration link: %s", link)
@@ -90,35 +125,22 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
                 lbl = li.find('strong')
                 if not lbl:
                     continue
-                key = lbl.get_text(strip=True).rstrip(':')
+                key = locations.text(lbl.get_text(strip=True).rstrip(':'))
                 val = li.get_text(' ', strip=True)
                 val = re.sub(r'^' + re.escape(key) + r':\s*', '', val)
                 other[key] = val
         logger.debug("Other fields: %s", other)
 
-        # Location fields (if present in other, under key "Location")
-        loc = RetreatLocation()
-        if 'Location' in other:
-            parts = [p.strip() for p in other.pop('Location').split(',')]
-            if parts:
-                loc.practice_center = parts[0]
-            if len(parts) > 1:
-                loc.city = parts[1]
-            if len(parts) > 2:
-                loc.region = parts[2]
-            if len(parts) > 3:
-                loc.country = parts[3]
-
-        # Override with known Insight Retreat Center location details
-        loc.practice_center = "Insight Retreat Center"
-        loc.city = "Santa Cruz"
-        loc.region = "CA"
-        loc.country = "USA"
+        # The known Insight Retreat Center details replace the listing's own
+        # "Location" field
+        other.pop('Location', None)
+        loc = locations.location("Insight Retreat Center", "Santa Cruz", "CA", "USA")
         other["address"] = "1906 Glen Canyon Rd, Santa Cruz, CA 95060"
 
         logger.debug("Location: %s", loc)
 
-        events.append(RetreatEvent(
+        logger.debug("Added event: %s", title)
+        yield RetreatEvent(
             title=title,
             dates=dates,
             teachers=teachers,
@@ -126,11 +148,7 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
             description=description,
             link=link,
             other={"source": source, **other}
-        ))
-        logger.debug("Added event: %s", title)
-
-    logger.debug("Total events parsed: %d", len(events))
-    return events
+        )
 
 
 def parse_retreats(html_path: str) -> List[RetreatEvent]:
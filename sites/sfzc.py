@@ -1,38 +1,89 @@
-from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
 import logging
 
-from bs4 import BeautifulSoup
-import requests
+from bs4 import SoupStrainer
 import re
 
-from models import RetreatEvent, RetreatDates, RetreatLocation
+import http_client
+from crawler import PageInfo
+from dates import at_center, parse_clock, parse_day
+from html_parsing import AnyOf, has_class, make_soup
+from metrics import registry, run_measured, unwrap
+from models import RetreatEvent, RetreatDates, locations
+from pool import DEFAULT_PER_HOST, DEFAULT_WORKERS, host_of, imap_bounded
+from throttle import HostLimit
 
 logger = logging.getLogger(__name__)
 
 # Base calendar URL for regular page requests
 CALENDAR_URL = "https://www.sfzc.org/calendar?page={page}"
-# Default headers for requests to event detail pages
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/114.0.0.0 Safari/537.36"
+# Seconds cached detail pages are reused before being revalidated
+CACHE_TTLS = {"www.sfzc.org": 6 * 3600}
+# Request pacing per host; see throttle.HostScheduler
+RATE_LIMITS = {"www.sfzc.org": HostLimit(rate=5.0, burst=5, max_in_flight=DEFAULT_PER_HOST)}
+
+# Parts of the pages the parsers read; nothing else is built into the tree
+LISTING_ONLY = SoupStrainer("table", class_=has_class("views-table"))
+PAGER_ONLY = SoupStrainer("ul", class_=has_class("pager"))
+DETAIL_ONLY = AnyOf(
+    SoupStrainer("meta", property="og:description"),
+    SoupStrainer("meta", attrs={"name": "description"}),
+    SoupStrainer("div", class_=has_class("field--name-body")),
+    SoupStrainer("div", class_=has_class("field--name-field-teachers")),
+)
+
+# Cheap check for an event table, without building a tree
+LISTING_RE = re.compile(r'<table[^>]*class="[^"]*\bviews-table\b')
+
+
+def _page_number(href: str) -> Optional[int]:
+    values = parse_qs(urlsplit(href).query).get("page")
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+def inspect_page(html: str) -> PageInfo:
+    """Read pagination state from a calendar page's pager."""
+    soup = make_soup(html, PAGER_ONLY)
+    last_page = None
+    last_link = soup.select_one("li.pager__item--last a[href]")
+    if last_link:
+        last_page = _page_number(last_link["href"])
+    next_link = soup.select_one("a[rel~=next]") or soup.select_one("li.pager__item--next a[href]")
+    return PageInfo(
+        has_listing=bool(LISTING_RE.search(html)),
+        last_page=last_page,
+        has_next=next_link is not None,
     )
-}
 
 
-def fetch_description(url: str) -> tuple[str, List[str]]:
-    """Fetch description and teacher names from an event detail page."""
+@registry.timed("sfzc.fetch_description")
+def fetch_description(url: str, parse_pool: Optional[Executor] = None) -> Tuple[str, List[str]]:
+    """Fetch description and teacher names from an event detail page.
+
+    With ``parse_pool`` the page is parsed there instead of in this thread.
+    """
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
     except Exception as exc:  # noqa: BLE001
         logger.debug("Failed to fetch %s: %s", url, exc)
         return "", []
+    if parse_pool is not None:
+        return unwrap(parse_pool.submit(run_measured, parse_detail, response.text).result())
+    return parse_detail(response.text)
+
 
-    soup = BeautifulSoup(response.text, "html.parser")
+@registry.timed("sfzc.parse_detail", nbytes=len)
+def parse_detail(html: str) -> Tuple[str, List[str]]:
+    """Extract the description and teacher names from a detail page."""
+    soup = make_soup(html, DETAIL_ONLY)
 
     meta_og = soup.find("meta", property="og:description")
     meta_desc = soup.find("meta", attrs={"name": "description"})
@@ -56,11 +107,63 @@ def fetch_description(url: str) -> tuple[str, List[str]]:
 
     return description, teachers
 
-def parse_events(html: str, source: str) -> List[RetreatEvent]:
-    """Parse retreat events from SFZC HTML snippet and return dataclasses."""
+
+def enrich_events(
+    events: List[RetreatEvent],
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    parse_pool: Optional[Executor] = None,
+) -> List[RetreatEvent]:
+    """Fill ``description`` and ``teachers`` from each event's detail page.
+
+    Detail pages are fetched through a bounded worker pool and the events are
+    updated in place as the responses arrive, so their order is unchanged.
+    ``parse_pool`` parses the pages, e.g. in other processes.
+    """
+    targets = [event for event in events if event.link]
+    logger.debug("Fetching %d detail pages with %d workers", len(targets), workers)
+    fetch = fetch_description if parse_pool is None else partial(fetch_description, parse_pool=parse_pool)
+    results = imap_bounded(
+        lambda event: fetch(event.link),
+        targets,
+        workers=workers,
+        per_host=per_host,
+        key=lambda event: host_of(event.link),
+    )
+    for event, (description, teachers) in results:
+        event.description = description
+        event.teachers = teachers
+    return events
+
+
+@registry.timed("sfzc.parse_events", events=len)
+def parse_events(
+    html: str,
+    source: str,
+    workers: int = DEFAULT_WORKERS,
+    select: Optional[Callable[[List[RetreatEvent]], List[RetreatEvent]]] = None,
+) -> List[RetreatEvent]:
+    """Parse retreat events from SFZC HTML and enrich them from detail pages.
+
+    ``select`` narrows the events whose detail pages are fetched.
+    """
+    events = parse_listing(html, source)
+    enrich_events(select(events) if select else events, workers=workers)
+    return events
+
+
+@registry.timed("sfzc.parse_listing", events=len, nbytes=lambda html, source: len(html))
+def parse_listing(html: str, source: str) -> List[RetreatEvent]:
+    """Parse retreat events from SFZC HTML snippet without fetching details."""
+    events = list(iter_listing(html, source))
+    logger.debug("Parsed %d retreat events from %s", len(events), source)
+    return events
+
+
+def iter_listing(html: str, source: str) -> Iterator[RetreatEvent]:
+    """Yield retreat events from SFZC HTML as each row is parsed."""
     logger.debug("Parsing HTML from %s", source)
-    soup = BeautifulSoup(html, "html.parser")
-    events: List[RetreatEvent] = []
+    soup = make_soup(html, LISTING_ONLY)
 
     tables = soup.select("table.views-table")
     logger.debug("Found %d event tables", len(tables))
@@ -71,9 +174,8 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
             logger.debug("Skipping table without caption")
             continue
         date_str = cap.get_text(strip=True)
-        try:
-            event_day = datetime.strptime(date_str, "%A, %b %d, %Y").date()
-        except ValueError:
+        event_day = parse_day(date_str)
+        if event_day is None:
             logger.debug("Could not parse date '%s'", date_str)
             continue
 
@@ -84,35 +186,27 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
                 continue
 
             time_str = cols[0].get_text(strip=True)
-            try:
-                t = datetime.strptime(time_str, "%I:%M %p").time()
-            except ValueError:
-                t = None
-            start_dt = datetime.combine(event_day, t) if t else None
+            t = parse_clock(time_str)
+            start_dt = at_center(event_day, t) if t else None
             dates = RetreatDates(start=start_dt)
 
             loc_name = cols[1].get_text(strip=True)
-            location = RetreatLocation(practice_center=loc_name)
+            city = region = country = None
             other: Dict[str, str] = {"source": source}
 
             name_lower = loc_name.lower()
             if "city center" in name_lower:
-                location.city = "San Francisco"
-                location.region = "CA"
-                location.country = "USA"
+                city, region, country = "San Francisco", "CA", "USA"
                 other["address"] = "300 Page St, San Francisco, CA 94102"
             elif "green gulch" in name_lower:
-                location.city = "Muir Beach"
-                location.region = "CA"
-                location.country = "USA"
+                city, region, country = "Muir Beach", "CA", "USA"
                 other["address"] = "1601 Shoreline Hwy, Muir Beach, CA 94965"
             elif "tassajara" in name_lower:
-                location.city = "Carmel Valley"
-                location.region = "CA"
-                location.country = "USA"
+                city, region, country = "Carmel Valley", "CA", "USA"
                 other["address"] = (
                     "39171 Tassajara Road Carmel Valley, CA 93924 Jamesburg"
                 )
+            location = locations.location(loc_name, city, region, country)
 
             link_tag = cols[2].find("a")
             title_raw = (
@@ -130,25 +224,20 @@ def parse_events(html: str, source: str) -> List[RetreatEvent]:
                 logger.debug("Skipping non-retreat event: %s", title)
                 continue
 
-            if link:
-                description, teachers = fetch_description(link)
-            else:
-                description, teachers = "", []
-
-            events.append(
-                RetreatEvent(
-                    title=title,
-                    dates=dates,
-                    teachers=teachers,
-                    location=location,
-                    description=description,
-                    link=link,
-                    other=other,
-                )
+            yield RetreatEvent(
+                title=title,
+                dates=dates,
+                teachers=[],
+                location=location,
+                description="",
+                link=link,
+                other=other,
             )
 
-    logger.debug("Parsed %d retreat events from %s", len(events), source)
-    return events
+
+def options_from_args(args) -> Dict:
+    """Keyword arguments for this site's hooks from the command line."""
+    return {"workers": args.sfzc_workers}
 
 
 def parse_calendar(html_path: str) -> List[RetreatEvent]:
@@ -1,11 +1,20 @@
+import json
 import logging
-from bs4 import BeautifulSoup
-from datetime import datetime
-from typing import Dict, List, Optional
-import requests
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urlencode
 import re
 
-from models import RetreatEvent, RetreatDates, RetreatLocation
+import http_client
+from dates import from_timestamp, to_timestamp
+from html_parsing import make_soup
+from metrics import registry, run_measured, unwrap
+from models import RetreatEvent, RetreatDates, locations
+from pool import host_of, imap_bounded
+from throttle import HostLimit
 
 ALGOLIA_URL = "https://e6yg7cmgyo-dsn.algolia.net/1/indexes/events/query"
 ALGOLIA_HEADERS = {
@@ -14,36 +23,210 @@ ALGOLIA_HEADERS = {
     "X-Algolia-Agent": "Algolia for JavaScript (4.24.0); Browser (lite)",
 }
 
-# Separate headers for fetching event detail pages
-DETAIL_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/114.0.0.0 Safari/537.36"
-    )
+# Algolia result page size and how many result pages are fetched at once
+HITS_PER_PAGE = 100
+ALGOLIA_WORKERS = 4
+
+# Seconds cached detail pages are reused before being revalidated
+CACHE_TTLS = {"www.spiritrock.org": 6 * 3600}
+
+# Concurrency used when fetching event detail pages
+DETAIL_WORKERS = 16
+DETAIL_PER_HOST = 8
+
+# Request pacing per host; see throttle.HostScheduler
+RATE_LIMITS = {
+    "www.spiritrock.org": HostLimit(rate=8.0, burst=8, max_in_flight=DETAIL_PER_HOST),
+    "e6yg7cmgyo-dsn.algolia.net": HostLimit(rate=10.0, burst=ALGOLIA_WORKERS, max_in_flight=ALGOLIA_WORKERS),
 }
 
+# Program types requested from Algolia by default; the label on every card
+# of the site's retreat listing (tests/spiritrock.html)
+RETREAT_PROGRAM_TYPES = ("Retreat",)
+# Hit attributes read by hit_to_event; nothing else is downloaded
+HIT_ATTRIBUTES = (
+    "title",
+    "url",
+    "startDate",
+    "endDate",
+    "eventTeachers",
+    "teacherNames",
+    "eventCode",
+    "programTypeName",
+    "duration",
+    "creditCount",
+    "postDateString",
+)
+# ``other`` keys filled from hit attributes
+OTHER_FIELDS = (
+    ("eventCode", "eventCode"),
+    ("programType", "programTypeName"),
+    ("duration", "duration"),
+    ("credits", "creditCount"),
+    ("postDateString", "postDateString"),
+)
+# Hit attributes that are not copied into ``other``
+USED_HIT_KEYS = frozenset(
+    ("objectID", "title", "url", "startDate", "endDate", "eventTeachers", "teacherNames",
+     "shortDescription", "displayLocation", "location")
+    + tuple(raw for _, raw in OTHER_FIELDS)
+)
+
+
+@dataclass
+class AlgoliaQuery:
+    """Filters and attribute projection pushed down to the Algolia index.
+
+    ``program_types`` and the start date bounds become Algolia ``filters``;
+    empty or ``None`` values disable the corresponding filter.  The date
+    bounds are numeric comparisons, which Algolia never matches against
+    string attributes.  The hits seen so far carry ``startDate`` as an ISO
+    string, so the bounds are off unless set explicitly.
+    """
+
+    program_types: Sequence[str] = RETREAT_PROGRAM_TYPES
+    start_from: Optional[date] = None
+    start_until: Optional[date] = None
+    attributes: Optional[Sequence[str]] = HIT_ATTRIBUTES
+
+    def filters(self) -> str:
+        clauses: List[str] = []
+        if self.program_types:
+            types = " OR ".join(f'programTypeName:"{t}"' for t in self.program_types)
+            clauses.append(f"({types})" if len(self.program_types) > 1 else types)
+        if self.start_from is not None:
+            clauses.append(f"startDate >= {to_timestamp(self.start_from)}")
+        if self.start_until is not None:
+            clauses.append(f"startDate <= {to_timestamp(self.start_until)}")
+        return " AND ".join(clauses)
+
+    def params(self, page: int, hits_per_page: int) -> str:
+        """Encode the query as an Algolia ``params`` string."""
+        values: Dict[str, str] = {"page": str(page), "hitsPerPage": str(hits_per_page)}
+        filters = self.filters()
+        if filters:
+            values["filters"] = filters
+        if self.attributes:
+            values["attributesToRetrieve"] = json.dumps(list(self.attributes))
+            values["attributesToHighlight"] = "[]"
+        return urlencode(values)
+
+
 # — helper to strip out HTML from the description —
 def strip_html(html: str) -> str:
-    return BeautifulSoup(html or "", "html.parser").get_text(separator=" ", strip=True)
+    return make_soup(html or "").get_text(separator=" ", strip=True)
 
-def fetch_algolia_page(page: int = 0, hits_per_page: int = 100) -> List[dict]:
-    """Return a single page of results from the Spirit Rock Algolia index."""
-    payload = {"params": f"page={page}&hitsPerPage={hits_per_page}"}
-    resp = requests.post(ALGOLIA_URL, json=payload, headers=ALGOLIA_HEADERS)
+def _hit_count(response: dict) -> int:
+    return len(response.get("hits", []))
+
+
+# Timed here rather than in fetch_algolia_page, so the first page counts too
+@registry.timed("spiritrock.fetch_algolia_page", events=_hit_count)
+def fetch_algolia_response(
+    page: int = 0,
+    hits_per_page: Optional[int] = None,
+    query: Optional[AlgoliaQuery] = None,
+    url: Optional[str] = None,
+) -> dict:
+    """Return the full Algolia response (hits plus ``nbHits``/``nbPages``).
+
+    ``query`` defaults to upcoming retreats; ``url`` overrides
+    :data:`ALGOLIA_URL`.
+    """
+    query = AlgoliaQuery() if query is None else query
+    payload = {"params": query.params(page, hits_per_page or HITS_PER_PAGE)}
+    resp = http_client.post(url or ALGOLIA_URL, json=payload, profile="json", headers=ALGOLIA_HEADERS)
     resp.raise_for_status()
-    return resp.json().get("hits", [])
+    return resp.json()
+
+
+def fetch_algolia_page(
+    page: int = 0,
+    hits_per_page: Optional[int] = None,
+    query: Optional[AlgoliaQuery] = None,
+    url: Optional[str] = None,
+) -> List[dict]:
+    """Return a single page of results from the Spirit Rock Algolia index."""
+    return fetch_algolia_response(page, hits_per_page, query=query, url=url).get("hits", [])
+
+
+def iter_algolia_pages(
+    max_pages: int = 10,
+    query: Optional[AlgoliaQuery] = None,
+    workers: int = ALGOLIA_WORKERS,
+) -> Iterator[List[dict]]:
+    """Yield the hits of each Algolia result page, in page order.
+
+    The first response's ``nbPages`` decides how many pages exist (capped at
+    ``max_pages``); the remaining pages are then fetched concurrently.  If
+    the response carries no ``nbPages``, pages are requested one at a time
+    until an empty one comes back.
+    """
+    if max_pages <= 0:
+        return
+    first = fetch_algolia_response(0, query=query)
+    hits = first.get("hits", [])
+    if not hits:
+        filters = (AlgoliaQuery() if query is None else query).filters()
+        if filters:
+            # A facet value Algolia does not know matches nothing instead of failing
+            logging.warning("Algolia returned no Spirit Rock events for filters %s", filters)
+        return
+    yield hits
+
+    nb_pages = first.get("nbPages")
+    if nb_pages is None:
+        for page in range(1, max_pages):
+            hits = fetch_algolia_page(page, query=query)
+            if not hits:
+                break
+            yield hits
+        return
+
+    last = min(int(nb_pages), max_pages)
+    logging.info(
+        "Algolia reports %s hits on %s pages; fetching %d",
+        first.get("nbHits", "?"),
+        nb_pages,
+        last,
+    )
+    if last <= 1:
+        return
+    with ThreadPoolExecutor(max_workers=min(workers, last - 1)) as executor:
+        for hits in executor.map(lambda page: fetch_algolia_page(page, query=query), range(1, last)):
+            if hits:
+                yield hits
 
 
 def fetch_description(url: str) -> str:
-    """Fetch the full description from an event detail page."""
+    """Fetch the full description from an event detail page.
+
+    Returns an empty string if the page cannot be downloaded.
+    """
     try:
-        resp = requests.get(url, headers=DETAIL_HEADERS, timeout=10)
-        resp.raise_for_status()
+        return load_description(url)
     except Exception:
         return ""
+
+
+@registry.timed("spiritrock.load_description")
+def load_description(url: str, parse_pool: Optional[Executor] = None) -> str:
+    """Like :func:`fetch_description` but raise if the download fails.
+
+    With ``parse_pool`` the page is parsed there instead of in this thread.
+    """
+    resp = http_client.get(url)
+    resp.raise_for_status()
     logging.debug("Fetching description from %s", url)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    if parse_pool is not None:
+        return unwrap(parse_pool.submit(run_measured, parse_description, resp.text).result())
+    return parse_description(resp.text)
+
+
+@registry.timed("spiritrock.parse_description", nbytes=len)
+def parse_description(html: str) -> str:
+    """Extract the program description from a detail page."""
+    soup = make_soup(html)
 
     # Look for a header element mentioning "description" and collect the text
     # from the elements that follow until the next header. This mirrors the
@@ -82,101 +265,157 @@ def fetch_description(url: str) -> str:
 
     return ""
 
-def parse_algolia_events(max_pages: int=10) -> List[RetreatEvent]:
+def hit_to_event(h: dict) -> RetreatEvent:
+    """Convert a single Algolia hit into a :class:`RetreatEvent`.
+
+    The description is left empty; see :func:`enrich_events`.
+    """
+    # 1) Basic fields
+    title = h.get("title", "")
+    link  = h.get("url", "")
+
+    # 2) Dates (UNIX timestamps or ISO strings → datetime)
+    dates = RetreatDates(start=from_timestamp(h.get("startDate")), end=from_timestamp(h.get("endDate")))
+
+    # 3) Teachers
+    et = h.get("eventTeachers")
+    if et is None:
+        et = h.get("teacherNames", [])
+        if isinstance(et, list):
+            teachers = [name.strip() for name in et if isinstance(name, str) and name.strip()]
+        else:
+            teachers = []
+    else:
+        teachers = [name.strip() for name in str(et).split(",") if name.strip()]
+
+    # 4) Location information
+    location = locations.location("Spirit Rock Meditation Center", "Woodacre", "CA", "USA")
+
+    # 5) Other metadata, leaving out empty values and the raw keys that are
+    # already represented elsewhere
+    other = {}
+    for key, raw_key in OTHER_FIELDS:
+        value = h.get(raw_key)
+        if value not in (None, ""):
+            other[key] = locations.text(str(value))
+    other["address"] = "5000 Sir Francis Drake Blvd Box 169, Woodacre, CA 94973"
+
+    for key, val in h.items():
+        if key not in USED_HIT_KEYS and key not in other and val not in (None, ""):
+            other[key] = val
+
+    return RetreatEvent(
+        title=title,
+        dates=dates,
+        teachers=teachers,
+        location=location,
+        description="",
+        link=link,
+        other=other
+    )
+
+
+def enrich_events(
+    events: List[RetreatEvent],
+    workers: int = DETAIL_WORKERS,
+    per_host: int = DETAIL_PER_HOST,
+    parse_pool: Optional[Executor] = None,
+) -> List[RetreatEvent]:
+    """Fetch descriptions for ``events`` concurrently, updating them in place.
+
+    A failed download leaves the description empty and records the error
+    under ``other["descriptionError"]``.  ``parse_pool`` parses the pages,
+    e.g. in other processes.
+    """
+    load = load_description if parse_pool is None else partial(load_description, parse_pool=parse_pool)
+
+    def fetch(event: RetreatEvent):
+        try:
+            return load(event.link), None
+        except Exception as exc:  # noqa: BLE001
+            return "", exc
+
+    targets = [event for event in events if event.link]
+    failed = 0
+    for event, (description, error) in imap_bounded(
+        fetch,
+        targets,
+        workers=workers,
+        per_host=per_host,
+        key=lambda event: host_of(event.link),
+    ):
+        event.description = description
+        if error is not None:
+            failed += 1
+            event.other["descriptionError"] = str(error)
+            logging.warning("Failed to fetch description for %s: %s", event.link, error)
+    if failed:
+        logging.warning("%d of %d Spirit Rock descriptions could not be fetched", failed, len(targets))
+    return events
+
+
+def options_from_args(args) -> Dict:
+    """Keyword arguments for this site's hooks from the command line.
+
+    ``--spiritrock-program-types`` defaults to :data:`RETREAT_PROGRAM_TYPES`.
+    """
+    query = AlgoliaQuery()
+    if args.spiritrock_program_types is not None:
+        query.program_types = [t.strip() for t in args.spiritrock_program_types.split(",") if t.strip()]
+    query.start_from = args.spiritrock_from
+    return {"query": query}
+
+
+def parse_algolia_events(
+    max_pages: int = 10,
+    workers: int = DETAIL_WORKERS,
+    per_host: int = DETAIL_PER_HOST,
+    select: Optional[Callable[[List[RetreatEvent]], List[RetreatEvent]]] = None,
+    query: Optional[AlgoliaQuery] = None,
+    parse_pool: Optional[Executor] = None,
+) -> List[RetreatEvent]:
+    """Fetch Spirit Rock events from Algolia and enrich them with descriptions.
+
+    ``query`` selects which events Algolia returns (upcoming retreats by
+    default).  ``select`` narrows the events whose detail pages are fetched.
+    ``parse_pool`` parses the detail pages; see :func:`enrich_events`.
+    """
     logging.info("Fetching Spirit Rock events from Algolia")
     events: List[RetreatEvent] = []
-    for page in range(max_pages):
-        hits = fetch_algolia_page(page)
-        if not hits:
-            break
-
-        for h in hits:
-            # 1) Basic fields
-            title = h.get("title", "")
-            link  = h.get("url", "")
-
-            # 2) Description (strip HTML)
-            description = fetch_description(link)
-            #description = h.get("shortDescription") or h.get("description", "")
-
-            # 3) Dates (UNIX timestamps → datetime)
-            start_ts = h.get("startDate")
-            end_ts = h.get("endDate")
-
-            if isinstance(start_ts, (int, float)):
-                start_dt = datetime.fromtimestamp(start_ts)
-            elif isinstance(start_ts, str):
-                try:
-                    start_dt = datetime.fromisoformat(start_ts.replace("Z", "+00:00"))
-                except ValueError:
-                    start_dt = None
-            else:
-                start_dt = None
-
-            if isinstance(end_ts, (int, float)):
-                end_dt = datetime.fromtimestamp(end_ts)
-            elif isinstance(end_ts, str):
-                try:
-                    end_dt = datetime.fromisoformat(end_ts.replace("Z", "+00:00"))
-                except ValueError:
-                    end_dt = None
-            else:
-                end_dt = None
-            dates = RetreatDates(start=start_dt, end=end_dt)
-
-            # 4) Teachers
-            et = h.get("eventTeachers")
-            if et is None:
-                et = h.get("teacherNames", [])
-                if isinstance(et, list):
-                    teachers = [name.strip() for name in et if isinstance(name, str) and name.strip()]
-                else:
-                    teachers = []
-            else:
-                teachers = [name.strip() for name in str(et).split(",") if name.strip()]
-
-            # 5) Location information
-            location = RetreatLocation()
-            location.practice_center = "Spirit Rock Meditation Center"
-            location.city = "Woodacre"
-            location.region = "CA"
-            location.country = "USA"
-
-            # 6) Other metadata
-            other = {
-                "eventCode":      h.get("eventCode", ""),
-                "programType":    h.get("programTypeName", ""),
-                "duration":       h.get("duration", ""),
-                "credits":        str(h.get("creditCount", "")),
-                "postDateString": h.get("postDateString", ""),
-            }
-            other["address"] = "5000 Sir Francis Drake Blvd Box 169, Woodacre, CA 94973"
-
-            used_keys = {
-                "title",
-                "url",
-                "startDate",
-                "endDate",
-                "eventTeachers",
-                "teacherNames",
-                "shortDescription",
-                "displayLocation",
-                "location",
-            }
-
-            for key, val in h.items():
-                if key not in used_keys and key not in other and val not in (None, ""):
-                    other[key] = val
-
-            events.append(RetreatEvent(
-                title=title,
-                dates=dates,
-                teachers=teachers,
-                location=location,
-                description=description,
-                link=link,
-                other=other
-            ))
+    for hits in iter_algolia_pages(max_pages, query=query):
+        events.extend(hit_to_event(h) for h in hits)
+
+    enrich_events(
+        select(events) if select else events,
+        workers=workers,
+        per_host=per_host,
+        parse_pool=parse_pool,
+    )
     logging.info("%d retreat events found", len(events))
 
-    return events
\ No newline at end of file
+    return events
+
+
+def iter_algolia_events(
+    max_pages: int = 10,
+    workers: int = DETAIL_WORKERS,
+    per_host: int = DETAIL_PER_HOST,
+    select: Optional[Callable[[List[RetreatEvent]], List[RetreatEvent]]] = None,
+    query: Optional[AlgoliaQuery] = None,
+    parse_pool: Optional[Executor] = None,
+) -> Iterator[RetreatEvent]:
+    """Yield Spirit Rock events one Algolia page at a time.
+
+    Each page's descriptions are fetched before its events are yielded, so
+    the first events are available after the first page.
+    """
+    logging.info("Streaming Spirit Rock events from Algolia")
+    for hits in iter_algolia_pages(max_pages, query=query):
+        events = [hit_to_event(h) for h in hits]
+        enrich_events(
+            select(events) if select else events,
+            workers=workers,
+            per_host=per_host,
+            parse_pool=parse_pool,
+        )
+        yield from events
@@ -0,0 +1,98 @@
+"""A small local stand-in for the Spirit Rock Algolia query endpoint.
+
+It understands the subset of Algolia used by :mod:`sites.spiritrock`:
+``page``/``hitsPerPage`` pagination, ``filters`` made of ``attr:"value"``
+facets (optionally OR-ed in parentheses) and numeric ``attr >= n`` /
+``attr <= n`` comparisons joined by ``AND``, and ``attributesToRetrieve``.
+"""
+
+import json
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+FACET_RE = re.compile(r'(\w+):"([^"]*)"')
+NUMERIC_RE = re.compile(r'^(\w+)\s*(>=|<=)\s*(-?\d+)$')
+
+
+def _matches(hit, filters):
+    if not filters:
+        return True
+    for clause in filters.split(" AND "):
+        clause = clause.strip().strip("()")
+        numeric = NUMERIC_RE.match(clause)
+        if numeric:
+            attr, op, value = numeric.groups()
+            actual = hit.get(attr)
+            if not isinstance(actual, (int, float)):
+                return False
+            if op == ">=" and not actual >= int(value):
+                return False
+            if op == "<=" and not actual <= int(value):
+                return False
+            continue
+        options = FACET_RE.findall(clause)
+        if not any(hit.get(attr) == value for attr, value in options):
+            return False
+    return True
+
+
+class AlgoliaStub:
+    """Serve ``hits`` over HTTP; use as a context manager."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.queries = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = stub.handle(self.path, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/1/indexes/events/query"
+
+    def query(self, params):
+        """Answer one Algolia query given its decoded ``params`` dict."""
+        self.queries.append(params)
+        page = int(params.get("page", 0))
+        per_page = int(params.get("hitsPerPage", 20))
+        matched = [h for h in self.hits if _matches(h, params.get("filters", ""))]
+        attrs = params.get("attributesToRetrieve")
+        if attrs:
+            keep = set(json.loads(attrs)) | {"objectID"}
+            matched = [{k: v for k, v in h.items() if k in keep} for h in matched]
+        return {
+            "hits": matched[page * per_page:(page + 1) * per_page],
+            "page": page,
+            "hitsPerPage": per_page,
+            "nbHits": len(matched),
+            "nbPages": math.ceil(len(matched) / per_page) if per_page else 0,
+        }
+
+    def handle(self, path, body):
+        params = {k: v[0] for k, v in parse_qs(body.get("params", ""), keep_blank_values=True).items()}
+        return 200, self.query(params)
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
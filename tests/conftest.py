@@ -0,0 +1,90 @@
+"""Helpers shared by the tests.
+
+pytest loads this module first, and test modules import from it like any
+sibling module: ``from conftest import make_event``.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from models import RetreatDates, RetreatEvent, RetreatLocation
+
+
+def make_event(title="Sesshin", start=datetime(2025, 6, 29, 9, 0), end=None, *, days=None,
+               center="Tassajara", location=None, teachers=(), description="", link="", other=None):
+    """A :class:`RetreatEvent` with test defaults.
+
+    ``days`` sets the end relative to ``start``.  ``location`` replaces the
+    location built from ``center``.
+    """
+    if days is not None and start is not None:
+        end = start + timedelta(days=days)
+    return RetreatEvent(
+        title=title,
+        dates=RetreatDates(start=start, end=end),
+        teachers=list(teachers),
+        location=location or RetreatLocation(practice_center=center),
+        description=description,
+        link=link,
+        other=dict(other or {}),
+    )
+
+
+class MockResponse:
+    """What the parsers read from an ``http_client.get`` response.
+
+    ``json()`` returns ``payload``, or raises like a non-JSON page without one.
+    """
+
+    def __init__(self, payload=None, text="unused"):
+        self.payload = payload
+        self.text = text
+        self.url = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        if self.payload is None:
+            raise ValueError("not json")
+        return self.payload
+
+
+class FakeResponse:
+    """A bare response as returned by a session, for retry and pacing tests."""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Returns or raises ``outcomes`` in order and records each request."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_client(outcomes, **kwargs):
+    """An ``HTTPClient`` whose every host session is one :class:`FakeSession`."""
+    import http_client
+
+    client = http_client.HTTPClient(**kwargs)
+    fake = FakeSession(outcomes)
+    client.session = lambda host: fake
+    return client, fake
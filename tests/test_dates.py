@@ -0,0 +1,127 @@
+import sys
+import os
+import random
+import time as _time
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import dates
+
+FIRST = date(1990, 1, 1)
+
+
+def random_days(count, seed=11):
+    rng = random.Random(seed)
+    return [FIRST + timedelta(days=rng.randrange(20_000)) for _ in range(count)]
+
+
+def test_month_table_matches_calendar_names():
+    for number in range(1, 13):
+        day = date(2025, number, 1)
+        for name in (day.strftime("%B"), day.strftime("%b")):
+            assert dates.month_number(name) == number
+            assert dates.month_number(name.upper()) == number
+    assert dates.month_number("Sept") == 9
+    assert dates.month_number("Juneteenth") is None
+
+
+def test_parse_day_round_trips_captions():
+    for day in random_days(2000):
+        for text in (day.strftime("%A, %b %d, %Y"), day.strftime("%a, %B %d, %Y").upper()):
+            assert dates.parse_day(text) == day
+
+
+def test_parse_day_accepts_what_strptime_accepts():
+    rng = random.Random(5)
+    for day in random_days(500):
+        text = list(day.strftime("%A, %b %d, %Y"))
+        # Drop, duplicate or replace one character
+        i = rng.randrange(len(text))
+        text[i] = rng.choice(["", text[i] * 2, rng.choice("0123456789xX ,")])
+        text = "".join(text)
+        try:
+            expected = datetime.strptime(text, "%A, %b %d, %Y").date()
+        except ValueError:
+            expected = None
+        if expected is not None:
+            assert dates.parse_day(text) == expected, text
+
+
+def test_parse_clock_matches_strptime_exhaustively():
+    for hour in range(0, 14):
+        for minute in range(0, 61):
+            for hour_text in {str(hour), f"{hour:02d}"}:
+                for minute_text in {str(minute), f"{minute:02d}"}:
+                    for suffix in ("am", "PM", "Pm"):
+                        text = f"{hour_text}:{minute_text} {suffix}"
+                        try:
+                            expected = datetime.strptime(text, "%I:%M %p").time()
+                        except ValueError:
+                            expected = None
+                        assert dates.parse_clock(text) == expected, text
+    assert dates.parse_clock("9:00am") is None
+    assert dates.parse_clock("") is None
+
+
+def test_parse_date_range_round_trips_generated_ranges():
+    rng = random.Random(9)
+    for start in random_days(2000):
+        end = start + timedelta(days=rng.randint(0, 40))
+        dash = rng.choice(["to", "-", "–", " – "])
+        if start.year != end.year:
+            text = f"{start:%B} {start.day}, {start.year} {dash} {end:%B} {end.day}, {end.year}"
+        elif start.month != end.month:
+            text = f"{start:%B} {start.day} {dash} {end:%B} {end.day}, {end.year}"
+        else:
+            text = f"Retreat: {start:%B} {start.day} {dash} {end.day}, {end.year} (7 nights)"
+        assert dates.parse_date_range(text) == (dates.at_center(start), dates.at_center(end)), text
+
+
+def test_parse_date_range_rejects_impossible_dates():
+    assert dates.parse_date_range("February 27 to 30, 2025") is None
+    assert dates.parse_date_range("Smarch 1 to 8, 2025") is None
+    assert dates.parse_date_range("June 1 to 8") is None
+    assert dates.parse_date_range("no dates here") is None
+
+
+def test_timestamps_round_trip_center_midnight():
+    for day in random_days(500):
+        parsed = dates.from_timestamp(dates.to_timestamp(day))
+        assert parsed == datetime.combine(day, time.min, tzinfo=dates.CENTER_TZ)
+        assert (parsed.date(), parsed.time(), parsed.tzinfo) == (day, time.min, dates.CENTER_TZ)
+
+
+def test_timestamps_do_not_depend_on_the_host_zone(monkeypatch):
+    if not hasattr(_time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    day = date(2025, 6, 29)
+    try:
+        for zone in ("UTC", "Asia/Tokyo", "America/New_York"):
+            monkeypatch.setenv("TZ", zone)
+            _time.tzset()
+            assert dates.to_timestamp(day) == 1751180400
+            assert dates.from_timestamp(1751180400) == dates.at_center(day)
+    finally:
+        monkeypatch.undo()
+        _time.tzset()
+
+
+def test_from_timestamp_handles_iso_strings_and_junk():
+    utc = dates.from_timestamp("2025-06-29T15:00:00Z")
+    assert utc == datetime(2025, 6, 29, 15, tzinfo=timezone.utc)
+    assert (utc.hour, utc.tzinfo) == (8, dates.CENTER_TZ)
+    assert dates.from_timestamp("2025-06-29T08:00:00") == datetime(2025, 6, 29, 8, tzinfo=dates.CENTER_TZ)
+    assert dates.from_timestamp("next week") is None
+    assert dates.from_timestamp(None) is None
+    assert dates.from_timestamp(1e20) is None
+
+
+def test_repeated_strings_are_memoized():
+    dates.parse_clock.cache_clear()
+    for _ in range(10):
+        assert dates.parse_clock("7:30 pm") == time(19, 30)
+    info = dates.parse_clock.cache_info()
+    assert (info.hits, info.misses) == (9, 1)
@@ -0,0 +1,84 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import make_event
+from dedup import Deduplicator, dedupe, fingerprint, normalize_text
+
+
+def sesshin(**fields):
+    """An SFZC-style listing row, which has no end date."""
+    return make_event(**{"title": "Three-Day Sesshin", "start": datetime(2025, 6, 12, 5, 40),
+                         "center": "City Center", **fields})
+
+
+def test_normalize_text():
+    assert normalize_text("  Vipassanā   Retreat: Week-Long! ") == "vipassana retreat week long"
+    assert normalize_text(None) == ""
+
+
+def test_fingerprint_ignores_case_punctuation_and_time_of_day():
+    a = sesshin(title="Three-Day Sesshin", start=datetime(2025, 6, 12, 5, 40))
+    b = sesshin(title="three day sesshin", start=datetime(2025, 6, 12, 9, 0), center="city center")
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(sesshin(start=datetime(2025, 6, 13)))
+    assert fingerprint(a) != fingerprint(sesshin(center="Online"))
+
+
+def test_dedupe_merges_into_first_occurrence():
+    first = sesshin(description="Short", teachers=["Teacher One"], other={"source": "p0"})
+    other = sesshin(title="Day of Zazen")
+    second = sesshin(
+        description="A much longer description",
+        teachers=["teacher one", "Teacher Two"],
+        link="https://example.com/sesshin",
+        other={"source": "p1", "eventCode": "123"},
+    )
+
+    unique, report = dedupe([first, other, second])
+
+    assert unique == [first, other]
+    assert first.description == "A much longer description"
+    assert first.teachers == ["Teacher One", "Teacher Two"]
+    assert first.link == "https://example.com/sesshin"
+    assert first.other == {"source": "p0", "eventCode": "123"}
+    assert (report.received, report.kept, report.merged) == (3, 2, 1)
+
+
+def test_iter_unique_streams_first_occurrences():
+    dedup = Deduplicator()
+    events = [sesshin(), sesshin(), sesshin(title="Day of Zazen")]
+    assert [e.title for e in dedup.iter_unique(events)] == ["Three-Day Sesshin", "Day of Zazen"]
+    assert dedup.finish().merged == 1
+
+
+def test_multi_day_sesshin_listed_per_day_is_one_event():
+    link = "https://www.sfzc.org/sesshin"
+    days = [sesshin(start=datetime(2025, 6, day, 5, 40), link=link) for day in (12, 13, 14)]
+
+    unique, report = dedupe(days)
+
+    assert unique == [days[0]]
+    assert days[0].dates.start == datetime(2025, 6, 12, 5, 40)
+    assert days[0].dates.end == datetime(2025, 6, 14, 5, 40)
+    assert report.merged == 2
+
+
+def test_shared_link_weeks_apart_stays_separate():
+    link = "https://www.sfzc.org/zazen"
+    weekly = [sesshin(title="Zazen", start=datetime(2025, 6, day, 6, 0), link=link) for day in (3, 10)]
+    assert dedupe(weekly)[0] == weekly
+
+
+def test_streaming_keeps_only_keys_and_reports_duplicates():
+    link = "https://www.sfzc.org/sesshin"
+    duplicates = []
+    dedup = Deduplicator(keep_events=False, on_duplicate=lambda key, event: duplicates.append((key, event)))
+    days = [sesshin(start=datetime(2025, 6, day, 5, 40), link=link) for day in (12, 13, 14)]
+
+    assert list(dedup.iter_unique(days)) == [days[0]]
+    assert days[0].dates.end is None
+    assert duplicates == [(f"{link}@2025-06-12T05:40:00", days[1]), (f"{link}@2025-06-12T05:40:00", days[2])]
+    assert all(kept.event is None for kept in dedup._fingerprints.values())
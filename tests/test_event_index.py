@@ -0,0 +1,169 @@
+import sys
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import parse_retreat_events
+from conftest import make_event
+from event_index import EventIndex
+from models import RetreatDates
+from serialization import write_events
+
+CENTERS = ["Spirit Rock Meditation Center", "Tassajara", "Insight Retreat Center"]
+TEACHERS = ["Jack Kornfield", "Tuere Sala", "Gil Fronsdal", "Ines Freedman"]
+
+
+def random_events(count, seed=7):
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        start = datetime(2025, 1, 1, 9) + timedelta(days=rng.randrange(365), hours=rng.randrange(8))
+        days = rng.choice([None, 0, 2, 7, 30, 90])
+        events.append(
+            make_event(
+                f"{rng.choice(['Insight', 'Zen', 'Metta'])} Retreat {i}",
+                start,
+                days=days,
+                center=rng.choice(CENTERS),
+                teachers=rng.sample(TEACHERS, rng.randrange(3)),
+            )
+        )
+    events.append(make_event("Undated Retreat", None, center=CENTERS[0], teachers=[TEACHERS[0]]))
+    events[-1].dates = RetreatDates()
+    return events
+
+
+def scan_overlapping(events, start, end):
+    low = datetime.combine(start, datetime.min.time())
+    high = datetime.combine(end, datetime.max.time())
+    return {
+        i for i, e in enumerate(events)
+        if e.dates.start and e.dates.start <= high and (e.dates.end or e.dates.start) >= low
+    }
+
+
+@pytest.fixture(scope="module")
+def events():
+    return random_events(2000)
+
+
+@pytest.fixture(scope="module")
+def index(events):
+    return EventIndex(events)
+
+
+@pytest.mark.parametrize("day, length", [(0, 0), (40, 14), (150, 1), (300, 120), (364, 10)])
+def test_overlapping_matches_linear_scan(events, index, day, length):
+    start = date(2025, 1, 1) + timedelta(days=day)
+    end = start + timedelta(days=length)
+    assert index.overlapping(start, end) == scan_overlapping(events, start, end)
+
+
+def test_open_ended_ranges(events, index):
+    dated = {i for i, e in enumerate(events) if e.dates.start}
+    assert index.overlapping() == dated
+    assert index.starting(None, date(2025, 1, 31)) == {
+        i for i in dated if events[i].dates.start.date() <= date(2025, 1, 31)
+    }
+
+
+def test_word_lookups(events, index):
+    assert index.center("spirit rock") == {
+        i for i, e in enumerate(events) if e.location.practice_center == CENTERS[0]
+    }
+    assert index.teacher("Tuere Sala") == {i for i, e in enumerate(events) if "Tuere Sala" in e.teachers}
+    assert index.title("zen retreat") == {i for i, e in enumerate(events) if e.title.startswith("Zen")}
+    assert index.teacher("nobody") == set()
+
+
+def test_composed_query(events, index):
+    start, end = date(2025, 6, 1), date(2025, 6, 15)
+    q = index.query().center("Spirit Rock").overlapping(start, end)
+    combined = q.teacher("Jack Kornfield") | q.teacher("Tuere Sala")
+
+    expected = {
+        i for i in scan_overlapping(events, start, end)
+        if events[i].location.practice_center == CENTERS[0]
+        and {"Jack Kornfield", "Tuere Sala"} & set(events[i].teachers)
+    }
+    assert expected and combined.ids() == expected
+    found = combined.events()
+    assert [e.dates.start for e in found] == sorted(e.dates.start for e in found)
+
+
+def test_three_or_more_alternatives():
+    events = [make_event(f"Retreat {i}", datetime(2025, 6, 1 + i), teachers=[name])
+              for i, name in enumerate(["Ann", "Bob", "Cid", "Dee"])]
+    q = EventIndex(events).query()
+    ann, bob, cid, dee = (q.teacher(name) for name in ("Ann", "Bob", "Cid", "Dee"))
+
+    assert (ann | bob | cid).ids() == {0, 1, 2}
+    assert (ann | (bob | cid)).ids() == {0, 1, 2}
+    assert ((ann | bob) | (cid | dee)).ids() == {0, 1, 2, 3}
+    assert (ann | bob | cid).title("Retreat 1").ids() == {1}
+
+
+def test_mixed_timezones_compare_by_wall_clock():
+    aware = make_event("A", datetime(2025, 6, 1, 9, tzinfo=timezone.utc), days=2, center="X")
+    naive = make_event("B", datetime(2025, 6, 10, 9), days=2, center="X")
+    index = EventIndex([aware, naive])
+    assert index.query().overlapping(date(2025, 6, 2), date(2025, 6, 2)).events() == [aware]
+
+
+def test_query_subcommand(tmp_path, monkeypatch, capsys):
+    events = [
+        make_event("Insight Retreat", datetime(2025, 6, 3), days=5, center=CENTERS[0], teachers=["Jack Kornfield"]),
+        make_event("Metta Retreat", datetime(2025, 6, 20), days=5, center=CENTERS[0], teachers=["Jack Kornfield"]),
+        make_event("Zen Retreat", datetime(2025, 6, 3), days=5, center=CENTERS[1], teachers=["Jack Kornfield"]),
+    ]
+    path = tmp_path / "events.json"
+    with open(path, "w", encoding="utf-8") as fh:
+        write_events(events, fh)
+
+    monkeypatch.setattr(sys, "argv", [
+        "parse_retreat_events.py", "query", str(path), "--center", "spirit rock",
+        "--from", "2025-06-01", "--to", "2025-06-15", "--teacher", "Kornfield",
+    ])
+    parse_retreat_events.main()
+
+    out = capsys.readouterr().out
+    assert "Insight Retreat" in out
+    assert "Metta Retreat" not in out and "Zen Retreat" not in out
+    assert "1 of 3 events match" in out
+
+
+def test_query_subcommand_ors_every_teacher(tmp_path, monkeypatch, capsys):
+    events = [
+        make_event(f"Retreat {i}", datetime(2025, 6, 1 + i), teachers=[name])
+        for i, name in enumerate(["Gil Fronsdal", "Tuere Sala", "Jack Kornfield", "Ines Freedman"])
+    ]
+    path = tmp_path / "events.json"
+    with open(path, "w", encoding="utf-8") as fh:
+        write_events(events, fh)
+
+    for order in (["Fronsdal", "Sala", "Kornfield"], ["Kornfield", "Fronsdal", "Sala"]):
+        argv = ["parse_retreat_events.py", "query", str(path)]
+        for name in order:
+            argv += ["--teacher", name]
+        monkeypatch.setattr(sys, "argv", argv)
+        parse_retreat_events.main()
+
+        out = capsys.readouterr().out
+        assert "3 of 4 events match" in out
+        assert "Retreat 3" not in out
+
+
+@pytest.mark.parametrize("name, content", [("missing.json", None), ("broken.json", "not json")])
+def test_query_subcommand_reports_unreadable_input(tmp_path, monkeypatch, name, content):
+    path = tmp_path / name
+    if content is not None:
+        path.write_text(content)
+    monkeypatch.setattr(sys, "argv", ["parse_retreat_events.py", "query", str(path)])
+    with pytest.raises(SystemExit) as exc:
+        parse_retreat_events.main()
+    message = str(exc.value.code)
+    assert message.startswith("query: ") and str(path) in message and "\n" not in message
@@ -0,0 +1,166 @@
+import sys
+import os
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import parse_retreat_events
+from conftest import make_event
+from event_store import EventStore, sqlite_path
+from models import RetreatLocation
+
+
+def retreat(title, start, end=None, center="Spirit Rock", **fields):
+    """A Spirit Rock-style event, keyed by its ``eventCode``."""
+    location = RetreatLocation(practice_center=center, city="Woodacre", region="CA", country="USA")
+    link = f"https://example.com/{title.replace(' ', '-')}"
+    return make_event(title, start, end, location=location, link=link, other={"eventCode": title.upper()}, **fields)
+
+
+def test_sqlite_path():
+    assert sqlite_path("sqlite:events.db") == "events.db"
+    assert sqlite_path("events.json") is None
+    assert sqlite_path(None) is None
+
+
+def test_upsert_updates_in_place(tmp_path):
+    path = str(tmp_path / "events.db")
+    with EventStore(path) as store:
+        assert store.upsert([retreat("Insight", datetime(2025, 6, 1), teachers=["Jack Kornfield"])]) == 1
+        first_seen = store.conn.execute("SELECT first_seen FROM events").fetchone()[0]
+
+    changed = retreat("Insight", datetime(2025, 6, 1), datetime(2025, 6, 5), teachers=["Tuere Sala"])
+    changed.description = "Updated"
+    with EventStore(path) as store:
+        store.upsert([changed])
+        assert len(store) == 1
+        row = store.conn.execute("SELECT first_seen, description FROM events").fetchone()
+        assert row == (first_seen, "Updated")
+        [record] = store.records()
+
+    assert record["teachers"] == ["Tuere Sala"]
+    assert record["dates"] == {"start": "2025-06-01T00:00:00", "end": "2025-06-05T00:00:00"}
+    assert record["other"] == {"eventCode": "INSIGHT"}
+
+
+def test_locations_and_teachers_are_shared(tmp_path):
+    events = [
+        retreat(f"Retreat {i}", datetime(2025, 6, 1 + i), teachers=["Gil Fronsdal", "Ines Freedman"])
+        for i in range(5)
+    ]
+    with EventStore(str(tmp_path / "events.db")) as store:
+        store.upsert(events, batch_size=2)
+        counts = [
+            store.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("events", "locations", "teachers", "event_teachers")
+        ]
+        rebuilt = store.events()
+
+    assert counts == [5, 1, 2, 10]
+    assert [e.teachers for e in rebuilt] == [["Gil Fronsdal", "Ines Freedman"]] * 5
+    assert rebuilt[0].location == events[0].location
+
+
+def test_range_queries(tmp_path):
+    events = [
+        retreat("May", datetime(2025, 5, 20), datetime(2025, 6, 2)),
+        retreat("June", datetime(2025, 6, 10, 9), datetime(2025, 6, 12)),
+        retreat("July", datetime(2025, 7, 1)),
+        retreat("Tassajara", datetime(2025, 6, 11), center="Tassajara"),
+        retreat("Undated", None),
+    ]
+    with EventStore(str(tmp_path / "events.db")) as store:
+        store.upsert(events)
+
+        def titles(*args, **kwargs):
+            return [r["title"] for r in store.records(*args, **kwargs)]
+
+        assert titles() == ["May", "June", "Tassajara", "July", "Undated"]
+        assert titles(date(2025, 6, 1), date(2025, 6, 30)) == ["May", "June", "Tassajara"]
+        assert titles(date(2025, 6, 12), date(2025, 6, 12)) == ["June"]
+        assert titles(end=date(2025, 6, 10)) == ["May", "June"]
+        assert titles(date(2025, 6, 1), center="Tassajara") == ["Tassajara"]
+
+
+def test_upsert_counts_distinct_rows(tmp_path):
+    events = [retreat("Insight", datetime(2025, 6, 1)), retreat("Metta", datetime(2025, 6, 2))]
+    with EventStore(str(tmp_path / "events.db")) as store:
+        assert store.upsert(events + [retreat("Insight", datetime(2025, 6, 1))]) == 2
+        assert store.upsert(events * 3, batch_size=1) == 2
+        assert len(store) == 2
+
+
+def test_events_sharing_a_link_are_separate_rows(tmp_path):
+    link = "https://example.com/schedule"
+    events = [make_event("Online Retreat", datetime(2025, 6, day), link=link) for day in (1, 15)]
+    with EventStore(str(tmp_path / "events.db")) as store:
+        assert store.upsert(events) == 2
+        assert len(store) == 2
+
+
+def test_store_keeps_every_deduplicated_irc_retreat(tmp_path):
+    from dedup import dedupe
+    from sites import irc
+
+    html_path = os.path.join(os.path.dirname(__file__), "irc.html")
+    with open(html_path, encoding="utf-8") as fh:
+        unique, _report = dedupe(irc.parse_events(fh.read(), html_path))
+    # Several online retreats link to one schedule page
+    assert len({e.link for e in unique}) < len(unique)
+    with EventStore(str(tmp_path / "events.db")) as store:
+        assert store.upsert(unique) == len(unique)
+        assert len(store) == len(unique)
+
+
+def test_readonly_store_never_creates_a_database(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "missing.db"
+    with pytest.raises(FileNotFoundError):
+        EventStore(str(path), readonly=True)
+    monkeypatch.setattr(sys, "argv", ["prog", "query", f"sqlite:{path}"])
+    with pytest.raises(SystemExit):
+        parse_retreat_events.main()
+    assert not path.exists()
+
+    with EventStore(str(path)) as store:
+        store.upsert([retreat("Insight", datetime(2025, 6, 1))])
+    with EventStore(str(path), readonly=True) as store:
+        assert [r["title"] for r in store.records()] == ["Insight"]
+        with pytest.raises(sqlite3.OperationalError):
+            store.upsert([retreat("Metta", datetime(2025, 6, 2))])
+
+
+def test_streamed_duplicates_update_the_stored_event(tmp_path):
+    from dedup import Deduplicator
+
+    days = [
+        make_event("Sesshin", datetime(2025, 6, day, 5, 40), center="City Center", link="https://example.com/sesshin")
+        for day in (12, 13, 14)
+    ]
+    days[2].teachers = ["Ed Brown"]
+    with EventStore(str(tmp_path / "events.db")) as store:
+        dedup = Deduplicator(keep_events=False, on_duplicate=store.merge_duplicate)
+        # batch_size=1 writes the first day before its duplicates arrive
+        store.upsert(dedup.iter_unique(days), batch_size=1)
+        [stored] = store.events()
+
+    assert (stored.dates.start, stored.dates.end) == (datetime(2025, 6, 12, 5, 40), datetime(2025, 6, 14, 5, 40))
+    assert stored.teachers == ["Ed Brown"]
+
+
+def test_main_writes_sqlite_store(tmp_path, monkeypatch):
+    def fake_events(**kwargs):
+        for i in range(3):
+            yield retreat(f"Retreat {i}", datetime(2025, 6, 1 + i), teachers=["Jack Kornfield"])
+
+    path = tmp_path / "events.db"
+    monkeypatch.setattr("parse_retreat_events.iter_all_sites", fake_events)
+    monkeypatch.setattr(sys, "argv", ["prog", "--no-cache", "--incremental", "--output", f"sqlite:{path}"])
+    # The first run finds no store to compare with and crawls everything
+    parse_retreat_events.main()
+    parse_retreat_events.main()
+
+    with EventStore(str(path)) as store:
+        assert [r["title"] for r in store.records()] == ["Retreat 0", "Retreat 1", "Retreat 2"]
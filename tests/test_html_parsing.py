@@ -0,0 +1,67 @@
+import sys
+import os
+
+import pytest
+from bs4 import SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import html_parsing
+from html_parsing import AnyOf, has_class, make_soup
+from sites import irc, sfzc
+
+HERE = os.path.dirname(__file__)
+BACKENDS = ["html.parser"] + (["lxml"] if html_parsing.DEFAULT_BACKEND == "lxml" else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    html_parsing.set_backend(request.param)
+    yield request.param
+    html_parsing.set_backend(None)
+
+
+def read_fixture(name):
+    with open(os.path.join(HERE, name), encoding="utf-8") as fh:
+        return fh.read()
+
+
+def test_strainer_keeps_only_matching_subtrees(backend):
+    html = '<body><div class="a b"><p>keep</p></div><div class="c"><p>drop</p></div></body>'
+    soup = make_soup(html, SoupStrainer("div", class_=has_class("b")))
+    assert [p.get_text() for p in soup.find_all("p")] == ["keep"]
+
+
+def test_any_of_combines_strainers(backend):
+    html = (
+        '<html><head><meta name="description" content="d"><meta name="viewport" content="v">'
+        '</head><body><div class="x body"><p>text</p></div><p>other</p></body></html>'
+    )
+    soup = make_soup(
+        html,
+        AnyOf(SoupStrainer("meta", attrs={"name": "description"}), SoupStrainer("div", class_=has_class("body"))),
+    )
+    assert [m["content"] for m in soup.find_all("meta")] == ["d"]
+    assert soup.get_text(" ", strip=True) == "text"
+
+
+def test_backends_agree_on_fixtures():
+    results = []
+    for name in BACKENDS:
+        html_parsing.set_backend(name)
+        results.append(
+            (
+                sfzc.parse_listing(read_fixture("sfzc.html"), "src"),
+                irc.parse_events(read_fixture("irc.html"), "src"),
+            )
+        )
+    html_parsing.set_backend(None)
+    assert results[0][0] and results[0][1]
+    assert all(r == results[0] for r in results)
+
+
+def test_strained_listing_matches_full_parse(backend, monkeypatch):
+    html = read_fixture("sfzc.html")
+    strained = sfzc.parse_listing(html, "src")
+    monkeypatch.setattr(sfzc, "LISTING_ONLY", None)
+    assert sfzc.parse_listing(html, "src") == strained
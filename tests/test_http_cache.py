@@ -0,0 +1,128 @@
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import http_client
+from http_cache import ResponseCache
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):  # noqa: N802
+        Handler.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"<p>page {self.path}</p>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests_seen = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_revalidates_with_etag(server, tmp_path):
+    client = http_client.HTTPClient(cache=ResponseCache(str(tmp_path)))
+    first = client.get(server + "/a")
+    second = client.get(server + "/a")
+    assert first.text == second.text == "<p>page /a</p>"
+    assert Handler.requests_seen == [("/a", None), ("/a", '"v1"')]
+    assert client.cache_stats == {"miss": 1, "revalidated": 1}
+
+
+def test_fresh_entries_skip_the_network(server, tmp_path):
+    host = server.split("//", 1)[1]
+    cache = ResponseCache(str(tmp_path), ttls={host: 3600})
+    client = http_client.HTTPClient(cache=cache)
+    client.get(server + "/a")
+    resp = client.get(server + "/a")
+    assert resp.text == "<p>page /a</p>"
+    assert len(Handler.requests_seen) == 1
+    # A per-request TTL of zero forces revalidation
+    client.get(server + "/a", cache_ttl=0)
+    assert len(Handler.requests_seen) == 2
+
+
+def test_params_are_part_of_the_key(server, tmp_path):
+    client = http_client.HTTPClient(cache=ResponseCache(str(tmp_path)))
+    client.get(server + "/list", params={"page": "0"})
+    client.get(server + "/list", params={"page": "1"})
+    assert [etag for _, etag in Handler.requests_seen] == [None, None]
+
+
+def test_cache_survives_restart(server, tmp_path):
+    http_client.HTTPClient(cache=ResponseCache(str(tmp_path))).get(server + "/a")
+    client = http_client.HTTPClient(cache=ResponseCache(str(tmp_path)))
+    assert client.get(server + "/a").text == "<p>page /a</p>"
+    assert Handler.requests_seen[-1] == ("/a", '"v1"')
+
+
+def test_lru_eviction(server, tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=40)
+    client = http_client.HTTPClient(cache=cache)
+    for path in ("/a", "/b"):
+        client.get(server + path)
+    # Touch /a so that /b is the least recently used entry
+    cache.get(cache.key(server + "/a"))
+    client.get(server + "/c")
+    assert cache.total_bytes() <= 40
+    assert cache.get(cache.key(server + "/a")) is not None
+    assert cache.get(cache.key(server + "/b")) is None
+
+
+class StoredResponse:
+    def __init__(self, version):
+        self.url = f"https://example.com/{version}"
+        self.status_code = 200
+        self.headers = {"ETag": f'"{version}"'}
+        self.encoding = "utf-8"
+        self.content = f"version {version} ".encode("utf-8") * (1000 + version)
+
+
+def test_concurrent_readers_never_see_a_mixed_entry(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = cache.key("https://example.com/page")
+    cache.store(key, StoredResponse(0))
+    mismatched = []
+
+    def write(start):
+        for version in range(start, 200, 2):
+            cache.store(key, StoredResponse(version))
+
+    def read():
+        for _ in range(300):
+            entry = cache.get(key)
+            version = int(entry.meta["headers"]["ETag"].strip('"'))
+            if entry.body != StoredResponse(version).content:
+                mismatched.append(version)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in (1, 2)]
+    threads += [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatched == []
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
@@ -0,0 +1,63 @@
+import sys
+import os
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import http_client
+from conftest import FakeResponse, make_client
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(http_client.time, "sleep", recorded.append)
+    return recorded
+
+
+def test_session_is_reused_per_host():
+    client = http_client.HTTPClient()
+    assert client.session("a.example") is client.session("a.example")
+    assert client.session("a.example") is not client.session("b.example")
+    client.close()
+
+
+def test_profile_headers_and_default_timeout(sleeps):
+    client, fake = make_client([FakeResponse(200)])
+    client.get("https://a.example/", headers={"X-Extra": "1"})
+    _, _, kwargs = fake.calls[0]
+    assert kwargs["headers"]["User-Agent"] == http_client.BROWSER_USER_AGENT
+    assert kwargs["headers"]["X-Extra"] == "1"
+    assert kwargs["timeout"] == http_client.DEFAULT_TIMEOUT
+
+
+def test_retries_on_5xx_then_succeeds(sleeps):
+    client, fake = make_client([FakeResponse(503), FakeResponse(502), FakeResponse(200)])
+    resp = client.get("https://a.example/")
+    assert resp.status_code == 200
+    assert len(fake.calls) == 3
+    assert len(sleeps) == 2
+    assert all(0 <= d <= http_client.MAX_BACKOFF for d in sleeps)
+
+
+def test_honours_retry_after(sleeps):
+    client, _ = make_client([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200)])
+    client.get("https://a.example/")
+    assert sleeps == [7.0]
+
+
+def test_gives_up_after_max_retries(sleeps):
+    client, fake = make_client([FakeResponse(500)] * 3, retries=2)
+    resp = client.get("https://a.example/")
+    assert resp.status_code == 500
+    assert len(fake.calls) == 3
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+    err = requests.ConnectionError("boom")
+    client, fake = make_client([err, err], retries=1)
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://a.example/")
+    assert len(fake.calls) == 2
@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import logging
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import parse_retreat_events
+from conftest import MockResponse, make_event
+from incremental import IncrementalCrawl, event_key
+from parse_retreat_events import events_to_json
+from sites import sfzc
+
+
+def listed(link, code=None, **fields):
+    """An event as a listing gives it, with an ``eventCode`` if ``code`` is set."""
+    other = {"source": "src", "eventCode": code} if code else {"source": "src"}
+    return make_event(link=link, other=other, **fields)
+
+
+def previous_records(*events):
+    return json.loads(events_to_json(list(events)))
+
+
+def test_event_key_prefers_event_code():
+    assert event_key(listed("https://a", code="SR123")) == "eventCode:SR123"
+    assert event_key(listed("https://a")) == "https://a"
+
+
+def test_select_reuses_unchanged_and_counts():
+    previous = previous_records(
+        listed("https://same", description="old desc", teachers=["T1"]),
+        listed("https://edited", description="stale"),
+        listed("https://gone", description="gone"),
+    )
+    tracker = IncrementalCrawl(previous)
+    current = [
+        listed("https://same"),
+        listed("https://edited", title="Sesshin (rescheduled)"),
+        listed("https://fresh"),
+    ]
+    pending = tracker.select(current)
+    assert [e.link for e in pending] == ["https://edited", "https://fresh"]
+    assert current[0].description == "old desc"
+    assert current[0].teachers == ["T1"]
+
+    report = tracker.finish()
+    assert (report.new, report.changed, report.reused, report.removed) == (1, 1, 1, 1)
+
+
+def test_day_rows_of_a_merged_range_are_unchanged():
+    merged = listed("https://sesshin", description="old desc")
+    merged.dates.end = datetime(2025, 7, 1, 9, 0)
+    tracker = IncrementalCrawl(previous_records(merged))
+    rows = [listed("https://sesshin") for _ in range(3)]
+    rows[1].dates.start = datetime(2025, 7, 1, 9, 0)
+    rows[2].dates.start = datetime(2025, 7, 2, 9, 0)
+    assert tracker.select(rows) == [rows[2]]
+    assert rows[1].description == "old desc"
+
+
+def test_failed_descriptions_are_refetched():
+    failed = listed("https://a", code="SR1")
+    failed.other["descriptionError"] = "timeout"
+    tracker = IncrementalCrawl(previous_records(failed))
+    pending = tracker.select([listed("https://a", code="SR1")])
+    assert len(pending) == 1
+    assert tracker.report.changed == 1
+
+
+def test_sfzc_only_fetches_selected_details(monkeypatch, tmp_path):
+    html = """
+    <table class="views-table"><caption>Saturday, Jun 29, 2025</caption><tbody>
+    <tr><td>9:00 am</td><td>Tassajara</td><td><a href="https://known">Sesshin</a></td></tr>
+    <tr><td>9:00 am</td><td>Tassajara</td><td><a href="https://new">Sesshin</a></td></tr>
+    </tbody></table>
+    """
+    path = tmp_path / "events.json"
+    path.write_text(events_to_json([listed("https://known", description="cached")]))
+
+    fetched = []
+
+    def mock_fetch(url):
+        fetched.append(url)
+        return "fresh", ["Teacher"]
+
+    monkeypatch.setattr(sfzc, "fetch_description", mock_fetch)
+    tracker = IncrementalCrawl.from_file(str(path))
+    events = sfzc.parse_events(html, "src", select=tracker.select)
+    assert fetched == ["https://new"]
+    assert [e.description for e in events] == ["cached", "fresh"]
+
+
+def test_missing_previous_file_means_full_crawl(tmp_path):
+    tracker = IncrementalCrawl.from_file(str(tmp_path / "missing.json"))
+    events = [listed("https://a")]
+    assert tracker.select(events) == events
+    assert tracker.finish().new == 1
+
+
+def test_repeated_crawl_reuses_events_sharing_a_link(monkeypatch, tmp_path, caplog):
+    html_path = os.path.join(os.path.dirname(__file__), "irc.html")
+    with open(html_path, encoding="utf-8") as fh:
+        html = fh.read()
+    monkeypatch.setattr("http_client.get", lambda url, **kwargs: MockResponse(text=html))
+    output = tmp_path / "events.json"
+    monkeypatch.setattr(sys, "argv", ["prog", "--no-cache", "--site", "irc", "--incremental", "--output", str(output)])
+
+    reports = []
+    for _ in range(2):
+        caplog.clear()
+        with caplog.at_level(logging.INFO, logger="incremental"):
+            parse_retreat_events.main()
+        reports += [r.getMessage() for r in caplog.records if r.getMessage().startswith("Incremental crawl")]
+
+    count = len(json.loads(output.read_text(encoding="utf-8")))
+    assert reports[1] == f"Incremental crawl: 0 new, 0 changed, {count} reused, 0 removed"
@@ -4,6 +4,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from dates import CENTER_TZ
 from sites import irc
 from models import RetreatDates, RetreatLocation
 
@@ -27,8 +28,8 @@ def test_parse_events_basic():
     evt = events[0]
     assert evt.title == "7-Day Retreat"
     assert evt.teachers == ["Teacher One", "Teacher Two"]
-    assert evt.dates.start == datetime(2025, 6, 29)
-    assert evt.dates.end == datetime(2025, 7, 13)
+    assert evt.dates.start == datetime(2025, 6, 29, tzinfo=CENTER_TZ)
+    assert evt.dates.end == datetime(2025, 7, 13, tzinfo=CENTER_TZ)
     assert evt.location.practice_center == "Insight Retreat Center"
     assert evt.location.city == "Santa Cruz"
     assert evt.location.region == "CA"
@@ -46,9 +47,43 @@ def test_parse_events_real_file():
     first = events[0]
     assert first.title.startswith("1 week Insight Retreat")
     assert first.teachers == ["Gil Fronsdal", "Nolitha Tsengiwe", "Devon Hase"]
-    assert first.dates.start == datetime(2025, 6, 1)
-    assert first.dates.end == datetime(2025, 6, 8)
+    assert first.dates.start == datetime(2025, 6, 1, tzinfo=CENTER_TZ)
+    assert first.dates.end == datetime(2025, 6, 8, tzinfo=CENTER_TZ)
     assert first.link.startswith("https://")
     assert first.location.practice_center == "Insight Retreat Center"
     assert first.other.get("address") == "1906 Glen Canyon Rd, Santa Cruz, CA 95060"
 
+
+
+FALLBACK_HTML = '''
+<div class="irc-retreat-listing-div-text">
+  <p class="irc-retreat-listing-p">
+    <strong>Daylong Retreat</strong> with <a href="/t1">Teacher One</a><br>
+    August 3 to 5, 2025 - 2 days
+  </p>
+  <p class="irc-retreat-listing-p">A short retreat.</p>
+</div>
+'''
+
+
+def test_parse_events_without_teacher_span():
+    events = irc.parse_events(FALLBACK_HTML, "https://source")
+    assert len(events) == 1
+    evt = events[0]
+    assert evt.teachers == ["Teacher One"]
+    assert evt.dates.start == datetime(2025, 8, 3, tzinfo=CENTER_TZ)
+    assert evt.dates.end == datetime(2025, 8, 5, tzinfo=CENTER_TZ)
+
+
+def test_skipped_containers_do_not_shift_fallbacks():
+    incomplete = '<div class="irc-retreat-listing-div-text"><p class="irc-retreat-listing-p">x</p></div>'
+    events = irc.parse_events(incomplete + FALLBACK_HTML, "https://source")
+    assert len(events) == 1
+    assert events[0].teachers == ["Teacher One"]
+
+
+def test_unparseable_month_leaves_dates_empty():
+    html = FALLBACK_HTML.replace("August 3 to 5", "Augst 3 to 5")
+    evt = irc.parse_events(html, "https://source")[0]
+    assert evt.dates.start is None
+    assert evt.dates.end is None
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import parse_retreat_events
+from metrics import Metrics, registry, run_measured, unwrap
+from models import RetreatDates, RetreatEvent, RetreatLocation
+from sites import sfzc
+
+LISTING = '''
+<table class="views-table">
+<caption>Saturday, Jun 29, 2025</caption>
+<tbody>
+<tr><td>9:00 am</td><td>Green Gulch</td><td><a href="https://example.com/r">3-Day Retreat</a></td></tr>
+</tbody>
+</table>
+'''
+
+
+def test_quantiles_use_nearest_rank():
+    m = Metrics()
+    for ms in range(1, 101):
+        m.record("stage", ms / 1000)
+    stage = m.summary()["stages"]["stage"]
+    assert stage["calls"] == 100
+    assert stage["p50"] == 0.05 and stage["p95"] == 0.095 and stage["max"] == 0.1
+
+
+def test_timed_counts_events_bytes_and_errors():
+    m = Metrics()
+
+    @m.timed("parse", events=len, nbytes=lambda html: len(html))
+    def parse(html):
+        if not html:
+            raise ValueError("empty page")
+        return html.split()
+
+    assert parse("a b c") == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        parse("")
+    stage = m.summary()["stages"]["parse"]
+    assert (stage["calls"], stage["events"], stage["bytes"], stage["errors"]) == (2, 3, 5, 1)
+
+
+def test_worker_metrics_are_merged():
+    registry.reset()
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(run_measured, sfzc.parse_listing, LISTING, f"page {i}") for i in range(4)]
+        results = [unwrap(future.result()) for future in futures]
+    assert [len(events) for events in results] == [1, 1, 1, 1]
+    stage = registry.summary()["stages"]["sfzc.parse_listing"]
+    assert stage["calls"] == 4 and stage["events"] == 4 and stage["bytes"] == 4 * len(LISTING)
+
+
+def test_prometheus_text():
+    m = Metrics()
+    m.record("http.request", 0.25, nbytes=1024)
+    m.add("http.responses", status=200)
+    m.add("http.responses", 2, status=429)
+    text = m.to_prometheus()
+    assert '# TYPE retreat_stage_seconds summary' in text
+    assert 'retreat_stage_seconds{stage="http.request",quantile="0.95"} 0.25' in text
+    assert 'retreat_stage_seconds_count{stage="http.request"} 1' in text
+    assert 'retreat_stage_bytes_total{stage="http.request"} 1024' in text
+    assert 'retreat_http_responses_total{status="429"} 2' in text
+    assert text.count("# TYPE retreat_http_responses_total counter") == 1
+
+
+def test_main_profile_and_metrics_file(tmp_path, monkeypatch, capsys):
+    def fake_events(**kwargs):
+        for i in range(3):
+            yield RetreatEvent(
+                title=f"Retreat {i}",
+                dates=RetreatDates(start=datetime(2025, 6, 1 + i)),
+                teachers=[],
+                location=RetreatLocation(practice_center="Green Gulch"),
+                description="",
+                link=f"https://example.com/{i}",
+            )
+
+    registry.reset()
+    monkeypatch.setattr("parse_retreat_events.iter_all_sites", fake_events)
+    output = tmp_path / "events.jsonl"
+    metrics_file = tmp_path / "metrics.json"
+    monkeypatch.setattr(sys, "argv", [
+        "prog", "--no-cache", "--output", str(output), "--profile", "--metrics-file", str(metrics_file),
+    ])
+    parse_retreat_events.main()
+
+    assert "p95 ms" in capsys.readouterr().err
+    summary = json.loads(metrics_file.read_text(encoding="utf-8"))
+    assert summary["stages"]["crawl"]["events"] == 3
+    assert summary["counters"]["dedup.received"] == 3
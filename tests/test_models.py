@@ -0,0 +1,71 @@
+import sys
+import os
+import pickle
+from dataclasses import FrozenInstanceError, asdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import make_event
+from models import LocationRegistry, RetreatLocation, locations
+from sites import sfzc, spiritrock
+
+
+def test_models_have_no_instance_dict():
+    event = make_event(teachers=["Teacher One"], other={"source": "src"})
+    for obj in (event, event.dates, event.location):
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        event.extra = 1
+
+
+def test_models_still_behave_like_dataclasses():
+    event = make_event(teachers=["Teacher One"], other={"source": "src"})
+    assert asdict(event)["location"]["practice_center"] == "Tassajara"
+    assert pickle.loads(pickle.dumps(event)) == event
+    with pytest.raises(FrozenInstanceError):
+        event.location.city = "Carmel Valley"
+
+
+def test_registry_shares_locations_and_strings():
+    registry = LocationRegistry()
+    name = "".join(["Green ", "Gulch"])
+    first = registry.location(name, "Muir Beach", "CA", "USA")
+    second = registry.location("Green Gulch", "Muir Beach", "CA", "USA")
+    assert first is second
+    assert first.practice_center is sys.intern("Green Gulch")
+    assert registry.location("Tassajara") is not first
+    assert len(registry) == 2
+
+
+def test_parsed_events_share_location():
+    html = """
+    <table class="views-table"><caption>Sunday, Jun 29, 2025</caption><tbody>
+      <tr><td>9:00 AM</td><td>Tassajara</td><td><a href="/a">Sesshin</a></td></tr>
+      <tr><td>9:00 AM</td><td>Tassajara</td><td><a href="/b">Zazenkai</a></td></tr>
+    </tbody></table>
+    """
+    first, second = sfzc.parse_listing(html, "src")
+    assert first.location is second.location
+    assert first.location.city == "Carmel Valley"
+
+
+def test_spiritrock_other_is_compact():
+    event = spiritrock.hit_to_event(
+        {"title": "Retreat", "eventCode": "123R25", "programTypeName": "Retreat",
+         "creditCount": 0, "duration": "", "extra": "value"}
+    )
+    assert event.other == {
+        "eventCode": "123R25",
+        "programType": "Retreat",
+        "credits": "0",
+        "address": "5000 Sir Francis Drake Blvd Box 169, Woodacre, CA 94973",
+        "extra": "value",
+    }
+
+
+def test_unpickled_locations_are_shared():
+    location = locations.location("Spirit Rock", "Woodacre", "CA", "USA")
+    copy = pickle.loads(pickle.dumps(make_event(location=RetreatLocation("Spirit Rock", "Woodacre", "CA", "USA"))))
+    assert copy.location is location
@@ -7,10 +7,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from parse_retreat_events import (
     fetch_retreat_events,
     fetch_all_retreats,
+    iter_retreat_events,
     main as parse_main,
 )
 import json
+import threading
+import time
 from models import RetreatEvent, RetreatDates, RetreatLocation
+from conftest import MockResponse
+from sites import sfzc
 
 SAMPLE_HTML_RETREAT = '''
 <table class="views-table">
@@ -43,19 +48,10 @@ SAMPLE_JSON_NONE = [{"data": SAMPLE_HTML_NONE}]
 
 
 def test_fetch_retreat_events(monkeypatch):
-    class MockResponse:
-        def __init__(self, payload):
-            self.payload = payload
-            self.text = "unused"
-        def raise_for_status(self):
-            pass
-        def json(self):
-            return self.payload
-
     def mock_get(url, **kwargs):
         return MockResponse(SAMPLE_JSON_RETREAT)
 
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("http_client.get", mock_get)
     events = fetch_retreat_events("https://dummy?page={page}", pages=1)
     assert len(events) == 1
     evt = events[0]
@@ -65,15 +61,6 @@ def test_fetch_retreat_events(monkeypatch):
 
 
 def test_fetch_all_retreats(monkeypatch):
-    class MockResponse:
-        def __init__(self, payload):
-            self.payload = payload
-            self.text = "unused"
-        def raise_for_status(self):
-            pass
-        def json(self):
-            return self.payload
-
     responses = {
         "https://one": SAMPLE_JSON_RETREAT,
         "https://two": SAMPLE_JSON_NONE,
@@ -83,7 +70,7 @@ def test_fetch_all_retreats(monkeypatch):
         base = url.split("?")[0]
         return MockResponse(responses[base])
 
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("http_client.get", mock_get)
     events = fetch_all_retreats(list(responses.keys()), pages=1)
     assert len(events) == 1
     evt = events[0]
@@ -106,10 +93,14 @@ def test_main_writes_output(tmp_path, monkeypatch):
             )
         ]
 
+    async def mock_crawl(url, pages, parser, params=None):
+        return mock_fetch(url, pages=pages, parser=parser, params=params)
+
     monkeypatch.setattr("parse_retreat_events.fetch_retreat_events", mock_fetch)
+    monkeypatch.setattr("crawler.crawl_listing", mock_crawl)
     monkeypatch.setattr(
-        "parse_retreat_events.spiritrock.parse_algolia_events",
-        lambda: mock_fetch("https://spiritrock"),
+        "sites.spiritrock.parse_algolia_events",
+        lambda **kwargs: mock_fetch("https://spiritrock"),
     )
 
     output = tmp_path / "events.json"
@@ -118,3 +109,126 @@ def test_main_writes_output(tmp_path, monkeypatch):
 
     contents = json.loads(output.read_text(encoding="utf-8"))
     assert contents[0]["title"] == "3-Day Retreat"
+
+
+def test_fetch_retreat_events_fetches_pages_concurrently(monkeypatch):
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+    overlapped = threading.Event()
+
+    def mock_get(url, **kwargs):
+        page = int(url.rsplit("=", 1)[1])
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            if in_flight[0] > 1:
+                overlapped.set()
+        # Hold each request until another one is in flight; a sequential crawl times out here
+        overlapped.wait(timeout=2)
+        # Later pages answer first, so results must be put back in page order
+        time.sleep(0.01 * (3 - page))
+        with lock:
+            in_flight[0] -= 1
+        html = SAMPLE_HTML_RETREAT.replace("3-Day Retreat", f"Retreat {page}")
+        return MockResponse([{"data": html}])
+
+    monkeypatch.setattr("http_client.get", mock_get)
+    events = fetch_retreat_events("https://dummy?page={page}", pages=4, parser=sfzc.parse_listing)
+    assert [e.title for e in events] == [f"Retreat {i}" for i in range(4)]
+    assert peak[0] > 1
+
+
+def test_iter_retreat_events_streams_page_by_page(monkeypatch):
+    requested = []
+
+    def mock_get(url, **kwargs):
+        requested.append(url)
+        page = int(url.rsplit("=", 1)[1])
+        html = SAMPLE_HTML_RETREAT.replace("3-Day Retreat", f"Retreat {page}")
+        return MockResponse([{"data": html}])
+
+    monkeypatch.setattr("http_client.get", mock_get)
+    stream = iter_retreat_events("https://dummy?page={page}", pages=5, parser=sfzc.parse_listing)
+    first = next(stream)
+    assert first.title == "Retreat 0"
+    # Only the current page and the prefetched next one have been requested
+    assert len(requested) <= 2
+    assert [e.title for e in stream] == [f"Retreat {i}" for i in range(1, 5)]
+
+
+def test_main_streams_jsonl(tmp_path, monkeypatch):
+    def fake_events(**kwargs):
+        for i in range(3):
+            yield RetreatEvent(
+                title=f"Retreat {i}",
+                dates=RetreatDates(start=datetime(2025, 6, 1 + i)),
+                teachers=[],
+                location=RetreatLocation(practice_center="Green Gulch"),
+                description="",
+                link=f"https://example.com/{i}",
+            )
+
+    monkeypatch.setattr("parse_retreat_events.iter_all_sites", fake_events)
+    output = tmp_path / "events.jsonl"
+    monkeypatch.setattr(sys, "argv", ["prog", "--no-cache", "--output", str(output)])
+    parse_main()
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Retreat 0", "Retreat 1", "Retreat 2"]
+    assert json.loads(lines[0])["dates"]["start"] == "2025-06-01T00:00:00"
+
+
+class PagedResponse:
+    def __init__(self, text):
+        self.text = text
+    def raise_for_status(self):
+        pass
+    def json(self):
+        raise ValueError("not json")
+
+
+def paged_site(monkeypatch, pages, pager):
+    """Serve ``pages`` listing pages followed by empty ones."""
+    requested = []
+
+    def mock_get(url, **kwargs):
+        page = int(url.rsplit("=", 1)[1])
+        requested.append(page)
+        if page >= pages:
+            return PagedResponse("<p>No events</p>")
+        html = SAMPLE_HTML_RETREAT.replace("3-Day Retreat", f"Retreat {page}")
+        return PagedResponse(html + pager(page))
+
+    monkeypatch.setattr("http_client.get", mock_get)
+    return requested
+
+
+def test_auto_pages_uses_last_page_from_pager(monkeypatch):
+    pager = lambda page: (
+        '<ul class="pager"><li class="pager__item pager__item--last">'
+        '<a href="/calendar?page=3">Last</a></li></ul>'
+    )
+    requested = paged_site(monkeypatch, 4, pager)
+    events = fetch_retreat_events("https://dummy?page={page}", pages=None, parser=sfzc.parse_listing)
+    assert [e.title for e in events] == [f"Retreat {i}" for i in range(4)]
+    assert sorted(requested) == [0, 1, 2, 3]
+
+
+def test_auto_pages_follows_next_links(monkeypatch):
+    pager = lambda page: (
+        f'<ul class="pager"><li class="pager__item"><a rel="next" href="/calendar?page={page + 1}">More</a></li></ul>'
+        if page < 2 else ""
+    )
+    requested = paged_site(monkeypatch, 5, pager)
+    events = fetch_retreat_events("https://dummy?page={page}", pages=None, parser=sfzc.parse_listing)
+    assert [e.title for e in events] == ["Retreat 0", "Retreat 1", "Retreat 2"]
+    assert requested == [0, 1, 2]
+
+
+def test_auto_pages_stops_at_empty_page(monkeypatch):
+    pager = lambda page: '<ul class="pager"><li><a rel="next" href="?page=9">More</a></li></ul>'
+    requested = paged_site(monkeypatch, 2, pager)
+    events = list(iter_retreat_events("https://dummy?page={page}", pages=None, parser=sfzc.parse_listing))
+    assert [e.title for e in events] == ["Retreat 0", "Retreat 1"]
+    assert requested == [0, 1, 2]
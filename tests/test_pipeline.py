@@ -0,0 +1,114 @@
+import sys
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import crawler
+import pipeline
+from parse_retreat_events import iter_retreat_events, site_stages
+from conftest import MockResponse
+from sites import SITES, sfzc
+
+LISTING = '''
+<table class="views-table">
+<caption>Saturday, Jun 29, 2025</caption>
+<tbody>
+<tr>
+    <td>9:00 am</td>
+    <td>Green Gulch</td>
+    <td><a href="https://example.com/retreat-{page}">Retreat {page}</a></td>
+</tr>
+</tbody>
+</table>
+'''
+
+DETAIL = '<meta property="og:description" content="About {page}">'
+
+
+def slow_parse(html, source):
+    # Later pages finish first, so ordering has to come from the pipeline
+    time.sleep(random.uniform(0, 0.02))
+    return [html]
+
+
+def test_parse_pages_keeps_page_order():
+    source = ((f"page {i}", f"url {i}") for i in range(30))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(pipeline.parse_pages(source, slow_parse, executor, queue_size=4))
+    assert results == [[f"page {i}"] for i in range(30)]
+
+
+def test_fetching_waits_for_a_full_queue():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(50):
+            produced.append(i)
+            yield f"page {i}", ""
+
+    def blocked_parse(html, source):
+        release.wait()
+        return [html]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pages = pipeline.parse_pages(source(), blocked_parse, executor, queue_size=4)
+        first = threading.Thread(target=next, args=(pages,))
+        first.start()
+        time.sleep(0.3)
+        # At most queue_size pages submitted, queue_size queued, one in hand
+        assert len(produced) <= 2 * 4 + 1
+        release.set()
+        first.join()
+        assert len(list(pages)) == 49
+
+
+def test_fetch_errors_reach_the_consumer():
+    def source():
+        yield "page 0", ""
+        raise RuntimeError("503 Server Error")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(RuntimeError, match="503"):
+            list(pipeline.parse_pages(source(), slow_parse, executor))
+
+
+def test_iter_pages_fetches_ahead_up_to_the_last_page(monkeypatch):
+    requested = []
+
+    def mock_get(url, **kwargs):
+        page = int(url.rsplit("=", 1)[1])
+        requested.append(page)
+        pager = '<ul class="pager"><li class="pager__item--last"><a href="?page=5">Last</a></li></ul>'
+        return MockResponse(text=LISTING.format(page=page) + pager)
+
+    monkeypatch.setattr("http_client.get", mock_get)
+    pages = list(crawler.iter_pages("https://dummy?page={page}", None, inspect=sfzc.inspect_page, fetchers=3))
+    assert [url for _, url in pages] == [f"https://dummy?page={i}" for i in range(6)]
+    assert sorted(requested) == list(range(6))
+
+
+def test_process_pool_matches_inline_parsing(monkeypatch):
+    def mock_get(url, **kwargs):
+        if "retreat-" in url:
+            return MockResponse(text=DETAIL.format(page=url.rsplit("-", 1)[1]))
+        return MockResponse(text=LISTING.format(page=int(url.rsplit("=", 1)[1])))
+
+    monkeypatch.setattr("http_client.get", mock_get)
+    url = "https://dummy?page={page}"
+    inline = list(iter_retreat_events(url, pages=6, parser=sfzc.parse_events))
+
+    with pipeline.parse_pool(2) as pool:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        parser, enrich = site_stages(SITES["sfzc"], {"workers": 4}, parse_pool=pool)
+        piped = list(iter_retreat_events(url, pages=6, parser=parser, parse_pool=pool, enrich=enrich, fetchers=3))
+
+    assert [e.title for e in piped] == [f"Retreat {i}" for i in range(6)]
+    assert [e.description for e in piped] == [f"About {i}" for i in range(6)]
+    assert piped == inline
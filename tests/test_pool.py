@@ -0,0 +1,42 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pool import host_of, imap_bounded
+
+
+def test_host_of():
+    assert host_of("https://WWW.Example.com/path?q=1") == "www.example.com"
+    assert host_of("") == ""
+
+
+def test_imap_bounded_respects_per_host_limit():
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+    lock = threading.Lock()
+
+    def work(item):
+        host = item[0]
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+        time.sleep(0.01)
+        with lock:
+            active[host] -= 1
+        return item.upper()
+
+    items = [f"{h}{i}" for h in "ab" for i in range(6)]
+    results = dict(imap_bounded(work, items, workers=8, per_host=2, key=lambda s: s[0]))
+    assert results == {item: item.upper() for item in items}
+    assert peak["a"] <= 2
+    assert peak["b"] <= 2
+
+
+def test_imap_bounded_inline_when_single_worker():
+    seen = []
+    out = list(imap_bounded(lambda x: seen.append(x) or x * 2, [1, 2, 3], workers=1))
+    assert out == [(1, 2), (2, 4), (3, 6)]
+    assert seen == [1, 2, 3]
@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from render_page import build_search_index, group_shards, read_records, render_site, tokens
+
+
+def record(title, center, start):
+    return {
+        "title": title,
+        "dates": {"start": start, "end": None},
+        "teachers": [],
+        "location": {"practice_center": center, "city": "", "country": ""},
+        "description": "",
+        "link": "https://example.com",
+        "other": {},
+    }
+
+
+RECORDS = [
+    record("B retreat", "Tassajara", "2025-07-02T09:00:00"),
+    record("A retreat", "Tassajara", "2025-07-01T09:00:00"),
+    record("Day of practice", "City Center", "2025-07-05T09:00:00"),
+    record("June sesshin", "Tassajara", "2025-06-20T09:00:00"),
+    record("Someday", None, None),
+]
+
+
+def test_group_shards_by_month_and_center():
+    shards = group_shards(RECORDS)
+    assert [(s["month"], s["center"], s["count"]) for s in shards] == [
+        ("2025-06", "Tassajara", 1),
+        ("2025-07", "City Center", 1),
+        ("2025-07", "Tassajara", 2),
+        ("undated", "Other", 1),
+    ]
+    assert [r["title"] for r in shards[2]["retreats"]] == ["A retreat", "B retreat"]
+    assert shards[2]["path"] == "shards/tassajara/2025-07.html"
+    assert shards[0]["label"] == "June 2025"
+
+
+def test_render_site_writes_index_and_shards(tmp_path):
+    records = RECORDS + [record("<Silent> & still", "City Center", "2025-07-09T09:00:00")]
+    shards = render_site(records, str(tmp_path))
+
+    index = (tmp_path / "index.html").read_text(encoding="utf-8")
+    for shard in shards:
+        assert f'data-src="{shard["path"]}"' in index
+        assert (tmp_path / shard["path"]).exists()
+    assert "A retreat" not in index
+    assert json.loads((tmp_path / "search-index.json").read_text(encoding="utf-8"))["count"] == 6
+
+    city = (tmp_path / "shards" / "city-center" / "2025-07.html").read_text(encoding="utf-8")
+    assert "Day of practice" in city
+    assert "&lt;Silent&gt; &amp; still" in city
+
+
+def test_tokens_fold_case_and_accents():
+    assert tokens("Vipassanā Retreat with the Teachers, 2025") == {"vipassana", "retreat", "teachers", "2025"}
+
+
+def test_search_index_ids_follow_shard_order():
+    shards = group_shards(RECORDS)
+    index = build_search_index(shards)
+
+    assert [s["first"] for s in shards] == [0, 1, 2, 4]
+    assert index["count"] == 5
+    assert index["centers"] == ["City Center", "Other", "Tassajara"]
+    assert index["center"] == [2, 0, 2, 2, 1]
+    # 2025-06-20 is day 20259 after the epoch
+    assert index["start"][0] == 20259
+    assert index["start"][4] is None
+    assert index["byStart"] == [0, 2, 3, 1]
+    assert index["startSorted"] == sorted(index["startSorted"])
+    assert index["postings"][index["terms"].index("retreat")] == [2, 3]
+    assert "the" not in index["terms"]
+
+
+def test_read_records_filters_by_date(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps(RECORDS), encoding="utf-8")
+    found = read_records(str(path), date(2025, 7, 1), date(2025, 7, 3))
+    assert [r["title"] for r in found] == ["B retreat", "A retreat"]
+    assert len(read_records(str(path))) == len(RECORDS)
@@ -0,0 +1,111 @@
+import sys
+import os
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import serialization
+from conftest import make_event
+from models import RetreatLocation
+from serialization import event_to_dict, load_events, load_records, write_events, write_jsonl
+
+
+def sesshin(i=0, start=datetime(2025, 6, 29, 9, 0)):
+    """A fully filled-in event; ``i`` varies its title, link and code."""
+    return make_event(
+        f"Sesshin {i} – Tassajara",
+        start,
+        datetime(2025, 7, 6, 12, 30),
+        location=RetreatLocation("Tassajara", "Carmel Valley", "CA", "USA"),
+        teachers=["Teacher One"],
+        description="Seven days of zazen",
+        link=f"https://example.com/{i}",
+        other={"source": "src", "eventCode": str(i)},
+    )
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_dates_use_fixed_iso_format():
+    aware = datetime(2025, 6, 29, 9, 0, 15, 123, tzinfo=timezone.utc)
+    record = event_to_dict(sesshin(start=aware))
+    assert record["dates"] == {"start": "2025-06-29T09:00:15+00:00", "end": "2025-07-06T12:30:00"}
+
+
+@pytest.mark.parametrize("pretty", [True, False])
+def test_write_events_matches_json_dumps(encoder, pretty):
+    events = [sesshin(i) for i in range(3)]
+    out = io.StringIO()
+    assert write_events(events, out, pretty=pretty) == 3
+
+    records = [event_to_dict(e) for e in events]
+    if pretty:
+        expected = json.dumps(records, indent=2, ensure_ascii=False)
+    else:
+        expected = json.dumps(records, separators=(",", ":"), ensure_ascii=False)
+    assert out.getvalue() == expected
+
+
+@pytest.mark.parametrize("pretty", [True, False])
+def test_write_events_empty(pretty):
+    out = io.StringIO()
+    assert write_events([], out, pretty=pretty) == 0
+    assert json.loads(out.getvalue()) == []
+
+
+@pytest.mark.parametrize("name", ["events.json", "events.jsonl"])
+def test_round_trip(encoder, tmp_path, name):
+    events = [sesshin(i) for i in range(3)]
+    path = tmp_path / name
+    with open(path, "w", encoding="utf-8") as fh:
+        (write_jsonl if name.endswith(".jsonl") else write_events)(events, fh)
+
+    assert load_events(str(path)) == events
+    assert load_records(str(path))[0]["title"] == "Sesshin 0 – Tassajara"
+
+
+def test_load_events_reads_older_date_format(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps([event_to_dict(sesshin())]).replace("T09:00:00", " 09:00:00"))
+    assert load_events(str(path))[0].dates.start == datetime(2025, 6, 29, 9, 0)
+
+
+def test_encoders_agree_on_crawled_records(monkeypatch):
+    from sites import spiritrock
+
+    if serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    hit = {
+        "objectID": "42",
+        "title": "Insight Retreat – Woodacre",
+        "url": "https://www.spiritrock.org/e/42",
+        "startDate": 1751209200,
+        "endDate": "2025-07-06T15:00:00Z",
+        "teacherNames": ["Teacher One"],
+        "eventCode": "SR42",
+        "programTypeName": "Retreat",
+        "duration": 7,
+        "creditCount": 10.5,
+        "postDateString": "",
+        "isFeatured": True,
+        "price": {"member": 1200, "sliding": [600, 900.0]},
+        "notes": None,
+    }
+    records = [event_to_dict(sesshin(i)) for i in range(2)]
+    records.append(event_to_dict(spiritrock.hit_to_event(hit)))
+    for pretty in (True, False):
+        with_orjson = serialization.dumps(records, pretty)
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert serialization.dumps(records, pretty) == with_orjson
+        monkeypatch.undo()
@@ -1,9 +1,11 @@
 import sys
 import os
+import time
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from dates import CENTER_TZ
 from sites import sfzc
 from models import RetreatLocation, RetreatDates
 
@@ -23,7 +25,7 @@ SAMPLE_TEMPLATE = """
 
 def parse_single(center: str):
     html = SAMPLE_TEMPLATE.format(center=center)
-    events = sfzc.parse_events(html, "https://source")
+    events = sfzc.parse_listing(html, "https://source")
     assert len(events) == 1
     return events[0]
 
@@ -35,6 +37,7 @@ def test_city_center_address():
     assert evt.location.region == "CA"
     assert evt.location.country == "USA"
     assert evt.other.get("address") == "300 Page St, San Francisco, CA 94102"
+    assert evt.dates.start == datetime(2025, 6, 29, 9, 0, tzinfo=CENTER_TZ)
 
 
 def test_green_gulch_address():
@@ -81,11 +84,59 @@ def test_fetch_description_teachers(monkeypatch):
         def raise_for_status(self):
             pass
 
-    def mock_get(url, headers=None, timeout=10):  # noqa: D401
+    def mock_get(url, **kwargs):  # noqa: D401
         return MockResp(sample_detail)
 
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("http_client.get", mock_get)
 
     desc, teachers = sfzc.fetch_description("https://example.com/retreat")
     assert desc == "An engaging retreat"
     assert teachers == ["Teacher One", "Teacher Two"]
+
+
+def test_parse_events_enriches_in_listing_order(monkeypatch):
+    rows = "".join(
+        f'<tr><td>9:00 am</td><td>Tassajara</td>'
+        f'<td><a href="https://example.com/r{i}">Sesshin {i}</a></td></tr>'
+        for i in range(6)
+    )
+    html = (
+        '<table class="views-table"><caption>Saturday, Jun 29, 2025</caption>'
+        f"<tbody>{rows}</tbody></table>"
+    )
+
+    def mock_fetch(url):
+        idx = int(url.rsplit("r", 1)[1])
+        time.sleep(0.01 * (6 - idx))
+        return f"desc {idx}", [f"Teacher {idx}"]
+
+    monkeypatch.setattr(sfzc, "fetch_description", mock_fetch)
+
+    events = sfzc.parse_events(html, "https://source", workers=4)
+    assert [e.title for e in events] == [f"Sesshin {i}" for i in range(6)]
+    assert [e.description for e in events] == [f"desc {i}" for i in range(6)]
+    assert [e.teachers for e in events] == [[f"Teacher {i}"] for i in range(6)]
+
+
+def test_parse_listing_skips_detail_fetch(monkeypatch):
+    def fail(url):
+        raise AssertionError("detail page fetched")
+
+    monkeypatch.setattr(sfzc, "fetch_description", fail)
+    events = sfzc.parse_listing(SAMPLE_TEMPLATE.format(center="Green Gulch"), "src")
+    assert len(events) == 1
+    assert events[0].description == ""
+    assert events[0].teachers == []
+
+
+def test_inspect_page_reads_pager():
+    html = open(os.path.join(os.path.dirname(__file__), "sfzc.html"), encoding="utf-8").read()
+    info = sfzc.inspect_page(html)
+    assert info.has_listing
+    assert info.has_next
+    assert info.last_page is None
+
+    full_pager = '<ul class="pager"><li class="pager__item pager__item--last"><a href="?page=7">Last</a></li></ul>'
+    info = sfzc.inspect_page(full_pager)
+    assert not info.has_listing
+    assert info.last_page == 7
@@ -0,0 +1,61 @@
+import sys
+import os
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sites import API, SINGLE, SITES, selected_sites, site_names
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(code: str) -> set:
+    """Names of the modules imported by running ``code`` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print(' '.join(sys.modules))"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_registry_lists_every_site():
+    assert site_names() == ["sfzc", "irc", "spiritrock"]
+    assert [site.name for site in selected_sites("all")] == site_names()
+    assert selected_sites("irc") == [SITES["irc"]]
+    assert SITES["irc"].pagination == SINGLE and SITES["spiritrock"].pagination == API
+
+
+def test_hooks_resolve_to_module_functions():
+    from sites import sfzc
+
+    site = SITES["sfzc"]
+    assert site.hook("parser") is sfzc.parse_events
+    assert site.hook("listing_parser") is sfzc.parse_listing
+    assert SITES["irc"].hook("enrich") is None
+    assert site.listing_url() == sfzc.CALENDAR_URL
+    with pytest.raises(ValueError):
+        SITES["spiritrock"].listing_url()
+
+
+def test_startup_imports_no_site_or_heavy_dependency():
+    modules = loaded_modules("import parse_retreat_events, render_page")
+    assert not modules & {"bs4", "requests", "jinja2", "sites.sfzc", "sites.irc", "sites.spiritrock"}
+
+
+def test_one_site_imports_only_its_module():
+    modules = loaded_modules(
+        "import argparse, parse_retreat_events as p\n"
+        "from sites import selected_sites\n"
+        "args = argparse.Namespace(site='irc')\n"
+        "sites = selected_sites(args.site)\n"
+        "p.configure_cache(None, sites)\n"
+        "p.site_options(args, sites)\n"
+        "p.site_stages(sites[0])"
+    )
+    assert "sites.irc" in modules
+    assert not modules & {"sites.sfzc", "sites.spiritrock"}
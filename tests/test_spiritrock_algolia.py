@@ -1,9 +1,12 @@
 import sys
 import os
-from datetime import datetime, timezone
+import logging
+from datetime import date, datetime, timezone
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from dates import to_timestamp
+from metrics import registry
 from sites import spiritrock
 
 SAMPLE_HIT = {
@@ -24,12 +27,13 @@ SAMPLE_HIT = {
 
 
 def test_parse_algolia_events(monkeypatch):
-    def mock_fetch(page=0, hits_per_page=100):
+    def mock_fetch(page=0, hits_per_page=100, query=None, url=None):
         if page == 0:
-            return [SAMPLE_HIT]
-        return []
+            return {"hits": [SAMPLE_HIT]}
+        return {"hits": []}
 
-    monkeypatch.setattr(spiritrock, "fetch_algolia_page", mock_fetch)
+    monkeypatch.setattr(spiritrock, "fetch_algolia_response", mock_fetch)
+    monkeypatch.setattr(spiritrock, "load_description", lambda url: "Full description")
 
     events = spiritrock.parse_algolia_events(max_pages=2)
     assert len(events) == 1
@@ -40,3 +44,136 @@ def test_parse_algolia_events(monkeypatch):
     assert evt.dates.end == datetime(2025, 7, 6, 15, 0, tzinfo=timezone.utc)
     assert evt.location.city == "Woodacre"
     assert evt.other.get("extra") == "value"
+    assert evt.description == "Full description"
+
+
+def test_parse_algolia_events_reports_failed_descriptions(monkeypatch):
+    hits = [dict(SAMPLE_HIT, url=f"https://example.com/r{i}") for i in range(4)]
+
+    def mock_fetch(page=0, hits_per_page=100, query=None, url=None):
+        return {"hits": hits if page == 0 else []}
+
+    def mock_load(url):
+        if url.endswith("r2"):
+            raise RuntimeError("503 Server Error")
+        return f"desc {url[-1]}"
+
+    monkeypatch.setattr(spiritrock, "fetch_algolia_response", mock_fetch)
+    monkeypatch.setattr(spiritrock, "load_description", mock_load)
+
+    events = spiritrock.parse_algolia_events(max_pages=3, workers=4, per_host=2)
+    assert [e.link for e in events] == [h["url"] for h in hits]
+    assert [e.description for e in events] == ["desc 0", "desc 1", "", "desc 3"]
+    assert events[2].other["descriptionError"] == "503 Server Error"
+    assert "descriptionError" not in events[0].other
+
+
+def stub_hits():
+    base = to_timestamp(date(2030, 1, 1))
+    hits = []
+    for i in range(6):
+        hits.append({
+            "objectID": str(i),
+            "title": f"Event {i}",
+            "url": f"https://example.com/e{i}",
+            "startDate": base + (i - 1) * 86400,
+            "endDate": base + i * 86400,
+            "programTypeName": "Retreat" if i % 2 == 0 else "Class",
+            "eventCode": f"SR{i}",
+            "teacherNames": ["Teacher"],
+            "longDescriptionHtml": "<p>" + "x" * 500 + "</p>",
+        })
+    return hits
+
+
+def test_algolia_query_params():
+    query = spiritrock.AlgoliaQuery(program_types=["Retreat", "Daylong"], start_from=None)
+    params = dict(pair.split("=", 1) for pair in query.params(2, 50).split("&"))
+    assert params["page"] == "2"
+    assert params["hitsPerPage"] == "50"
+    assert "startDate" not in query.filters()
+    assert query.filters() == '(programTypeName:"Retreat" OR programTypeName:"Daylong")'
+    assert "attributesToRetrieve" in params
+
+
+def test_filters_and_projection_are_pushed_to_algolia(monkeypatch):
+    from algolia_stub import AlgoliaStub
+
+    described = []
+
+    def mock_load(url):
+        described.append(url)
+        return "desc"
+
+    monkeypatch.setattr(spiritrock, "load_description", mock_load)
+    with AlgoliaStub(stub_hits()) as stub:
+        monkeypatch.setattr(spiritrock, "ALGOLIA_URL", stub.url)
+        query = spiritrock.AlgoliaQuery(start_from=datetime(2030, 1, 1).date())
+        events = spiritrock.parse_algolia_events(max_pages=3, query=query)
+
+    # Event 0 started before the cutoff and odd events are classes
+    assert [e.title for e in events] == ["Event 2", "Event 4"]
+    assert sorted(described) == ["https://example.com/e2", "https://example.com/e4"]
+    assert "longDescriptionHtml" not in events[0].other
+    assert stub.queries[0]["filters"].startswith('programTypeName:"Retreat" AND startDate >= ')
+
+
+def test_remaining_pages_are_planned_from_nb_pages(monkeypatch):
+    from algolia_stub import AlgoliaStub
+
+    monkeypatch.setattr(spiritrock, "load_description", lambda url: "")
+    monkeypatch.setattr(spiritrock, "HITS_PER_PAGE", 2)
+    hits = [dict(h, programTypeName="Retreat") for h in stub_hits()]
+    query = spiritrock.AlgoliaQuery(start_from=None)
+    with AlgoliaStub(hits) as stub:
+        monkeypatch.setattr(spiritrock, "ALGOLIA_URL", stub.url)
+        registry.reset()
+        events = spiritrock.parse_algolia_events(max_pages=10, query=query)
+        pages_requested = sorted(int(q["page"]) for q in stub.queries)
+        seconds, hit_count, _nbytes, _errors = registry.snapshot()["stages"]["spiritrock.fetch_algolia_page"]
+
+        # max_pages still caps the crawl
+        stub.queries.clear()
+        capped = spiritrock.parse_algolia_events(max_pages=2, query=query)
+        capped_pages = sorted(int(q["page"]) for q in stub.queries)
+
+    assert [e.title for e in events] == [f"Event {i}" for i in range(6)]
+    # Three pages of two hits, and no extra request for an empty page
+    assert pages_requested == [0, 1, 2]
+    # The first page is timed like the rest
+    assert (len(seconds), hit_count) == (3, 6)
+    assert [e.title for e in capped] == [f"Event {i}" for i in range(4)]
+    assert capped_pages == [0, 1]
+
+
+def test_default_query_keeps_string_dated_hits(monkeypatch, caplog):
+    from algolia_stub import AlgoliaStub
+
+    monkeypatch.setattr(spiritrock, "load_description", lambda url: "")
+    hits = [dict(SAMPLE_HIT, objectID="1", programTypeName="Retreat")]
+    with AlgoliaStub(hits) as stub:
+        monkeypatch.setattr(spiritrock, "ALGOLIA_URL", stub.url)
+        events = spiritrock.parse_algolia_events(max_pages=1)
+        # A numeric date bound never matches an ISO string attribute
+        with caplog.at_level(logging.WARNING):
+            dated = spiritrock.parse_algolia_events(
+                max_pages=1, query=spiritrock.AlgoliaQuery(start_from=datetime(2025, 1, 1).date())
+            )
+
+    assert "startDate" not in stub.queries[0]["filters"]
+    assert [e.title for e in events] == ["Weeklong Retreat"]
+    assert events[0].dates.start == datetime(2025, 6, 29, 15, 0, tzinfo=timezone.utc)
+    assert "objectID" not in events[0].other
+    assert dated == []
+    assert "no Spirit Rock events for filters" in caplog.text
+
+
+def test_default_program_type_matches_the_site_listing():
+    from html_parsing import make_soup
+
+    path = os.path.join(os.path.dirname(__file__), "spiritrock.html")
+    with open(path, encoding="utf-8") as fh:
+        soup = make_soup(fh.read())
+    # The program type label on each card of the retreat listing
+    labels = {e.get_text(strip=True) for e in soup.select(".uppercase.text-base span.font-semibold")}
+    assert labels == set(spiritrock.RETREAT_PROGRAM_TYPES)
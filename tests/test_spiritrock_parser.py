@@ -18,9 +18,9 @@ class MockResp:
         pass
 
 def test_fetch_description(monkeypatch):
-    def mock_get(url, headers=None, timeout=10):
+    def mock_get(url, **kwargs):
         return MockResp(SAMPLE_DETAIL)
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("http_client.get", mock_get)
     desc = spiritrock.fetch_description("https://example.com/event")
     assert desc == "Full retreat description"
 
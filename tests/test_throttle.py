@@ -0,0 +1,73 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import http_client
+from throttle import HostLimit, HostScheduler
+from conftest import FakeResponse, make_client
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    scheduler = HostScheduler({"a.example": HostLimit(rate=20.0, burst=2, max_in_flight=10)})
+    started = time.monotonic()
+    for _ in range(6):
+        scheduler.acquire("a.example")
+        scheduler.release("a.example", 200)
+    elapsed = time.monotonic() - started
+    # Two requests from the burst, four more at 20 per second
+    assert 0.18 <= elapsed < 1.0
+    stats = scheduler.stats()["a.example"]
+    assert stats.requests == 6 and stats.max_wait > 0
+
+
+def test_in_flight_limit_blocks_until_release():
+    scheduler = HostScheduler(default=HostLimit(rate=1000.0, burst=10, max_in_flight=2))
+    scheduler.acquire("a.example")
+    scheduler.acquire("a.example")
+    third = threading.Thread(target=scheduler.acquire, args=("a.example",))
+    third.start()
+    third.join(0.1)
+    assert third.is_alive()
+    # Other hosts are not held up
+    scheduler.acquire("b.example")
+    scheduler.release("a.example", 200)
+    third.join(1.0)
+    assert not third.is_alive()
+
+
+def test_retry_after_pauses_the_host_and_halves_the_rate():
+    scheduler = HostScheduler(default=HostLimit(rate=100.0, burst=5, max_in_flight=5))
+    scheduler.acquire("a.example")
+    scheduler.release("a.example", 429, retry_after=0.2)
+    assert scheduler.stats()["a.example"].rate == 50.0
+
+    waited = scheduler.acquire("a.example")
+    assert waited >= 0.2
+    scheduler.release("a.example", 200)
+    stats = scheduler.stats()["a.example"]
+    assert stats.throttled == 1
+    assert 50.0 < stats.rate < 100.0
+
+
+def test_errors_without_retry_after_do_not_throttle():
+    scheduler = HostScheduler()
+    scheduler.acquire("a.example")
+    scheduler.release("a.example", 503)
+    scheduler.acquire("a.example")
+    scheduler.release("a.example", None)
+    assert scheduler.stats()["a.example"].throttled == 0
+
+
+def test_client_reports_responses_to_the_scheduler(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    scheduler = HostScheduler(default=HostLimit(rate=1000.0, burst=5, max_in_flight=1))
+    client, fake = make_client(
+        [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200)],
+        scheduler=scheduler,
+    )
+    assert client.get("https://a.example/page").status_code == 200
+    stats = scheduler.stats()["a.example"]
+    assert stats.requests == 2 and stats.throttled == 1
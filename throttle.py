@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean the host wants us to slow down
+THROTTLE_STATUSES = frozenset({429, 503})
+# Pause after a throttling response without a usable Retry-After, in seconds
+DEFAULT_PAUSE = 5.0
+# Longest pause honoured from a Retry-After header
+MAX_PAUSE = 60.0
+# Share of the configured rate regained after each successful response
+RECOVERY = 0.05
+
+
+@dataclass(frozen=True)
+class HostLimit:
+    """How hard one host may be crawled.
+
+    ``rate`` requests per second are allowed on average, with bursts of up to
+    ``burst`` back-to-back requests, and at most ``max_in_flight`` requests
+    are sent at once.  After a throttling response the rate is halved, down
+    to ``min_rate``, and then recovers gradually.
+    """
+
+    rate: float = 5.0
+    burst: int = 5
+    max_in_flight: int = 4
+    min_rate: float = 0.2
+
+
+DEFAULT_LIMIT = HostLimit()
+
+
+@dataclass
+class HostStats:
+    """Requests let through for one host and the time they spent queued."""
+
+    requests: int = 0
+    waited: float = 0.0
+    max_wait: float = 0.0
+    throttled: int = 0
+    # Current allowed rate, lowered after throttling responses
+    rate: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.waited / self.requests if self.requests else 0.0
+
+
+class _Host:
+    def __init__(self, limit: HostLimit, now: float) -> None:
+        self.limit = limit
+        self.rate = limit.rate
+        self.tokens = float(limit.burst)
+        self.updated = now
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = HostStats(rate=limit.rate)
+        self.ready = threading.Condition()
+
+    def refill(self, now: float) -> None:
+        # No tokens accrue while the host is paused
+        since = max(self.updated, self.paused_until)
+        if now > since:
+            self.tokens = min(float(self.limit.burst), self.tokens + (now - since) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> Optional[float]:
+        """Seconds until a request could go out, or None to wait for a release."""
+        if self.in_flight >= self.limit.max_in_flight:
+            return None
+        return max(self.paused_until - now, (1.0 - self.tokens) / self.rate, 0.0)
+
+
+class HostScheduler:
+    """Per-host token buckets and in-flight limits for outgoing requests.
+
+    :meth:`acquire` blocks until a request to a host may be sent and
+    :meth:`release` reports how it went.  A 429, or a 503 with
+    ``Retry-After``, pauses the host for the requested time and halves its
+    rate; successful responses then raise the rate back step by step.
+    Hosts without an entry in ``limits`` get ``default``.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, HostLimit]] = None,
+        default: HostLimit = DEFAULT_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limits: Dict[str, HostLimit] = dict(limits or {})
+        self.default = default
+        self.clock = clock
+        self._hosts: Dict[str, _Host] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _Host:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _Host(self.limits.get(host, self.default), self.clock())
+                self._hosts[host] = state
+            return state
+
+    def acquire(self, host: str) -> float:
+        """Wait for a free slot and a token for ``host``; return the seconds waited."""
+        state = self._host(host)
+        started = self.clock()
+        with state.ready:
+            while True:
+                now = self.clock()
+                state.refill(now)
+                delay = state.delay(now)
+                if delay is not None and delay <= 0:
+                    break
+                state.ready.wait(delay)
+            state.tokens -= 1.0
+            state.in_flight += 1
+            waited = self.clock() - started
+            stats = state.stats
+            stats.requests += 1
+            stats.waited += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        return waited
+
+    def release(self, host: str, status: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        """Free the slot taken by :meth:`acquire`.
+
+        ``status`` is the response status, or None if the request failed.
+        """
+        state = self._host(host)
+        with state.ready:
+            state.in_flight -= 1
+            limit = state.limit
+            if status == 429 or (status in THROTTLE_STATUSES and retry_after is not None):
+                pause = DEFAULT_PAUSE if retry_after is None else min(retry_after, MAX_PAUSE)
+                state.paused_until = max(state.paused_until, self.clock() + pause)
+                state.rate = max(limit.min_rate, state.rate / 2)
+                # Resume one request at a time rather than with a full burst
+                state.tokens = min(state.tokens, 0.0)
+                state.stats.throttled += 1
+                logger.info("%s throttled us (%s); pausing %.1fs at %.2f req/s", host, status, pause, state.rate)
+            elif status is not None and status < 400 and state.rate < limit.rate:
+                state.rate = min(limit.rate, state.rate + limit.rate * RECOVERY)
+            state.stats.rate = state.rate
+            state.ready.notify_all()
+
+    def stats(self) -> Dict[str, HostStats]:
+        """A snapshot of the counters of every host seen so far."""
+        with self._lock:
+            hosts = list(self._hosts.items())
+        snapshot = {}
+        for host, state in hosts:
+            with state.ready:
+                snapshot[host] = replace(state.stats)
+        return snapshot